@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Benchmark de regresión del dashboard del padre.
+
+Compara la agregación antigua (Avg/Count sobre notas, asistencias y
+participaciones en un mismo queryset, que multiplica las filas del JOIN)
+con las subconsultas correlacionadas de PadreDashboardView.anotar_estadisticas.
+
+Pensado para correr sobre los datos de crear_datos_masivos.py.
+Ejecutar con: python benchmark_dashboard_padre.py [--padres 20] [--repeticiones 5]
+"""
+
+import os
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+import django
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'colegio.settings')
+django.setup()
+
+from django.db import connection
+from django.db.models import Avg, Count, Q, Case, When, FloatField, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+from core.models import Alumno, Padre, Nota, Asistencia, Participacion
+from core.periodos import ordenar
+from core.views import PadreDashboardView
+
+
+def queryset_legacy(hijos, periodo_actual, periodo_anterior, desde):
+    """Agregación original: un único queryset con JOIN a las tres relaciones"""
+    return hijos.annotate(
+        promedio_periodo=Avg('notas__valor', filter=Q(notas__periodo=periodo_actual)),
+        promedio_anterior=Avg(
+            'notas__valor', filter=Q(notas__periodo=periodo_anterior)
+        ) if periodo_anterior else Value(None, output_field=FloatField()),
+        total_dias_clase=Count('asistencias', filter=Q(asistencias__fecha__gte=desde)),
+        dias_presente=Count('asistencias', filter=Q(asistencias__fecha__gte=desde, asistencias__presente=True)),
+        dias_ausente_mes=Count('asistencias', filter=Q(asistencias__fecha__gte=desde, asistencias__presente=False)),
+        total_participaciones_mes=Count('participaciones', filter=Q(participaciones__fecha__gte=desde)),
+        promedio_participaciones=Avg('participaciones__valor', filter=Q(participaciones__fecha__gte=desde))
+    ).annotate(
+        porcentaje_asistencia=Case(
+            When(total_dias_clase__gt=0, then=(Cast('dias_presente', FloatField()) * 100.0 / Cast('total_dias_clase', FloatField()))),
+            default=100.0,
+            output_field=FloatField()
+        )
+    )
+
+
+def filas_join_legacy(hijo_ids):
+    """Filas intermedias del JOIN antiguo: notas × asistencias × participaciones por hijo"""
+    notas = dict(Nota.objects.filter(alumno_id__in=hijo_ids).values_list('alumno').annotate(n=Count('id')))
+    asistencias = dict(Asistencia.objects.filter(alumno_id__in=hijo_ids).values_list('alumno').annotate(n=Count('id')))
+    participaciones = dict(Participacion.objects.filter(alumno_id__in=hijo_ids).values_list('alumno').annotate(n=Count('id')))
+    return sum(
+        max(notas.get(i, 0), 1) * max(asistencias.get(i, 0), 1) * max(participaciones.get(i, 0), 1)
+        for i in hijo_ids
+    )
+
+
+def filas_explain(queryset):
+    """Filas reales leídas según EXPLAIN ANALYZE (solo PostgreSQL)"""
+    if connection.vendor != 'postgresql':
+        return None
+    import json
+    plan = json.loads(queryset.explain(analyze=True, format='json'))
+
+    def sumar(nodo):
+        total = nodo.get('Actual Rows', 0) * nodo.get('Actual Loops', 1)
+        return total + sum(sumar(hijo) for hijo in nodo.get('Plans', []))
+
+    return sum(sumar(entrada['Plan']) for entrada in plan)
+
+
+def medir(construir, repeticiones):
+    """Latencia mediana en ms de evaluar el queryset"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        list(construir())
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--padres', type=int, default=20, help='Padres con más hijos a medir')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    padres = Padre.objects.annotate(num_hijos=Count('hijos')).filter(num_hijos__gt=0).order_by('-num_hijos')[:args.padres]
+    desde = timezone.now().date() - timedelta(days=30)
+
+    print("📊 BENCHMARK DASHBOARD DEL PADRE")
+    print("=" * 60)
+    print(f"{'padre':>6} {'hijos':>5} {'filas legacy':>14} {'filas subq':>11} {'ms legacy':>10} {'ms subq':>8} {'conteos ok':>10}")
+
+    total_legacy = total_nuevo = 0.0
+    for padre in padres:
+        hijo_ids = list(padre.hijos.values_list('id', flat=True))
+        periodos = ordenar(Nota.objects.filter(alumno_id__in=hijo_ids).values_list('periodo_id', flat=True).distinct())[:2]
+        periodo_actual = periodos[0] if periodos else None
+        periodo_anterior = periodos[1] if len(periodos) > 1 else None
+        base = Alumno.objects.filter(id__in=hijo_ids)
+
+        def legacy():
+            return queryset_legacy(base, periodo_actual, periodo_anterior, desde)
+
+        def nuevo():
+            return PadreDashboardView.anotar_estadisticas(base, periodo_actual, periodo_anterior, desde)
+
+        ms_legacy = medir(legacy, args.repeticiones)
+        ms_nuevo = medir(nuevo, args.repeticiones)
+        total_legacy += ms_legacy
+        total_nuevo += ms_nuevo
+
+        # Los conteos reales no dependen del JOIN: comparar contra consultas directas
+        reales = {
+            h.id: h.total_dias_clase for h in nuevo()
+        }
+        esperados = dict(
+            Asistencia.objects.filter(alumno_id__in=hijo_ids, fecha__gte=desde)
+            .values_list('alumno').annotate(n=Count('id'))
+        )
+        conteos_ok = all(reales[i] == esperados.get(i, 0) for i in hijo_ids)
+
+        filas_nuevo = filas_explain(nuevo())
+        filas_legacy = filas_explain(legacy()) or filas_join_legacy(hijo_ids)
+        print(
+            f"{padre.id:>6} {len(hijo_ids):>5} {filas_legacy:>14} "
+            f"{filas_nuevo if filas_nuevo is not None else '-':>11} "
+            f"{ms_legacy:>10.2f} {ms_nuevo:>8.2f} {'sí' if conteos_ok else 'NO':>10}"
+        )
+
+    print("=" * 60)
+    print(f"⏱️  Total legacy: {total_legacy:.2f} ms | subconsultas: {total_nuevo:.2f} ms")
+    if connection.vendor != 'postgresql':
+        print("ℹ️  Filas por EXPLAIN ANALYZE solo disponibles en PostgreSQL; las filas legacy se estiman del JOIN")
+
+
+if __name__ == '__main__':
+    main()
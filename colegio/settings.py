@@ -146,7 +146,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.RolJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -180,6 +180,8 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.RolTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.RolTokenRefreshSerializer',
 
     'JTI_CLAIM': 'jti',
 
@@ -188,6 +190,10 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Firmar rol y alcance (cursos tutoreados, hijos) en el access token para que
+# las peticiones autenticadas no consulten auth_user ni los perfiles
+JWT_ROLE_CLAIMS = config('JWT_ROLE_CLAIMS', default=False, cast=bool)
+
 # CORS settings - Configuración permisiva para desarrollo
 CORS_ALLOW_ALL_ORIGINS = True  # Permite todos los orígenes
 CORS_ALLOW_CREDENTIALS = True
@@ -223,4 +229,30 @@ CORS_ALLOW_METHODS = [
 # Configuración para QR
 QR_ATTENDANCE_TIME_START = '07:00'  # Hora de inicio para registro de asistencia
 QR_ATTENDANCE_TIME_END = '08:30'    # Hora límite para registro de asistencia
-QR_LOCATION_TOLERANCE = 0.001       # Tolerancia en grados para la ubicación (aprox 100m)
+QR_RADIO_METROS = config('QR_RADIO_METROS', default=111, cast=float)  # Radio alrededor del colegio sin geocercas
+QR_GEOCERCA_CELDA_GRADOS = 0.01     # Lado de las celdas del índice de geocercas (aprox 1km)
+ASISTENCIA_DIAS_LECTIVOS = [0, 1, 2, 3, 4]  # Lunes a viernes (date.weekday())
+QR_TOKEN_ROTATIVO = config('QR_TOKEN_ROTATIVO', default=False, cast=bool)  # Códigos QR firmados que rotan
+QR_TOKEN_PASO = config('QR_TOKEN_PASO', default=30, cast=int)    # Segundos de vigencia de cada código
+QR_TOKEN_VENTANA = 1                # Pasos aceptados antes y después del actual
+QR_CACHE_TTL = 300                  # Segundos que un proceso confía en los datos del colegio en memoria
+QR_ASISTENCIA_DIFERIDA = config('QR_ASISTENCIA_DIFERIDA', default=False, cast=bool)  # Encolar registros QR (procesar_checkins)
+ASISTENCIA_SINCRONIZACION_MAX_HORAS = 24  # Antigüedad máxima de una toma de asistencia hecha sin conexión
+QR_SINCRONIZACION_MAX_MINUTOS = 15  # Antigüedad máxima de un escaneo QR hecho sin conexión
+ASISTENCIA_DESFASE_SEGUNDOS = 120  # Adelanto tolerado del reloj del dispositivo
+IDEMPOTENCIA_TTL_HORAS = 48         # Vigencia de las claves Idempotency-Key (purgar_idempotencia)
+
+# Feeds de cambios (/api/<recurso>/cambios/)
+CAMBIOS_RETRASO_SEGUNDOS = 5        # Margen para transacciones que confirman tarde
+CAMBIOS_RETENCION_DIAS = 90         # Antigüedad de las marcas de borrado (purgar_eliminaciones)
+
+# Catálogo de períodos (core/periodos.py)
+PERIODOS_CACHE_TTL = 300           # Segundos que un proceso confía en la lista de períodos en memoria
+PERIODOS_AUSENTES_MAX = 256        # Códigos inexistentes recordados por proceso (llegan de la URL)
+
+# Dashboard del maestro
+MAESTRO_DASHBOARD_PARTICIPACIONES_DIAS = config('MAESTRO_DASHBOARD_PARTICIPACIONES_DIAS', default=90, cast=int)  # Ventana de participaciones mostradas
+
+# Predicción de rendimiento: artefacto generado por `manage.py entrenar_modelo_rendimiento`
+PREDICCION_MODELO_PATH = config('PREDICCION_MODELO_PATH', default=str(BASE_DIR / 'modelos' / 'rendimiento.joblib'))
+PREDICCION_MODELO_CACHE_TTL = 60   # Segundos entre revisiones del mtime del artefacto en cada proceso
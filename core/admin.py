@@ -1,11 +1,17 @@
 from django.contrib import admin
-from .models import Colegio, Curso, Materia, Maestro, Alumno, Padre, Nota, Asistencia, Participacion
+from .models import Colegio, Geocerca, Curso, Materia, Maestro, Alumno, Padre, Periodo, Nota, Asistencia, Participacion
 
 @admin.register(Colegio)
 class ColegioAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'direccion', 'latitud', 'longitud')
     search_fields = ('nombre',)
 
+@admin.register(Geocerca)
+class GeocercaAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'colegio', 'tipo', 'radio_metros', 'activa')
+    list_filter = ('colegio', 'tipo', 'activa')
+    search_fields = ('nombre', 'colegio__nombre')
+
 @admin.register(Maestro)
 class MaestroAdmin(admin.ModelAdmin):
     list_display = ('get_nombre_completo', 'get_username', 'telefono')
@@ -71,6 +77,12 @@ class AlumnoAdmin(admin.ModelAdmin):
         return obj.user.username
     get_username.short_description = 'Username'
 
+@admin.register(Periodo)
+class PeriodoAdmin(admin.ModelAdmin):
+    list_display = ('codigo', 'anio', 'ordinal', 'inicio', 'fin')
+    list_filter = ('anio',)
+    search_fields = ('codigo',)
+
 @admin.register(Nota)
 class NotaAdmin(admin.ModelAdmin):
     list_display = ('get_alumno', 'materia', 'periodo', 'valor', 'fecha_registro')
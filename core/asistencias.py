@@ -0,0 +1,173 @@
+"""
+Operaciones en bloque sobre la asistencia diaria.
+
+Antes de abrir la ventana QR se precrea como ausente la asistencia del día de
+todos los alumnos activos; así el registro por QR solo cambia presente de
+False a True con un UPDATE condicional, sin competir por el INSERT. Al cerrar
+la ventana, los alumnos que siguen sin asistencia quedan como ausentes.
+
+Con QR_ASISTENCIA_DIFERIDA los registros QR validados se encolan en
+CheckinPendiente y volcar_checkins() los aplica en bloque; la sincronización
+de escaneos hechos sin conexión usa el mismo marcar_presentes().
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Alumno, Asistencia, CheckinPendiente
+from .qr import horario_qr
+from .resumenes import BATCH_SIZE, actualizar_presencia_diaria
+
+
+def es_dia_lectivo(fecha):
+    return fecha.weekday() in getattr(settings, 'ASISTENCIA_DIAS_LECTIVOS', (0, 1, 2, 3, 4))
+
+
+def alumnos_activos(colegio_id=None):
+    alumnos = Alumno.objects.filter(user__is_active=True)
+    if colegio_id is not None:
+        alumnos = alumnos.filter(curso__colegio_id=colegio_id)
+    return alumnos
+
+
+def crear_ausencias(fecha, alumnos):
+    """
+    Insertar como ausente la asistencia de `fecha` de los alumnos que todavía
+    no la tienen. Es idempotente: una segunda ejecución no crea nada.
+    Devuelve la cantidad de filas insertadas.
+    """
+    faltantes = list(
+        alumnos.filter(
+            ~Exists(Asistencia.objects.filter(alumno=OuterRef('pk'), fecha=fecha))
+        ).values_list('id', flat=True)
+    )
+    if not faltantes:
+        return 0
+
+    with transaction.atomic():
+        # ignore_conflicts: un registro QR concurrente ya creó su fila y gana
+        Asistencia.objects.bulk_create(
+            (Asistencia(alumno_id=alumno_id, fecha=fecha, presente=False) for alumno_id in faltantes),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        actualizar_presencia_diaria(faltantes, fecha)
+    return len(faltantes)
+
+
+def desfase_tolerado():
+    """Diferencia tolerada entre el reloj de un dispositivo y el del servidor"""
+    return timedelta(seconds=int(getattr(settings, 'ASISTENCIA_DESFASE_SEGUNDOS', 120)))
+
+
+def atraso_qr_sin_conexion():
+    """Antigüedad máxima de un escaneo QR guardado sin conexión al sincronizarlo"""
+    return timedelta(minutes=int(getattr(settings, 'QR_SINCRONIZACION_MAX_MINUTOS', 15)))
+
+
+def momento_aceptable(momento, ahora=None, maximo_atraso=None):
+    """
+    Si la hora informada por un dispositivo es creíble: no más antigua que
+    `maximo_atraso` (por defecto ASISTENCIA_SINCRONIZACION_MAX_HORAS) ni más
+    adelantada que ASISTENCIA_DESFASE_SEGUNDOS respecto del servidor.
+    """
+    ahora = ahora or timezone.now()
+    if maximo_atraso is None:
+        maximo_atraso = timedelta(hours=int(getattr(settings, 'ASISTENCIA_SINCRONIZACION_MAX_HORAS', 24)))
+    return ahora - maximo_atraso <= momento <= ahora + desfase_tolerado()
+
+
+def ventana_cerrada(ahora):
+    """Si la hora local `ahora` ya pasó QR_ATTENDANCE_TIME_END"""
+    return ahora.time() > horario_qr()[1]
+
+
+def cerrar_asistencia(fecha, colegio_id):
+    """
+    Cerrar la asistencia de `fecha` en un colegio: los alumnos activos sin
+    registro quedan ausentes y se refresca el resumen diario de todos.
+    Es idempotente. Devuelve (ausencias creadas, conteos por curso).
+    """
+    alumnos = alumnos_activos(colegio_id)
+    with transaction.atomic():
+        creadas = crear_ausencias(fecha, alumnos)
+        # Reparar también los resúmenes de quienes ya tenían fila (QR, tutor)
+        actualizar_presencia_diaria(
+            Asistencia.objects.filter(fecha=fecha, alumno__in=alumnos).values_list('alumno_id', flat=True),
+            fecha
+        )
+
+    conteos = list(
+        Asistencia.objects.filter(fecha=fecha, alumno__in=alumnos)
+        .values('alumno__curso_id', 'alumno__curso__nombre')
+        .annotate(presentes=Count('id', filter=Q(presente=True)), ausentes=Count('id', filter=Q(presente=False)))
+        .order_by('alumno__curso__nombre')
+    )
+    return creadas, conteos
+
+
+def marcar_presentes(por_fecha):
+    """
+    Marcar como presentes por QR los alumnos de {fecha: {alumno_id: momento}}.
+    Igual que el registro directo, quien ya estaba presente no cambia; tampoco
+    una asistencia tomada después del escaneo (registrado_en más reciente),
+    que puede pasar cuando el escaneo llega tarde desde un teléfono sin señal.
+    Devuelve {fecha: alumnos marcados}. Llamar dentro de una transacción.
+    """
+    marcados = {}
+    for fecha, momentos in por_fecha.items():
+        descartados = {
+            alumno_id
+            for alumno_id, presente, registrado_en in Asistencia.objects.filter(
+                fecha=fecha, alumno_id__in=momentos
+            ).filter(Q(presente=True) | Q(registrado_en__isnull=False)).values_list(
+                'alumno_id', 'presente', 'registrado_en'
+            )
+            if presente or registrado_en > momentos[alumno_id]
+        }
+        nuevos = sorted(set(momentos) - descartados)
+        Asistencia.objects.bulk_create(
+            [
+                Asistencia(
+                    alumno_id=alumno_id, fecha=fecha, presente=True, registrado_por_qr=True,
+                    registrado_en=momentos[alumno_id]
+                )
+                for alumno_id in nuevos
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['alumno', 'fecha'],
+            update_fields=['presente', 'registrado_por_qr', 'registrado_en', 'actualizado'],
+        )
+        actualizar_presencia_diaria(nuevos, fecha)
+        marcados[fecha] = nuevos
+    return marcados
+
+
+def volcar_checkins(lote=5000):
+    """
+    Aplicar en bloque los registros QR diferidos más antiguos.
+    Devuelve (check-ins consumidos, asistencias marcadas como presentes).
+    """
+    with transaction.atomic():
+        # skip_locked: varios workers pueden vaciar la cola a la vez
+        pendientes = list(
+            CheckinPendiente.objects.select_for_update(skip_locked=True)
+            .order_by('id').values_list('id', 'alumno_id', 'fecha', 'recibido')[:lote]
+        )
+        if not pendientes:
+            return 0, 0
+
+        # Los escaneos repetidos de un alumno en el mismo día se aplican una
+        # vez, con el momento del primero
+        por_fecha = defaultdict(dict)
+        for _, alumno_id, fecha, recibido in pendientes:
+            por_fecha[fecha].setdefault(alumno_id, recibido)
+
+        marcados = marcar_presentes(por_fecha)
+        CheckinPendiente.objects.filter(id__in=[pendiente[0] for pendiente in pendientes]).delete()
+    return len(pendientes), sum(len(alumnos) for alumnos in marcados.values())
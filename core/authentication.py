@@ -0,0 +1,70 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .roles import RolUsuario, resolver_rol_por_id
+
+# Claims que se firman en el access token cuando JWT_ROLE_CLAIMS está activo
+CLAIM_ROL = 'rol'
+
+
+def role_claims_enabled():
+    return getattr(settings, 'JWT_ROLE_CLAIMS', False)
+
+
+class RolRefreshToken(RefreshToken):
+    """
+    Refresh token cuyos access tokens llevan el rol y el alcance del usuario.
+
+    Los claims solo se añaden al access token y se recalculan cada vez que se
+    emite uno (login y refresh), así que un cambio de rol se refleja como
+    mucho en la vida de un access token. El refresh token no lleva ninguno:
+    lo que se copiara de él sobreviviría a una degradación mientras se siga
+    rotando.
+    """
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        if role_claims_enabled():
+            rol = resolver_rol_por_id(self.payload[api_settings.USER_ID_CLAIM])
+            access[CLAIM_ROL] = rol.as_claims()
+            # Datos que TokenUser necesita para no consultar auth_user
+            access['username'] = rol.username
+            access['is_staff'] = rol.is_staff
+            access['is_superuser'] = rol.is_superuser
+        return access
+
+
+class RolTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RolRefreshToken
+
+
+class RolTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RolRefreshToken
+
+
+class RolTokenUser(TokenUser):
+    """Usuario sin estado construido solo a partir de los claims del token"""
+
+    @property
+    def rol_usuario(self):
+        return RolUsuario.from_claims(self.pk, self.is_superuser, self.token[CLAIM_ROL])
+
+
+class RolJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que confía en los claims de rol firmados en el token.
+
+    Con JWT_ROLE_CLAIMS activo y un token que trae el claim de rol, el usuario
+    se construye sin consultar auth_user ni los perfiles. Los tokens emitidos
+    sin ese claim siguen el camino normal contra la base de datos.
+    """
+
+    def get_user(self, validated_token):
+        if role_claims_enabled() and CLAIM_ROL in validated_token:
+            return RolTokenUser(validated_token)
+        return super().get_user(validated_token)
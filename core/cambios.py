@@ -0,0 +1,177 @@
+"""
+Feeds de cambios de notas, asistencias y participaciones.
+
+En lugar de volver a descargar el listado completo, el cliente guarda el
+cursor `since` de la última respuesta y pide solo lo creado, modificado o
+borrado después. Las filas se recorren por (actualizado, id) con el índice de
+esa pareja; los borrados salen de las marcas de Eliminacion.
+
+`actualizado` lo fija la escritura, no el commit: una transacción que tarda
+puede confirmar una fila con un `actualizado` anterior al de otra ya
+entregada. Por eso el feed solo entrega filas con más de
+CAMBIOS_RETRASO_SEGUNDOS de antigüedad; una transacción más larga que eso
+podría perderse hasta el siguiente cambio de la fila.
+"""
+import base64
+import json
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Alumno, Eliminacion
+from .roles import filtrar_por_alumno
+
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSEGUNDO = timedelta(microseconds=1)
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def _a_entero(momento):
+    return (momento - EPOCA) // MICROSEGUNDO
+
+
+def _a_fecha(entero):
+    return EPOCA + entero * MICROSEGUNDO
+
+
+def codificar_cursor(cambios, eliminaciones):
+    """Cursor opaco con la posición de ambos recorridos: ((momento, id), (momento, id))"""
+    datos = [_a_entero(cambios[0]), cambios[1], _a_entero(eliminaciones[0]), eliminaciones[1]]
+    return base64.urlsafe_b64encode(json.dumps(datos, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        t_cambios, id_cambios, t_eliminaciones, id_eliminaciones = (int(valor) for valor in datos)
+        return (_a_fecha(t_cambios), id_cambios), (_a_fecha(t_eliminaciones), id_eliminaciones)
+    except (ValueError, TypeError, OverflowError):
+        raise CursorInvalido('Cursor since inválido')
+
+
+def cursor_vencido(cursor):
+    """Si el cursor es anterior a las marcas de borrado que se conservan"""
+    retencion = timedelta(days=int(getattr(settings, 'CAMBIOS_RETENCION_DIAS', 90)))
+    return cursor[1][0] < timezone.now() - retencion
+
+
+def _despues_de(campo_momento, posicion):
+    momento, id_ = posicion
+    return Q(**{f'{campo_momento}__gt': momento}) | Q(**{campo_momento: momento, 'id__gt': id_})
+
+
+def _avanzar(posicion, ultima, corte, hay_mas):
+    """
+    Posición siguiente: la última fila entregada o, si ya no quedan filas
+    hasta el corte, el propio corte (mantiene el cursor reciente aunque no
+    haya cambios).
+    """
+    if ultima is not None:
+        posicion = ultima
+    if not hay_mas and posicion < (corte, 0):
+        posicion = (corte, 0)
+    return posicion
+
+
+def leer_cambios(queryset, modelo, rol, since=None, limite=500):
+    """
+    Cambios de `queryset` (ya filtrado por rol) y borrados de `modelo`
+    posteriores al cursor. Devuelve (filas, ids borrados, cursor siguiente,
+    hay_mas). Sin cursor se entrega todo desde el principio, sin borrados.
+    """
+    corte = timezone.now() - timedelta(seconds=int(getattr(settings, 'CAMBIOS_RETRASO_SEGUNDOS', 5)))
+    if since is None:
+        posicion_cambios, posicion_eliminaciones = (EPOCA, 0), (corte, 0)
+    else:
+        posicion_cambios, posicion_eliminaciones = since
+
+    filas = list(
+        queryset.filter(_despues_de('actualizado', posicion_cambios), actualizado__lte=corte)
+        .order_by('actualizado', 'id')[:limite + 1]
+    )
+    hay_mas_cambios = len(filas) > limite
+    filas = filas[:limite]
+
+    eliminaciones = list(
+        filtrar_por_alumno(
+            Eliminacion.objects.filter(modelo=modelo), rol, campo='alumno', campo_curso='curso_id'
+        )
+        .filter(_despues_de('eliminado', posicion_eliminaciones), eliminado__lte=corte)
+        .order_by('eliminado', 'id')
+        .values_list('eliminado', 'id', 'objeto_id')[:limite + 1]
+    )
+    hay_mas_eliminaciones = len(eliminaciones) > limite
+    eliminaciones = eliminaciones[:limite]
+
+    siguiente = codificar_cursor(
+        _avanzar(
+            posicion_cambios, (filas[-1].actualizado, filas[-1].id) if filas else None,
+            corte, hay_mas_cambios
+        ),
+        _avanzar(
+            posicion_eliminaciones, eliminaciones[-1][:2] if eliminaciones else None,
+            corte, hay_mas_eliminaciones
+        ),
+    )
+    return filas, [objeto_id for _, _, objeto_id in eliminaciones], siguiente, hay_mas_cambios or hay_mas_eliminaciones
+
+
+class _Lotes(threading.local):
+    """Por hilo: origen de un borrado en curso -> [marcas pendientes, marcas listas]"""
+
+    def __init__(self):
+        self.por_origen = weakref.WeakKeyDictionary()
+
+
+_lotes = _Lotes()
+
+
+def preparar_eliminacion(origen):
+    """
+    Contar un registro que el borrado `origen` va a eliminar (señal
+    pre_delete). Django envía todos los pre_delete de un borrado antes que
+    los post_delete, así que al llegar el último post_delete se sabe que el
+    lote está completo.
+    """
+    if origen is not None:
+        _lotes.por_origen.setdefault(origen, [0, []])[0] += 1
+
+
+def registrar_eliminacion(instancia, origen=None):
+    """
+    Marca de borrado de una nota, asistencia o participación (señal
+    post_delete). Las marcas de un mismo borrado (un queryset o una cascada)
+    se insertan juntas con el último registro, dentro de la transacción del
+    borrado; sin origen conocido se insertan de a una.
+    """
+    marca = Eliminacion(
+        modelo=instancia._meta.model_name,
+        objeto_id=instancia.pk,
+        alumno_id=instancia.alumno_id,
+    )
+    lote = _lotes.por_origen.get(origen) if origen is not None else None
+    if lote is None:
+        _guardar_marcas([marca])
+        return
+    lote[0] -= 1
+    lote[1].append(marca)
+    if lote[0] <= 0:
+        del _lotes.por_origen[origen]
+        _guardar_marcas(lote[1])
+
+
+def _guardar_marcas(marcas):
+    """Un INSERT para todas las marcas, con el curso de cada alumno en una sola consulta"""
+    cursos = dict(
+        Alumno.objects.filter(id__in={marca.alumno_id for marca in marcas}).values_list('id', 'curso_id')
+    )
+    for marca in marcas:
+        marca.curso_id = cursos.get(marca.alumno_id)
+    Eliminacion.objects.bulk_create(marcas)
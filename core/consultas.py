@@ -0,0 +1,120 @@
+"""
+select_related / prefetch_related deducidos del serializer.
+
+Los serializers leen relaciones por cada fila (`source='alumno.user.get_full_name'`,
+serializers anidados, listas de ManyToMany). planificar_relaciones() recorre
+una sola vez por clase los campos del serializer contra los metadatos del
+modelo y arma:
+
+- select_related con las cadenas de ForeignKey/OneToOne que atraviesa un campo
+- prefetch_related desde la primera relación múltiple (ManyToMany o FK inversa)
+
+Un PrimaryKeyRelatedField de una FK (o un campo relacionado con
+use_pk_only_optimization, como PeriodoField) solo lee la columna *_id y no
+agrega nada. Los SerializerMethodField no se pueden inspeccionar: el serializer
+declara lo que usan en `Meta.relaciones` (rutas con __).
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _es_anidado(campo):
+    return isinstance(campo, serializers.BaseSerializer)
+
+
+def _solo_clave(campo):
+    """
+    Campos que se resuelven con el id, sin cargar el objeto relacionado
+    (PrimaryKeyRelatedField o campos con use_pk_only_optimization)
+    """
+    if isinstance(campo, serializers.ManyRelatedField):
+        return False
+    return isinstance(campo, serializers.RelatedField) and campo.use_pk_only_optimization()
+
+
+def _agregar_ruta(modelo, atributos, prefijo, multiple, cargar_ultimo, seleccionar, precargar):
+    """
+    Recorrer `atributos` desde `modelo` agregando las relaciones atravesadas.
+    Devuelve (modelo alcanzado, ruta, multiple) si todos los atributos son
+    relaciones, o None si la ruta termina en un campo o en un método.
+    """
+    ruta = list(prefijo)
+    for indice, atributo in enumerate(atributos):
+        try:
+            campo_modelo = modelo._meta.get_field(atributo)
+        except FieldDoesNotExist:
+            return None
+        if not campo_modelo.is_relation:
+            return None
+        if indice == len(atributos) - 1 and not cargar_ultimo:
+            return None
+
+        ruta.append(atributo)
+        multiple = multiple or campo_modelo.many_to_many or campo_modelo.one_to_many
+        (precargar if multiple else seleccionar).add('__'.join(ruta))
+        modelo = campo_modelo.related_model
+    return modelo, ruta, multiple
+
+
+def _planificar(serializer, modelo, prefijo, multiple, seleccionar, precargar):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    for ruta in getattr(getattr(serializer, 'Meta', None), 'relaciones', ()):
+        _agregar_ruta(modelo, ruta.split('__'), prefijo, multiple, True, seleccionar, precargar)
+
+    for campo in serializer.fields.values():
+        if campo.write_only:
+            continue
+        if campo.source == '*':
+            if _es_anidado(campo):
+                _planificar(campo, modelo, prefijo, multiple, seleccionar, precargar)
+            continue
+
+        alcanzado = _agregar_ruta(
+            modelo, campo.source_attrs, prefijo, multiple,
+            not _solo_clave(campo), seleccionar, precargar
+        )
+        if alcanzado is not None and _es_anidado(campo):
+            _planificar(campo, *alcanzado, seleccionar, precargar)
+
+
+@lru_cache(maxsize=None)
+def planificar_relaciones(serializer_class):
+    """(select_related, prefetch_related) que necesita serializar una fila"""
+    serializer = serializer_class()
+    modelo = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if modelo is None:
+        return (), ()
+
+    seleccionar, precargar = set(), set()
+    _planificar(serializer, modelo, [], False, seleccionar, precargar)
+    # 'alumno' ya está incluido en 'alumno__user'
+    seleccionar = {
+        ruta for ruta in seleccionar
+        if not any(otra.startswith(ruta + '__') for otra in seleccionar)
+    }
+    return tuple(sorted(seleccionar)), tuple(sorted(precargar))
+
+
+def aplicar_relaciones(queryset, serializer_class):
+    seleccionar, precargar = planificar_relaciones(serializer_class)
+    if seleccionar:
+        queryset = queryset.select_related(*seleccionar)
+    if precargar:
+        queryset = queryset.prefetch_related(*precargar)
+    return queryset
+
+
+class RelacionesSerializerMixin:
+    """
+    Para las vistas genéricas: agrega al queryset las relaciones que usa el
+    serializer de la petición. Se engancha en filter_queryset, que usan tanto
+    los listados como get_object, para no depender de cómo cada vista arma
+    su get_queryset.
+    """
+
+    def filter_queryset(self, queryset):
+        return aplicar_relaciones(super().filter_queryset(queryset), self.get_serializer_class())
@@ -0,0 +1,176 @@
+"""
+Geocercas del registro QR.
+
+Cada colegio tiene una o más zonas (círculos con distancia haversine o
+polígonos con ray casting). Sin geocercas se usa un círculo de QR_RADIO_METROS
+alrededor de la ubicación del colegio.
+
+Para no recorrer todas las zonas en cada escaneo, se precalcula por proceso
+una grilla de celdas de QR_GEOCERCA_CELDA_GRADOS: cada celda guarda las zonas
+cuyo rectángulo envolvente la toca, así que encontrar las candidatas de una
+coordenada es una búsqueda en un diccionario. El índice se reconstruye al
+guardar un Colegio o una Geocerca (core/signals.py) o pasado QR_CACHE_TTL.
+"""
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+RADIO_TIERRA_METROS = 6371008.8
+METROS_POR_GRADO = 111320.0
+
+logger = logging.getLogger(__name__)
+
+
+def haversine_metros(lat1, lng1, lat2, lng2):
+    """Distancia sobre la esfera terrestre entre dos coordenadas, en metros"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RADIO_TIERRA_METROS * math.asin(math.sqrt(a))
+
+
+def punto_en_poligono(lat, lng, vertices):
+    """
+    Ray casting sobre [lat, lng]. A escala de un campus la proyección plana
+    es exacta de sobra.
+    """
+    dentro = False
+    j = len(vertices) - 1
+    for i in range(len(vertices)):
+        lat_i, lng_i = vertices[i]
+        lat_j, lng_j = vertices[j]
+        if (lat_i > lat) != (lat_j > lat):
+            cruce = lng_i + (lat - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+            if lng < cruce:
+                dentro = not dentro
+        j = i
+    return dentro
+
+
+class Zona:
+    """Forma de una geocerca ya preparada para consultas rápidas"""
+
+    def __init__(self, colegio_id, nombre, tipo, latitud=None, longitud=None,
+                 radio_metros=None, vertices=()):
+        self.colegio_id = colegio_id
+        self.nombre = nombre
+        self.tipo = tipo
+        self.latitud = latitud
+        self.longitud = longitud
+        self.radio_metros = radio_metros
+        self.vertices = [tuple(v) for v in vertices]
+
+        if tipo == 'circulo':
+            dlat = radio_metros / METROS_POR_GRADO
+            dlng = radio_metros / (METROS_POR_GRADO * max(math.cos(math.radians(latitud)), 1e-6))
+            self.envolvente = (latitud - dlat, longitud - dlng, latitud + dlat, longitud + dlng)
+        else:
+            lats = [v[0] for v in self.vertices]
+            lngs = [v[1] for v in self.vertices]
+            self.envolvente = (min(lats), min(lngs), max(lats), max(lngs))
+
+    def contiene(self, lat, lng):
+        lat_min, lng_min, lat_max, lng_max = self.envolvente
+        if not (lat_min <= lat <= lat_max and lng_min <= lng <= lng_max):
+            return False
+        if self.tipo == 'circulo':
+            return haversine_metros(self.latitud, self.longitud, lat, lng) <= self.radio_metros
+        return punto_en_poligono(lat, lng, self.vertices)
+
+
+class IndiceGeocercas:
+    """Grilla de celdas -> zonas candidatas"""
+
+    def __init__(self, zonas, celda_grados):
+        self.celda = celda_grados
+        self.celdas = {}
+        for zona in zonas:
+            lat_min, lng_min, lat_max, lng_max = zona.envolvente
+            i_min, j_min = self._celda(lat_min, lng_min)
+            i_max, j_max = self._celda(lat_max, lng_max)
+            for i in range(i_min, i_max + 1):
+                for j in range(j_min, j_max + 1):
+                    self.celdas.setdefault((i, j), []).append(zona)
+
+    def _celda(self, lat, lng):
+        return math.floor(lat / self.celda), math.floor(lng / self.celda)
+
+    def zonas_en(self, lat, lng):
+        """Zonas que contienen la coordenada (normalmente una o ninguna)"""
+        return [zona for zona in self.celdas.get(self._celda(lat, lng), ()) if zona.contiene(lat, lng)]
+
+    def zona_de_colegio(self, colegio_id, lat, lng):
+        for zona in self.zonas_en(lat, lng):
+            if zona.colegio_id == colegio_id:
+                return zona
+        return None
+
+
+_indice = None
+_indice_vence = 0.0
+_indice_lock = threading.Lock()
+
+
+def construir_indice():
+    """
+    Zonas activas de todos los colegios, con el círculo por defecto para los
+    que no tienen. Las geocercas inválidas (guardadas antes de validarse o
+    editadas directo en la base) se omiten con un aviso en el log; si un
+    colegio se queda sin ninguna, usa el círculo por defecto.
+    """
+    from .models import Colegio, Geocerca
+
+    zonas = []
+    con_geocercas = set()
+    for geocerca in Geocerca.objects.filter(activa=True):
+        try:
+            geocerca.clean()
+            zona = Zona(
+                geocerca.colegio_id, geocerca.nombre, geocerca.tipo,
+                geocerca.latitud, geocerca.longitud, geocerca.radio_metros, geocerca.vertices,
+            )
+        except (ValidationError, TypeError, ValueError) as e:
+            logger.warning(f"Geocerca {geocerca.id} del colegio {geocerca.colegio_id} omitida: {e}")
+            continue
+        zonas.append(zona)
+        con_geocercas.add(geocerca.colegio_id)
+
+    radio = float(getattr(settings, 'QR_RADIO_METROS', 111))
+    for colegio_id, nombre, latitud, longitud in Colegio.objects.exclude(
+        id__in=con_geocercas
+    ).values_list('id', 'nombre', 'latitud', 'longitud'):
+        zonas.append(Zona(colegio_id, nombre, 'circulo', latitud, longitud, radio))
+
+    return IndiceGeocercas(zonas, float(getattr(settings, 'QR_GEOCERCA_CELDA_GRADOS', 0.01)))
+
+
+def indice_geocercas():
+    """Índice del proceso, construido la primera vez que se necesita"""
+    global _indice, _indice_vence
+    ahora = time.monotonic()
+    if _indice is not None and _indice_vence > ahora:
+        return _indice
+    with _indice_lock:
+        if _indice is None or _indice_vence <= ahora:
+            _indice = construir_indice()
+            _indice_vence = ahora + int(getattr(settings, 'QR_CACHE_TTL', 300))
+        return _indice
+
+
+def invalidar_indice():
+    global _indice
+    with _indice_lock:
+        _indice = None
+
+
+@receiver(setting_changed)
+def _reconstruir_por_ajustes(setting, **kwargs):
+    if setting in ('QR_RADIO_METROS', 'QR_GEOCERCA_CELDA_GRADOS'):
+        invalidar_indice()
@@ -0,0 +1,93 @@
+"""
+Claves de idempotencia para los registros de asistencia.
+
+Un teléfono con mala señal reintenta el mismo POST varias veces. Si la
+petición trae la cabecera `Idempotency-Key`, la primera respuesta se guarda
+(código y cuerpo) en ClaveIdempotencia y los reintentos con la misma clave la
+reciben de nuevo sin repetir la operación. Las claves son por usuario y por
+ámbito y vencen a las IDEMPOTENCIA_TTL_HORAS; `manage.py purgar_idempotencia`
+borra las vencidas.
+
+Dos reintentos simultáneos con la misma clave pueden ejecutarse ambos: los
+registros de asistencia ya son idempotentes por (alumno, fecha), así que el
+resultado es el mismo y solo se guarda la primera respuesta.
+"""
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ClaveIdempotencia
+
+CABECERA = 'HTTP_IDEMPOTENCY_KEY'
+LONGITUD_MAXIMA = 64
+
+
+def vencimiento():
+    """Las claves creadas antes de este momento ya no cuentan"""
+    return timezone.now() - timedelta(hours=int(getattr(settings, 'IDEMPOTENCIA_TTL_HORAS', 48)))
+
+
+def buscar_claves(usuario_id, ambito, claves):
+    """{clave: ClaveIdempotencia} de las claves vigentes ya usadas"""
+    return {
+        registro.clave: registro
+        for registro in ClaveIdempotencia.objects.filter(
+            usuario_id=usuario_id, ambito=ambito, clave__in=claves, creada__gte=vencimiento()
+        )
+    }
+
+
+def guardar_claves(usuario_id, ambito, respuestas):
+    """
+    Guardar {clave: (estado, cuerpo)}. Si la clave ya existe (reintento
+    simultáneo o clave vencida sin purgar) se conserva la primera.
+    """
+    ClaveIdempotencia.objects.bulk_create(
+        [
+            ClaveIdempotencia(usuario_id=usuario_id, ambito=ambito, clave=clave, estado=estado, respuesta=cuerpo)
+            for clave, (estado, cuerpo) in respuestas.items()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def purgar(antes=None):
+    """Borrar las claves vencidas. Devuelve la cantidad borrada"""
+    borradas, _ = ClaveIdempotencia.objects.filter(creada__lt=antes or vencimiento()).delete()
+    return borradas
+
+
+def idempotente(ambito):
+    """
+    Decorador para el post() de una vista: con `Idempotency-Key`, repite la
+    respuesta guardada en lugar de volver a ejecutar la operación.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            clave = request.META.get(CABECERA)
+            if not clave:
+                return metodo(self, request, *args, **kwargs)
+            if len(clave) > LONGITUD_MAXIMA:
+                return Response(
+                    {'error': f'Idempotency-Key admite hasta {LONGITUD_MAXIMA} caracteres'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            guardada = buscar_claves(request.user.id, ambito, [clave]).get(clave)
+            if guardada is not None:
+                respuesta = Response(guardada.respuesta, status=guardada.estado)
+                respuesta['Idempotent-Replayed'] = 'true'
+                return respuesta
+
+            respuesta = metodo(self, request, *args, **kwargs)
+            # Los errores del servidor no se guardan: el reintento debe poder prosperar
+            if respuesta.status_code < 500:
+                guardar_claves(request.user.id, ambito, {clave: (respuesta.status_code, respuesta.data)})
+            return respuesta
+        return envoltura
+    return decorador
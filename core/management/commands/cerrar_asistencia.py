@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.asistencias import cerrar_asistencia, es_dia_lectivo, ventana_cerrada
+from core.models import Colegio
+
+
+class Command(BaseCommand):
+    help = (
+        'Cierra la ventana de asistencia: marca como ausentes a los alumnos sin registro '
+        'y refresca los resúmenes diarios. Programar después de QR_ATTENDANCE_TIME_END'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', type=date.fromisoformat, default=None,
+                            help='Fecha a cerrar (AAAA-MM-DD); por defecto hoy')
+        parser.add_argument('--colegio', type=int, default=None, help='Limitar a un colegio')
+        parser.add_argument('--forzar', action='store_true',
+                            help='Cerrar aunque la ventana siga abierta o no sea día lectivo')
+
+    def handle(self, *args, **options):
+        ahora = timezone.localtime()
+        fecha = options['fecha'] or ahora.date()
+
+        if not options['forzar']:
+            if not es_dia_lectivo(fecha):
+                self.stdout.write(f'{fecha} no es día lectivo; no se cierra nada')
+                return
+            if fecha == ahora.date() and not ventana_cerrada(ahora):
+                raise CommandError('La ventana de asistencia sigue abierta; usa --forzar para cerrarla igual')
+
+        colegios = Colegio.objects.order_by('id')
+        if options['colegio'] is not None:
+            colegios = colegios.filter(id=options['colegio'])
+
+        for colegio in colegios:
+            creadas, conteos = cerrar_asistencia(fecha, colegio.id)
+            self.stdout.write(f'🏫 {colegio.nombre}: {creadas} ausencias registradas')
+            for curso in conteos:
+                self.stdout.write(
+                    f"   {curso['alumno__curso__nombre']}: "
+                    f"{curso['presentes']} presentes, {curso['ausentes']} ausentes"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Asistencia del {fecha} cerrada'))
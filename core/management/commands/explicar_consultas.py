@@ -0,0 +1,101 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import (
+    Alumno, Asistencia, Curso, Materia, Nota, Participacion, Periodo,
+    ResumenDiarioAlumno, ResumenPeriodoAlumno,
+)
+
+
+def consultas_frecuentes():
+    """
+    (nombre, queryset) con la forma de los filtros de core/views.py y
+    core/resumenes.py, armados con datos reales de la base si los hay.
+    """
+    hoy = timezone.now().date()
+    curso_id = Curso.objects.order_by('id').values_list('id', flat=True).first() or 0
+    alumnos = list(Alumno.objects.filter(curso_id=curso_id).order_by('id').values_list('id', flat=True)) or [0]
+    materias = list(Materia.objects.filter(curso_id=curso_id).order_by('id').values_list('id', flat=True)) or [0]
+    periodo = Periodo.objects.order_by('-anio', '-ordinal').values_list('id', flat=True).first() or 0
+
+    return [
+        ('dashboard_maestro.periodos',
+         ResumenPeriodoAlumno.objects.filter(alumno__curso_id=curso_id, num_notas__gt=0)
+         .values_list('periodo_id', flat=True).distinct()),
+        ('dashboard_maestro.notas', Nota.objects.filter(periodo=periodo, alumno_id__in=alumnos)),
+        ('dashboard_maestro.participaciones',
+         Participacion.objects.filter(fecha__gte=hoy - timedelta(days=30), alumno_id__in=alumnos)),
+        ('libreta',
+         Nota.objects.filter(alumno__curso_id=curso_id, periodo=periodo)
+         .values_list('alumno_id', 'materia_id', 'valor')),
+        ('notas.lista',
+         Nota.objects.filter(materia_id=materias[0], periodo=periodo).order_by('-fecha_registro', '-id')),
+        ('asistencia.lista', Asistencia.objects.filter(fecha=hoy).order_by('-fecha', '-id')),
+        ('participaciones.lista',
+         Participacion.objects.filter(materia_id=materias[0], fecha=hoy).order_by('-fecha', '-id')),
+        ('detalle_hijo.asistencias',
+         Asistencia.objects.filter(alumno_id=alumnos[0], fecha__gte=hoy - timedelta(days=60)).order_by('-fecha')),
+        ('detalle_hijo.notas',
+         Nota.objects.filter(alumno_id=alumnos[0], periodo=periodo, materia_id__in=materias)),
+        ('detalle_hijo.participaciones',
+         Participacion.objects.filter(materia_id__in=materias, alumno_id=alumnos[0],
+                                      fecha__gte=hoy - timedelta(days=90)).order_by('-fecha')),
+        ('resumen_diario.presencia',
+         Asistencia.objects.filter(alumno_id__in=alumnos, fecha=hoy).values_list('alumno_id', 'presente')),
+        ('resumen_diario.participaciones',
+         Participacion.objects.filter(alumno_id=alumnos[0], fecha=hoy).values_list('alumno_id', 'fecha', 'valor')),
+        ('dashboard_padre.periodos',
+         ResumenPeriodoAlumno.objects.filter(alumno_id__in=alumnos, num_notas__gt=0)
+         .values_list('periodo_id', flat=True).distinct()),
+        ('dashboard_padre.diarios',
+         ResumenDiarioAlumno.objects.filter(alumno_id__in=alumnos, fecha__gte=hoy - timedelta(days=30))),
+    ]
+
+
+def recorrido_completo(plan, tabla):
+    """Si el plan lee `tabla` entera en lugar de buscar por un índice"""
+    if connection.vendor == 'postgresql':
+        return re.search(rf'Seq Scan on {tabla}\b', plan) is not None
+    # SQLite: "SCAN tabla" sin índice; "SEARCH ... USING INDEX" es lo esperado
+    return re.search(rf'\bSCAN {tabla}\b(?! USING (COVERING )?INDEX)', plan) is not None
+
+
+class Command(BaseCommand):
+    help = (
+        'Muestra el plan (EXPLAIN) de las consultas más frecuentes y avisa si alguna '
+        'recorre la tabla entera en lugar de usar un índice'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estricto', action='store_true',
+                            help='Terminar con error si alguna consulta no usa índice')
+        parser.add_argument('--planes', action='store_true', help='Imprimir el plan completo de cada consulta')
+
+    def handle(self, *args, **options):
+        sin_indice = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Con tablas chicas el planificador prefiere recorrerlas; se desalienta
+                # para ver qué índice elegiría con volumen real
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for nombre, queryset in consultas_frecuentes():
+                plan = queryset.explain()
+                tabla = queryset.model._meta.db_table
+                if recorrido_completo(plan, tabla):
+                    sin_indice.append(nombre)
+                    self.stdout.write(self.style.WARNING(f'⚠️  {nombre}: recorre {tabla} sin índice'))
+                else:
+                    self.stdout.write(f'✅ {nombre}')
+                if options['planes']:
+                    self.stdout.write(f'   {plan}'.replace('\n', '\n   '))
+
+        if sin_indice and options['estricto']:
+            raise CommandError(f'Consultas sin índice: {", ".join(sin_indice)}')
+        if not sin_indice:
+            self.stdout.write(self.style.SUCCESS('Todas las consultas usan índices'))
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.asistencias import alumnos_activos, crear_ausencias, es_dia_lectivo
+
+
+class Command(BaseCommand):
+    help = (
+        'Precrea como ausente la asistencia del día de todos los alumnos activos. '
+        'Programar antes de QR_ATTENDANCE_TIME_START en los días lectivos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', type=date.fromisoformat, default=None,
+                            help='Fecha a precrear (AAAA-MM-DD); por defecto hoy')
+        parser.add_argument('--colegio', type=int, default=None, help='Limitar a un colegio')
+        parser.add_argument('--forzar', action='store_true', help='Precrear aunque no sea día lectivo')
+
+    def handle(self, *args, **options):
+        fecha = options['fecha'] or timezone.localdate()
+        if not (options['forzar'] or es_dia_lectivo(fecha)):
+            self.stdout.write(f'{fecha} no es día lectivo; no se precrea nada')
+            return
+
+        creadas = crear_ausencias(fecha, alumnos_activos(options['colegio']))
+        self.stdout.write(self.style.SUCCESS(f'Asistencias precreadas para {fecha}: {creadas}'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.asistencias import volcar_checkins
+
+
+class Command(BaseCommand):
+    help = (
+        'Vuelca en bloque a Asistencia los registros QR encolados con QR_ASISTENCIA_DIFERIDA. '
+        'Con --continuo queda corriendo como worker'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help='Check-ins por transacción')
+        parser.add_argument('--continuo', action='store_true', help='No terminar al vaciar la cola')
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help='Segundos de espera con la cola vacía (modo continuo)')
+
+    def handle(self, *args, **options):
+        total_consumidos = total_marcadas = 0
+        while True:
+            consumidos, marcadas = volcar_checkins(options['lote'])
+            total_consumidos += consumidos
+            total_marcadas += marcadas
+            if consumidos:
+                self.stdout.write(f'📥 {consumidos} check-ins aplicados, {marcadas} asistencias marcadas')
+            if consumidos == options['lote']:
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Cola vacía: {total_consumidos} check-ins, {total_marcadas} asistencias marcadas'
+        ))
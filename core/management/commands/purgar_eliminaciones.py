@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Eliminacion
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra las marcas de borrado de los feeds de cambios más antiguas que '
+        'CAMBIOS_RETENCION_DIAS. Los clientes con un cursor anterior reciben 410 y '
+        'vuelven a descargar el listado completo'
+    )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=int(getattr(settings, 'CAMBIOS_RETENCION_DIAS', 90)))
+        borradas, _ = Eliminacion.objects.filter(eliminado__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f'Marcas de borrado eliminadas: {borradas}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotencia import purgar
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra las claves Idempotency-Key vencidas (IDEMPOTENCIA_TTL_HORAS). '
+        'Programar una vez al día'
+    )
+
+    def handle(self, *args, **options):
+        borradas = purgar()
+        self.stdout.write(self.style.SUCCESS(f'Claves de idempotencia vencidas borradas: {borradas}'))
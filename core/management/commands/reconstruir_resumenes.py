@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.resumenes import reconstruir_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero los resúmenes materializados de notas, asistencia y participaciones'
+
+    def handle(self, *args, **options):
+        reconstruir_resumenes(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Resúmenes reconstruidos'))
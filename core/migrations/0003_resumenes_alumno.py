@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_resumenes(apps, schema_editor):
+    """Construir los resúmenes a partir de los registros existentes"""
+    Nota = apps.get_model('core', 'Nota')
+    Asistencia = apps.get_model('core', 'Asistencia')
+    Participacion = apps.get_model('core', 'Participacion')
+    ResumenPeriodoAlumno = apps.get_model('core', 'ResumenPeriodoAlumno')
+    ResumenDiarioAlumno = apps.get_model('core', 'ResumenDiarioAlumno')
+
+    periodos = Nota.objects.values('alumno_id', 'periodo').annotate(suma=Sum('valor'), num=Count('id')).order_by()
+    ResumenPeriodoAlumno.objects.bulk_create(
+        [
+            ResumenPeriodoAlumno(alumno_id=f['alumno_id'], periodo=f['periodo'], suma_notas=f['suma'], num_notas=f['num'])
+            for f in periodos
+        ],
+        batch_size=1000,
+    )
+
+    diarios = {
+        (alumno_id, fecha): ResumenDiarioAlumno(alumno_id=alumno_id, fecha=fecha, presente=presente)
+        for alumno_id, fecha, presente in Asistencia.objects.values_list('alumno_id', 'fecha', 'presente')
+    }
+    participaciones = Participacion.objects.values('alumno_id', 'fecha').annotate(suma=Sum('valor'), num=Count('id')).order_by()
+    for f in participaciones:
+        clave = (f['alumno_id'], f['fecha'])
+        resumen = diarios.setdefault(clave, ResumenDiarioAlumno(alumno_id=clave[0], fecha=clave[1]))
+        resumen.num_participaciones = f['num']
+        resumen.suma_participaciones = f['suma']
+    ResumenDiarioAlumno.objects.bulk_create(list(diarios.values()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_rename_telefono_alumno_telefono_emergencia_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioAlumno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('presente', models.BooleanField(null=True)),
+                ('num_participaciones', models.PositiveIntegerField(default=0)),
+                ('suma_participaciones', models.FloatField(default=0)),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='core.alumno')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario',
+                'verbose_name_plural': 'Resúmenes Diarios',
+                'unique_together': {('alumno', 'fecha')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenPeriodoAlumno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(max_length=50)),
+                ('suma_notas', models.FloatField(default=0)),
+                ('num_notas', models.PositiveIntegerField(default=0)),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_periodo', to='core.alumno')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Período',
+                'verbose_name_plural': 'Resúmenes de Período',
+                'unique_together': {('alumno', 'periodo')},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_resumenes_alumno'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckinPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('recibido', models.DateTimeField()),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkins_pendientes', to='core.alumno')),
+            ],
+            options={
+                'verbose_name': 'Check-in Pendiente',
+                'verbose_name_plural': 'Check-ins Pendientes',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:52
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_checkin_pendiente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Geocerca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('tipo', models.CharField(choices=[('circulo', 'Círculo'), ('poligono', 'Polígono')], max_length=10)),
+                ('latitud', models.FloatField(blank=True, null=True)),
+                ('longitud', models.FloatField(blank=True, null=True)),
+                ('radio_metros', models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)])),
+                ('vertices', models.JSONField(blank=True, default=list)),
+                ('activa', models.BooleanField(default=True)),
+                ('colegio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='geocercas', to='core.colegio')),
+            ],
+            options={
+                'verbose_name': 'Geocerca',
+                'verbose_name_plural': 'Geocercas',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:55
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_geocercas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asistencia',
+            name='registrado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ClaveIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ambito', models.CharField(max_length=30)),
+                ('clave', models.CharField(max_length=64)),
+                ('estado', models.PositiveSmallIntegerField()),
+                ('respuesta', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('creada', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='claves_idempotencia', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Clave de Idempotencia',
+                'verbose_name_plural': 'Claves de Idempotencia',
+                'unique_together': {('usuario', 'ambito', 'clave')},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_idempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Eliminacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=30)),
+                ('objeto_id', models.BigIntegerField()),
+                ('alumno_id', models.BigIntegerField()),
+                ('curso_id', models.BigIntegerField(null=True)),
+                ('eliminado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Eliminación',
+                'verbose_name_plural': 'Eliminaciones',
+            },
+        ),
+        migrations.AddField(
+            model_name='asistencia',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='nota',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='participacion',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['actualizado', 'id'], name='core_asiste_actuali_64c6c3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['actualizado', 'id'], name='core_nota_actuali_fac145_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participacion',
+            index=models.Index(fields=['actualizado', 'id'], name='core_partic_actuali_60cf43_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eliminacion',
+            index=models.Index(fields=['modelo', 'eliminado', 'id'], name='core_elimin_modelo_322903_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_cambios'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['fecha', 'id'], name='core_asiste_fecha_ef99ca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['fecha_registro', 'id'], name='core_nota_fecha_r_7bfc6f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participacion',
+            index=models.Index(fields=['fecha', 'id'], name='core_partic_fecha_5a6ecd_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['fecha', 'alumno', 'presente'], name='core_asiste_fecha_550cbd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['periodo', 'alumno', 'materia', 'valor'], name='core_nota_periodo_0d0e26_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['alumno', 'periodo'], name='core_nota_alumno__158f68_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['materia', 'periodo'], name='core_nota_materia_fc4add_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participacion',
+            index=models.Index(fields=['alumno', 'fecha', 'valor'], name='core_partic_alumno__67ef63_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participacion',
+            index=models.Index(fields=['materia', 'fecha'], name='core_partic_materia_ecec48_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Periodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=50, unique=True)),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('ordinal', models.PositiveSmallIntegerField()),
+                ('inicio', models.DateField(blank=True, null=True)),
+                ('fin', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Período',
+                'verbose_name_plural': 'Períodos',
+                'ordering': ['anio', 'ordinal'],
+                'unique_together': {('anio', 'ordinal')},
+            },
+        ),
+        # Columnas temporales; 0012 las renombra a periodo cuando ya están pobladas.
+        # La columna de texto admite null para poder revertir: 0012 la recrea
+        # vacía y 0011 la vuelve a llenar
+        migrations.AlterField(
+            model_name='nota',
+            name='periodo',
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name='resumenperiodoalumno',
+            name='periodo',
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='nota',
+            name='periodo_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.periodo'),
+        ),
+        migrations.AddField(
+            model_name='resumenperiodoalumno',
+            name='periodo_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.periodo'),
+        ),
+    ]
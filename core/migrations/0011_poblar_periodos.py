@@ -0,0 +1,91 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:20
+
+import re
+from datetime import date
+
+from django.db import migrations
+from django.db.models import Count, Min, OuterRef, Subquery
+
+
+def crear_periodos(apps, schema_editor):
+    """
+    Un Periodo por cada código usado en notas o resúmenes. Los códigos tipo
+    "2024-T1" dan año y ordinal; si dos códigos dan el mismo (p. ej. "2024-T1"
+    y "2024-S1"), el de menos notas pasa al final del año. Los códigos sin año
+    quedan al final del año de su primera nota. Las fechas no se pueden
+    deducir del código: quedan vacías hasta cargarlas en el admin.
+    """
+    Nota = apps.get_model('core', 'Nota')
+    Periodo = apps.get_model('core', 'Periodo')
+    ResumenPeriodoAlumno = apps.get_model('core', 'ResumenPeriodoAlumno')
+
+    notas_por_codigo = dict(
+        Nota.objects.values('periodo').annotate(total=Count('id')).values_list('periodo', 'total')
+    )
+    codigos = set(notas_por_codigo)
+    codigos |= set(ResumenPeriodoAlumno.objects.values_list('periodo', flat=True).distinct())
+
+    reconocidos, repetidos, otros = {}, [], []
+    ocupados = set()  # (anio, ordinal) ya asignados; unique_together no admite repetirlos
+    for codigo in sorted(codigos, key=lambda codigo: (-notas_por_codigo.get(codigo, 0), codigo)):
+        coincidencia = re.match(r'^(\d{4})\D*(\d+)$', codigo)
+        if not coincidencia or int(coincidencia.group(2)) == 0:
+            otros.append(codigo)
+            continue
+        anio, ordinal = int(coincidencia.group(1)), int(coincidencia.group(2))
+        if (anio, ordinal) in ocupados:
+            repetidos.append((codigo, anio))
+        else:
+            ocupados.add((anio, ordinal))
+            reconocidos[codigo] = (anio, ordinal)
+
+    cantidad_por_anio = {}
+    for anio, ordinal in ocupados:
+        cantidad_por_anio[anio] = max(cantidad_por_anio.get(anio, 0), ordinal)
+    for codigo, anio in repetidos:
+        cantidad_por_anio[anio] += 1
+        reconocidos[codigo] = (anio, cantidad_por_anio[anio])
+
+    periodos = [
+        Periodo(codigo=codigo, anio=anio, ordinal=ordinal)
+        for codigo, (anio, ordinal) in reconocidos.items()
+    ]
+
+    primeras_notas = dict(
+        Nota.objects.filter(periodo__in=otros).values('periodo')
+        .annotate(primera=Min('fecha_registro')).values_list('periodo', 'primera')
+    )
+    siguiente_ordinal = {}
+    for codigo in sorted(otros):
+        anio = primeras_notas[codigo].year if primeras_notas.get(codigo) else date.today().year
+        ordinal = siguiente_ordinal.get(anio, cantidad_por_anio.get(anio, 0)) + 1
+        siguiente_ordinal[anio] = ordinal
+        periodos.append(Periodo(codigo=codigo, anio=anio, ordinal=ordinal))
+    Periodo.objects.bulk_create(periodos)
+
+    por_codigo = Periodo.objects.filter(codigo=OuterRef('periodo')).values('id')[:1]
+    Nota.objects.update(periodo_ref=Subquery(por_codigo))
+    ResumenPeriodoAlumno.objects.update(periodo_ref=Subquery(por_codigo))
+
+
+def restaurar_codigos(apps, schema_editor):
+    Nota = apps.get_model('core', 'Nota')
+    Periodo = apps.get_model('core', 'Periodo')
+    ResumenPeriodoAlumno = apps.get_model('core', 'ResumenPeriodoAlumno')
+
+    codigo = Periodo.objects.filter(id=OuterRef('periodo_ref')).values('codigo')[:1]
+    Nota.objects.update(periodo=Subquery(codigo), periodo_ref=None)
+    ResumenPeriodoAlumno.objects.update(periodo=Subquery(codigo), periodo_ref=None)
+    # Sin períodos, volver a aplicar 0011 los crea de nuevo sin chocar
+    Periodo.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_periodo'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_periodos, restaurar_codigos),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_poblar_periodos'),
+    ]
+
+    operations = [
+        # Restricciones e índices sobre la columna de texto
+        migrations.AlterUniqueTogether(
+            name='nota',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='resumenperiodoalumno',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='nota',
+            name='core_nota_periodo_0d0e26_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='nota',
+            name='core_nota_alumno__158f68_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='nota',
+            name='core_nota_materia_fc4add_idx',
+        ),
+        migrations.RemoveField(
+            model_name='nota',
+            name='periodo',
+        ),
+        migrations.RemoveField(
+            model_name='resumenperiodoalumno',
+            name='periodo',
+        ),
+        migrations.RenameField(
+            model_name='nota',
+            old_name='periodo_ref',
+            new_name='periodo',
+        ),
+        migrations.RenameField(
+            model_name='resumenperiodoalumno',
+            old_name='periodo_ref',
+            new_name='periodo',
+        ),
+        migrations.AlterField(
+            model_name='nota',
+            name='periodo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='notas', to='core.periodo'),
+        ),
+        migrations.AlterField(
+            model_name='resumenperiodoalumno',
+            name='periodo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='resumenes', to='core.periodo'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='nota',
+            unique_together={('alumno', 'materia', 'periodo')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='resumenperiodoalumno',
+            unique_together={('alumno', 'periodo')},
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['periodo', 'alumno', 'materia', 'valor'], name='core_nota_periodo_ce7be4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['alumno', 'periodo'], name='core_nota_alumno__d98554_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['materia', 'periodo'], name='core_nota_materia_7551b6_idx'),
+        ),
+    ]
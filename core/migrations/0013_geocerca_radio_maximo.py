@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:49
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_periodo_fk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='geocerca',
+            name='radio_metros',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5000)]),
+        ),
+    ]
@@ -1,8 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
+import math
 from datetime import date
 
+from .geocercas import METROS_POR_GRADO
+
 class Colegio(models.Model):
     """Modelo para representar un colegio"""
     nombre = models.CharField(max_length=255)
@@ -18,6 +23,79 @@ class Colegio(models.Model):
     def __str__(self):
         return self.nombre
 
+class Geocerca(models.Model):
+    """
+    Zona de un colegio (sede, campus) desde la que se acepta el registro QR.
+    Un colegio puede tener varias; sin ninguna se usa un círculo de
+    QR_RADIO_METROS alrededor de la ubicación del colegio.
+    """
+    CIRCULO = 'circulo'
+    POLIGONO = 'poligono'
+    # Cada zona se copia en todas las celdas del índice que toca su envolvente
+    # (core/geocercas.py); un campus no mide más que esto
+    RADIO_MAX_METROS = 5000
+
+    colegio = models.ForeignKey(Colegio, on_delete=models.CASCADE, related_name='geocercas')
+    nombre = models.CharField(max_length=100)  # Ej: "Sede Central", "Campus Norte"
+    tipo = models.CharField(max_length=10, choices=[
+        (CIRCULO, 'Círculo'),
+        (POLIGONO, 'Polígono'),
+    ])
+    latitud = models.FloatField(null=True, blank=True)  # Centro del círculo
+    longitud = models.FloatField(null=True, blank=True)
+    radio_metros = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(1), MaxValueValidator(RADIO_MAX_METROS)]
+    )
+    vertices = models.JSONField(default=list, blank=True)  # [[lat, lng], ...] del polígono
+    activa = models.BooleanField(default=True)
+    
+    class Meta:
+        verbose_name = "Geocerca"
+        verbose_name_plural = "Geocercas"
+    
+    def __str__(self):
+        return f"{self.nombre} - {self.colegio.nombre}"
+    
+    @staticmethod
+    def coordenada_valida(latitud, longitud):
+        return -90 <= latitud <= 90 and -180 <= longitud <= 180
+
+    def clean(self):
+        # También lo usa construir_indice con filas que no pasaron por save
+        if self.tipo == self.CIRCULO:
+            if self.latitud is None or self.longitud is None or not self.radio_metros:
+                raise ValidationError("Un círculo necesita latitud, longitud y radio.")
+            if not self.coordenada_valida(self.latitud, self.longitud):
+                raise ValidationError("El centro debe tener latitud entre -90 y 90 y longitud entre -180 y 180.")
+            if not 1 <= self.radio_metros <= self.RADIO_MAX_METROS:
+                raise ValidationError(f"El radio debe estar entre 1 y {self.RADIO_MAX_METROS} metros.")
+        elif self.tipo == self.POLIGONO:
+            try:
+                valido = len(self.vertices) >= 3 and all(
+                    len(v) == 2 and all(isinstance(c, (int, float)) and not isinstance(c, bool) for c in v)
+                    for v in self.vertices
+                )
+            except TypeError:
+                valido = False
+            if not valido:
+                raise ValidationError("Un polígono necesita al menos 3 vértices [latitud, longitud].")
+            if not all(self.coordenada_valida(lat, lng) for lat, lng in self.vertices):
+                raise ValidationError("Los vértices deben tener latitud entre -90 y 90 y longitud entre -180 y 180.")
+            # El mismo límite que el radio, para que un polígono tampoco cubra miles de celdas
+            lats = [lat for lat, _ in self.vertices]
+            lngs = [lng for _, lng in self.vertices]
+            alto = (max(lats) - min(lats)) * METROS_POR_GRADO
+            ancho = (max(lngs) - min(lngs)) * METROS_POR_GRADO * math.cos(math.radians((max(lats) + min(lats)) / 2))
+            if max(alto, ancho) > 2 * self.RADIO_MAX_METROS:
+                raise ValidationError(
+                    f"El polígono no puede medir más de {2 * self.RADIO_MAX_METROS // 1000} km de lado."
+                )
+    
+    def save(self, *args, **kwargs):
+        # Una geocerca mal formada rompería el índice de todos los colegios
+        self.full_clean()
+        super().save(*args, **kwargs)
+
 class Maestro(models.Model):
     """Modelo para representar un maestro"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -79,6 +157,32 @@ class Materia(models.Model):
     def __str__(self):
         return f"{self.nombre} - {self.curso.nombre}"
 
+class Periodo(models.Model):
+    """
+    Período de calificación (trimestre, bimestre...) de un año lectivo.
+    El orden lo dan año y ordinal, no el código; core/periodos.py mantiene la
+    lista ordenada en memoria.
+    """
+    codigo = models.CharField(max_length=50, unique=True)  # Ej: "2024-T1" (trimestre 1)
+    anio = models.PositiveSmallIntegerField()
+    ordinal = models.PositiveSmallIntegerField()  # Posición dentro del año: 1, 2, 3...
+    # Sin fechas (p. ej. períodos creados por 0011) no se filtra por ellas
+    inicio = models.DateField(null=True, blank=True)
+    fin = models.DateField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Período"
+        verbose_name_plural = "Períodos"
+        unique_together = ['anio', 'ordinal']
+        ordering = ['anio', 'ordinal']
+    
+    def __str__(self):
+        return self.codigo
+    
+    def clean(self):
+        if self.inicio and self.fin and self.fin < self.inicio:
+            raise ValidationError("La fecha de fin no puede ser anterior a la de inicio.")
+
 class Padre(models.Model):
     """Modelo para representar un padre de familia"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -128,21 +232,67 @@ class Alumno(models.Model):
     def curso_nombre(self):
         return self.curso.nombre
 
-class Nota(models.Model):
+class ResumenIncrementalMixin(models.Model):
+    """
+    Mantiene los resúmenes materializados en la misma transacción que la escritura.
+
+    `campos_resumen` son los attnames que identifican el bucket del resumen
+    (p. ej. alumno_id y periodo_id). Si una edición mueve el registro de bucket,
+    se recalculan ambos. Los borrados se manejan con la señal post_delete,
+    que Django envía dentro de la transacción del borrado (incluye cascadas).
+    """
+    campos_resumen = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._clave_resumen_original = instancia.clave_resumen()
+        return instancia
+
+    def clave_resumen(self):
+        clave = tuple(self.__dict__.get(campo) for campo in self.campos_resumen)
+        return None if None in clave else clave
+
+    def save(self, *args, **kwargs):
+        from .resumenes import actualizar_resumenes
+
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            claves = {self.clave_resumen(), getattr(self, '_clave_resumen_original', None)}
+            actualizar_resumenes(type(self), claves - {None})
+        self._clave_resumen_original = self.clave_resumen()
+
+class Nota(ResumenIncrementalMixin):
     """Modelo para representar una nota"""
     alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name='notas')
     materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name='notas')
-    periodo = models.CharField(max_length=50)  # Ej: "2023-T1" (trimestre 1)
+    periodo = models.ForeignKey(Periodo, on_delete=models.PROTECT, related_name='notas')
     valor = models.FloatField(
         validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
     observaciones = models.TextField(blank=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)  # Para los feeds de cambios
+    
+    campos_resumen = ('alumno_id', 'periodo_id')
     
     class Meta:
         verbose_name = "Nota"
         verbose_name_plural = "Notas"
         unique_together = ['alumno', 'materia', 'periodo']
+        indexes = [
+            models.Index(fields=['actualizado', 'id']),
+            models.Index(fields=['fecha_registro', 'id']),  # Paginación por cursor
+            # Libreta y dashboard del maestro: notas de un período (cubre alumno, materia y valor)
+            models.Index(fields=['periodo', 'alumno', 'materia', 'valor']),
+            # Períodos con notas de un curso y detalle de un hijo
+            models.Index(fields=['alumno', 'periodo']),
+            # Listado de notas filtrado por materia y período
+            models.Index(fields=['materia', 'periodo']),
+        ]
     
     def __str__(self):
         return f"{self.alumno.user.first_name} - {self.materia.nombre} - {self.valor}"
@@ -151,7 +301,7 @@ class Nota(models.Model):
     def materia_nombre(self):
         return self.materia.nombre
 
-class Asistencia(models.Model):
+class Asistencia(ResumenIncrementalMixin):
     """Modelo para representar la asistencia"""
     alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name='asistencias')
     fecha = models.DateField()
@@ -159,17 +309,29 @@ class Asistencia(models.Model):
     registrado_por_qr = models.BooleanField(default=False)
     hora_llegada = models.TimeField(null=True, blank=True)
     observaciones = models.TextField(blank=True)
+    # Momento del registro según el dispositivo que lo tomó; un registro
+    # sincronizado más tarde no pisa a uno más reciente
+    registrado_en = models.DateTimeField(null=True, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)  # Para los feeds de cambios
+    
+    campos_resumen = ('alumno_id', 'fecha')
     
     class Meta:
         verbose_name = "Asistencia"
         verbose_name_plural = "Asistencias"
         unique_together = ['alumno', 'fecha']
+        indexes = [
+            models.Index(fields=['actualizado', 'id']),
+            models.Index(fields=['fecha', 'id']),  # Paginación por cursor
+            # Presencia de un día para un lote de alumnos (cubre presente)
+            models.Index(fields=['fecha', 'alumno', 'presente']),
+        ]
     
     def __str__(self):
         estado = "Presente" if self.presente else "Ausente"
         return f"{self.alumno.user.first_name} - {self.fecha} - {estado}"
 
-class Participacion(models.Model):
+class Participacion(ResumenIncrementalMixin):
     """Modelo para representar una participación"""
     alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name='participaciones')
     materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name='participaciones')
@@ -185,10 +347,124 @@ class Participacion(models.Model):
         ('individual', 'Trabajo Individual'),
         ('proyecto', 'Proyecto'),
     ], default='oral')
+    actualizado = models.DateTimeField(auto_now=True)  # Para los feeds de cambios
+    
+    campos_resumen = ('alumno_id', 'fecha')
     
     class Meta:
         verbose_name = "Participación"
         verbose_name_plural = "Participaciones"
+        indexes = [
+            models.Index(fields=['actualizado', 'id']),
+            models.Index(fields=['fecha', 'id']),  # Paginación por cursor
+            # Resumen diario y detalle de un hijo: participaciones de un alumno por fecha (cubre valor)
+            models.Index(fields=['alumno', 'fecha', 'valor']),
+            # Listado filtrado por materia y ventanas recientes de las materias de un curso
+            models.Index(fields=['materia', 'fecha']),
+        ]
     
     def __str__(self):
         return f"{self.alumno.user.first_name} - {self.materia.nombre} - {self.valor}"
+
+
+# --- Resúmenes materializados (ver core/resumenes.py) ---
+
+class ResumenPeriodoAlumno(models.Model):
+    """Suma y cantidad de notas de un alumno en un período"""
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name='resumenes_periodo')
+    periodo = models.ForeignKey(Periodo, on_delete=models.PROTECT, related_name='resumenes')
+    suma_notas = models.FloatField(default=0)
+    num_notas = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Resumen de Período"
+        verbose_name_plural = "Resúmenes de Período"
+        unique_together = ['alumno', 'periodo']
+    
+    def __str__(self):
+        return f"{self.alumno_id} - {self.periodo_id} - {self.promedio}"
+    
+    @property
+    def promedio(self):
+        return self.suma_notas / self.num_notas if self.num_notas else None
+
+class ResumenDiarioAlumno(models.Model):
+    """
+    Asistencia y participaciones de un alumno en un día.
+    Es la base de las ventanas móviles (últimos 30 o 60 días) de los dashboards.
+    """
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name='resumenes_diarios')
+    fecha = models.DateField()
+    presente = models.BooleanField(null=True)  # None: sin registro de asistencia ese día
+    num_participaciones = models.PositiveIntegerField(default=0)
+    suma_participaciones = models.FloatField(default=0)
+    
+    class Meta:
+        verbose_name = "Resumen Diario"
+        verbose_name_plural = "Resúmenes Diarios"
+        unique_together = ['alumno', 'fecha']
+    
+    def __str__(self):
+        return f"{self.alumno_id} - {self.fecha}"
+
+
+# --- Cola de registros QR diferidos (ver core/management/commands/procesar_checkins.py) ---
+
+class CheckinPendiente(models.Model):
+    """
+    Registro QR ya validado que espera ser volcado a Asistencia.
+    Tabla de solo inserción: el endpoint agrega filas y el worker las borra
+    después de aplicarlas en bloque.
+    """
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name='checkins_pendientes')
+    fecha = models.DateField()
+    recibido = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = "Check-in Pendiente"
+        verbose_name_plural = "Check-ins Pendientes"
+    
+    def __str__(self):
+        return f"{self.alumno_id} - {self.fecha}"
+
+class ClaveIdempotencia(models.Model):
+    """
+    Clave enviada por el cliente para que un reintento no repita la operación.
+    Solo guarda el código y el cuerpo de la respuesta; purgar_idempotencia
+    borra las vencidas (IDEMPOTENCIA_TTL_HORAS).
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='claves_idempotencia')
+    ambito = models.CharField(max_length=30)
+    clave = models.CharField(max_length=64)
+    estado = models.PositiveSmallIntegerField()
+    respuesta = models.JSONField(encoder=DjangoJSONEncoder)
+    creada = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = "Clave de Idempotencia"
+        verbose_name_plural = "Claves de Idempotencia"
+        unique_together = ['usuario', 'ambito', 'clave']
+    
+    def __str__(self):
+        return f"{self.usuario_id} - {self.ambito} - {self.clave}"
+
+class Eliminacion(models.Model):
+    """
+    Marca de borrado de una nota, asistencia o participación para los feeds de
+    cambios. Guarda el alumno y su curso para filtrar por rol aunque el
+    alumno ya no exista; purgar_eliminaciones borra las más antiguas que
+    CAMBIOS_RETENCION_DIAS.
+    """
+    modelo = models.CharField(max_length=30)
+    objeto_id = models.BigIntegerField()
+    alumno_id = models.BigIntegerField()
+    curso_id = models.BigIntegerField(null=True)
+    eliminado = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Eliminación"
+        verbose_name_plural = "Eliminaciones"
+        indexes = [models.Index(fields=['modelo', 'eliminado', 'id'])]
+    
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id} - {self.eliminado}"
@@ -0,0 +1,140 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class AlumnosDashboardPagination(PageNumberPagination):
+    """
+    Paginación opcional de los alumnos del dashboard del maestro.
+    Solo se aplica cuando la petición trae ?page= o ?page_size=.
+    """
+    page_size = 30
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def solicitada(self, request):
+        return self.page_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def get_info_paginacion(self):
+        return {
+            'count': self.page.paginator.count,
+            'page': self.page.number,
+            'num_pages': self.page.paginator.num_pages,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor sobre una clave ordenada e indexada (p. ej. fecha, id).
+
+    Cada página es `WHERE (fecha, id) < (último visto) ORDER BY ... LIMIT n`:
+    no hay COUNT(*) ni OFFSET, así que la página 1000 cuesta lo mismo que la
+    primera. El cursor es opaco y solo avanza (`next`).
+
+    Es opcional: solo las peticiones que traen ?cursor= (vacío para la primera
+    página) la usan. El resto recibe la paginación por número de página de
+    siempre, con `count` y `previous`, para no romper a los clientes existentes.
+    """
+    orden = ('-id',)
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        queryset = queryset.order_by(*self.orden)
+
+        if self.cursor_query_param not in request.query_params:
+            self.paginacion_por_pagina = PageNumberPagination()
+            return self.paginacion_por_pagina.paginate_queryset(queryset, request, view)
+        self.paginacion_por_pagina = None
+
+        self.tamanio = self.get_page_size(request)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            try:
+                queryset = queryset.filter(self._despues_de(self.decodificar_cursor(token)))
+            except (ValueError, TypeError, ValidationError):
+                # Valores que no convierten al tipo del campo (p. ej. "x" como id)
+                raise NotFound('Cursor inválido')
+
+        filas = list(queryset[:self.tamanio + 1])
+        self.siguiente = None
+        if len(filas) > self.tamanio:
+            filas = filas[:self.tamanio]
+            self.siguiente = [self._valor(filas[-1], campo) for campo in self.orden]
+        return filas
+
+    def get_paginated_response(self, data):
+        if self.paginacion_por_pagina is not None:
+            return self.paginacion_por_pagina.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            tamanio = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(tamanio, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.codificar_cursor(self.siguiente))
+
+    @staticmethod
+    def _valor(fila, campo):
+        valor = getattr(fila, campo.lstrip('-'))
+        # isoformat conserva los microsegundos (DjangoJSONEncoder los trunca)
+        return valor.isoformat() if hasattr(valor, 'isoformat') else valor
+
+    def _despues_de(self, valores):
+        """(a, b) < (x, y) expandido a OR de prefijos iguales, respetando la dirección de cada campo"""
+        condicion = Q()
+        for indice, campo in enumerate(self.orden):
+            iguales = {anterior.lstrip('-'): valor for anterior, valor in zip(self.orden[:indice], valores)}
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            condicion |= Q(**iguales, **{f'{campo.lstrip("-")}__{operador}': valores[indice]})
+        # Cota redundante sobre el primer campo para que el índice se recorra como rango
+        primero = self.orden[0]
+        return Q(**{f'{primero.lstrip("-")}__{"lte" if primero.startswith("-") else "gte"}': valores[0]}) & condicion
+
+    @staticmethod
+    def codificar_cursor(valores):
+        return base64.urlsafe_b64encode(json.dumps(valores, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    def decodificar_cursor(self, token):
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        except (ValueError, TypeError):
+            raise NotFound('Cursor inválido')
+        if not isinstance(valores, list) or len(valores) != len(self.orden):
+            raise NotFound('Cursor inválido')
+        # Solo escalares: _valor codifica fechas como texto e ids como enteros
+        if any(isinstance(valor, bool) or not isinstance(valor, (str, int)) for valor in valores):
+            raise NotFound('Cursor inválido')
+        return valores
+
+
+class NotasPagination(KeysetPagination):
+    orden = ('-fecha_registro', '-id')
+
+
+class RegistrosPorFechaPagination(KeysetPagination):
+    """Asistencias y participaciones, de la fecha más reciente a la más antigua"""
+    orden = ('-fecha', '-id')
@@ -0,0 +1,147 @@
+"""
+Catálogo de períodos en memoria.
+
+Los períodos son pocos y casi no cambian, así que cada proceso guarda la lista
+ordenada por (anio, ordinal) con índices por id y por código. Ordenar los
+períodos con notas de un alumno o curso, traducir un código de la URL o saber
+qué períodos son anteriores a otro ya no consulta la base ni compara cadenas.
+
+La lista se reconstruye al guardar o borrar un Periodo (core/signals.py) o
+pasado PERIODOS_CACHE_TTL. Un id o código que otro proceso acaba de crear se
+busca en la base antes de darlo por inexistente; un código que no existe se
+busca una sola vez por catálogo. Esos códigos llegan de la URL, así que solo
+se recuerdan los últimos PERIODOS_AUSENTES_MAX.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from django.conf import settings
+
+
+class Catalogo:
+    """Períodos ordenados del más antiguo al más reciente"""
+
+    def __init__(self, periodos):
+        self.ordenados = list(periodos)
+        self.posicion = {periodo.id: i for i, periodo in enumerate(self.ordenados)}
+        self.por_id = {periodo.id: periodo for periodo in self.ordenados}
+        self.por_codigo = {periodo.codigo: periodo for periodo in self.ordenados}
+        # Códigos ya buscados en la base sin éxito, del más viejo al más nuevo
+        self.ausentes = OrderedDict()
+        self.ausentes_lock = threading.Lock()
+
+    def marcar_ausente(self, codigo):
+        maximo = int(getattr(settings, 'PERIODOS_AUSENTES_MAX', 256))
+        with self.ausentes_lock:
+            self.ausentes[codigo] = None
+            self.ausentes.move_to_end(codigo)
+            while len(self.ausentes) > maximo:
+                self.ausentes.popitem(last=False)
+
+
+_catalogo = None
+_catalogo_vence = 0.0
+_catalogo_lock = threading.Lock()
+
+
+def catalogo():
+    global _catalogo, _catalogo_vence
+    from .models import Periodo
+
+    ahora = time.monotonic()
+    if _catalogo is not None and _catalogo_vence > ahora:
+        return _catalogo
+    with _catalogo_lock:
+        if _catalogo is None or _catalogo_vence <= ahora:
+            _catalogo = Catalogo(Periodo.objects.order_by('anio', 'ordinal'))
+            _catalogo_vence = ahora + int(getattr(settings, 'PERIODOS_CACHE_TTL', 300))
+        return _catalogo
+
+
+def invalidar_catalogo():
+    global _catalogo
+    with _catalogo_lock:
+        _catalogo = None
+
+
+def periodo_por_id(periodo_id):
+    periodo = catalogo().por_id.get(periodo_id)
+    if periodo is None and periodo_id is not None:
+        # Los ids salen de claves foráneas: si no está, el catálogo quedó viejo
+        invalidar_catalogo()
+        periodo = catalogo().por_id.get(periodo_id)
+    return periodo
+
+
+def periodo_por_codigo(codigo):
+    """Periodo con ese código, o None si no existe"""
+    from .models import Periodo
+
+    actual = catalogo()
+    periodo = actual.por_codigo.get(codigo)
+    if periodo is None and codigo and codigo not in actual.ausentes:
+        if len(codigo) > Periodo._meta.get_field('codigo').max_length:
+            return None  # No puede existir; tampoco ocupa lugar en ausentes
+        if Periodo.objects.filter(codigo=codigo).exists():
+            invalidar_catalogo()
+            periodo = catalogo().por_codigo.get(codigo)
+        else:
+            actual.marcar_ausente(codigo)
+    return periodo
+
+
+def codigo_de(periodo_id):
+    periodo = periodo_por_id(periodo_id)
+    return periodo.codigo if periodo is not None else None
+
+
+def ordenar(periodo_ids, recientes_primero=True):
+    """Periodos de `periodo_ids` en orden cronológico (por defecto, el más reciente primero)"""
+    periodos = [periodo for periodo in map(periodo_por_id, set(periodo_ids)) if periodo is not None]
+    posicion = catalogo().posicion
+    return sorted(periodos, key=lambda periodo: posicion[periodo.id], reverse=recientes_primero)
+
+
+def anteriores(periodo):
+    """Ids de los períodos anteriores a `periodo`"""
+    actual = catalogo()
+    return [otro.id for otro in actual.ordenados[:actual.posicion[periodo.id]]]
+
+
+def ventana_del_anio(anio):
+    """(inicio, fin) del año lectivo según sus períodos con fechas, o None si no tiene"""
+    periodos = [
+        periodo for periodo in catalogo().ordenados
+        if periodo.anio == anio and periodo.inicio and periodo.fin
+    ]
+    if not periodos:
+        return None
+    return min(p.inicio for p in periodos), max(p.fin for p in periodos)
+
+
+def periodos_del_anio(anio, cantidad, prefijo='T'):
+    """
+    Crear (si faltan) los `cantidad` períodos de `anio` con códigos tipo
+    "2024-T1", repartiendo el año calendario en tramos de meses iguales.
+    Pensado para los scripts de datos; en producción las fechas se cargan en el admin.
+    """
+    from .models import Periodo
+
+    def mes_de_inicio(ordinal):
+        return 1 + (ordinal - 1) * 12 // cantidad
+
+    periodos = []
+    for ordinal in range(1, cantidad + 1):
+        inicio = date(anio, mes_de_inicio(ordinal), 1)
+        if ordinal == cantidad:
+            fin = date(anio, 12, 31)
+        else:
+            fin = date(anio, mes_de_inicio(ordinal + 1), 1) - timedelta(days=1)
+        periodo, _ = Periodo.objects.get_or_create(
+            codigo=f'{anio}-{prefijo}{ordinal}',
+            defaults={'anio': anio, 'ordinal': ordinal, 'inicio': inicio, 'fin': fin},
+        )
+        periodos.append(periodo)
+    return periodos
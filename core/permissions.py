@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from .models import Maestro, Alumno, Padre
+from .roles import get_rol
 
 class IsMaestroTutor(permissions.BasePermission):
     """
@@ -8,12 +8,9 @@ class IsMaestroTutor(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        
-        try:
-            maestro = Maestro.objects.get(user=request.user)
-            return maestro.cursos_tutor.exists()
-        except Maestro.DoesNotExist:
-            return False
+
+        rol = get_rol(request)
+        return rol.es_maestro and rol.es_tutor
 
 class IsAlumno(permissions.BasePermission):
     """
@@ -22,12 +19,8 @@ class IsAlumno(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        
-        try:
-            Alumno.objects.get(user=request.user)
-            return True
-        except Alumno.DoesNotExist:
-            return False
+
+        return get_rol(request).es_alumno
 
 class IsPadre(permissions.BasePermission):
     """
@@ -36,12 +29,8 @@ class IsPadre(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        
-        try:
-            Padre.objects.get(user=request.user)
-            return True
-        except Padre.DoesNotExist:
-            return False
+
+        return get_rol(request).es_padre
 
 class IsPadreDeAlumno(permissions.BasePermission):
     """
@@ -50,13 +39,9 @@ class IsPadreDeAlumno(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
-        
-        try:
-            padre = Padre.objects.get(user=request.user)
-            # El 'obj' aquí es una instancia de Alumno
-            return obj in padre.hijos.all()
-        except Padre.DoesNotExist:
-            return False
+
+        # El 'obj' aquí es una instancia de Alumno
+        return get_rol(request).es_padre_de(obj.id)
 
 class IsMaestro(permissions.BasePermission):
     """
@@ -65,12 +50,8 @@ class IsMaestro(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        
-        try:
-            Maestro.objects.get(user=request.user)
-            return True
-        except Maestro.DoesNotExist:
-            return False
+
+        return get_rol(request).es_maestro
 
 class CanAccessCurso(permissions.BasePermission):
     """
@@ -79,35 +60,25 @@ class CanAccessCurso(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
-        
+
         # Si es admin, puede acceder a todo
         if request.user.is_superuser:
             return True
-        
+
+        rol = get_rol(request)
+
         # Si es maestro tutor del curso
-        try:
-            maestro = Maestro.objects.get(user=request.user)
-            if obj.tutor == maestro:
-                return True
-        except Maestro.DoesNotExist:
-            pass
-        
+        if rol.es_maestro and rol.es_tutor_de(obj.id):
+            return True
+
         # Si es alumno del curso
-        try:
-            alumno = Alumno.objects.get(user=request.user)
-            if alumno.curso == obj:
-                return True
-        except Alumno.DoesNotExist:
-            pass
-        
+        if rol.es_alumno and rol.curso_id == obj.id:
+            return True
+
         # Si es padre de algún alumno del curso
-        try:
-            padre = Padre.objects.get(user=request.user)
-            if padre.hijos.filter(curso=obj).exists():
-                return True
-        except Padre.DoesNotExist:
-            pass
-        
+        if rol.es_padre and obj.id in rol.cursos_hijos:
+            return True
+
         return False
 
 class CanAccessAlumno(permissions.BasePermission):
@@ -117,71 +88,61 @@ class CanAccessAlumno(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
-        
+
         # Si es admin, puede acceder a todo
         if request.user.is_superuser:
             return True
-        
+
+        rol = get_rol(request)
+
         # Si es el mismo alumno
-        if hasattr(request.user, 'alumno') and request.user.alumno == obj:
+        if rol.alumno_id == obj.id:
             return True
-        
+
         # Si es tutor del curso del alumno
-        try:
-            maestro = Maestro.objects.get(user=request.user)
-            if obj.curso.tutor == maestro:
-                return True
-        except Maestro.DoesNotExist:
-            pass
-        
+        if rol.es_maestro and rol.es_tutor_de(obj.curso_id):
+            return True
+
         # Si es padre del alumno
-        try:
-            padre = Padre.objects.get(user=request.user)
-            if obj in padre.hijos.all():
-                return True
-        except Padre.DoesNotExist:
-            pass
-        
+        if rol.es_padre and rol.es_padre_de(obj.id):
+            return True
+
         return False
 
-class CanAccessNota(permissions.BasePermission):
+class _CanAccessRegistroAlumno(permissions.BasePermission):
     """
-    Permiso para verificar si el usuario puede acceder a una nota
+    Base para registros académicos (notas, asistencia, participaciones):
+    acceden el propio alumno, el tutor de su curso y sus padres.
     """
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
-        
+
         # Si es admin, puede acceder a todo
         if request.user.is_superuser:
             return True
-        
-        # Si es el alumno de la nota
-        try:
-            alumno = Alumno.objects.get(user=request.user)
-            if obj.alumno == alumno:
-                return True
-        except Alumno.DoesNotExist:
-            pass
-        
+
+        rol = get_rol(request)
+
+        # Si es el alumno del registro
+        if rol.es_alumno and obj.alumno_id == rol.alumno_id:
+            return True
+
         # Si es tutor del curso del alumno
-        try:
-            maestro = Maestro.objects.get(user=request.user)
-            if obj.alumno.curso.tutor == maestro:
-                return True
-        except Maestro.DoesNotExist:
-            pass
-        
+        if rol.es_maestro and rol.es_tutor_de(obj.alumno.curso_id):
+            return True
+
         # Si es padre del alumno
-        try:
-            padre = Padre.objects.get(user=request.user)
-            if obj.alumno in padre.hijos.all():
-                return True
-        except Padre.DoesNotExist:
-            pass
-        
+        if rol.es_padre and rol.es_padre_de(obj.alumno_id):
+            return True
+
         return False
 
+class CanAccessNota(_CanAccessRegistroAlumno):
+    """
+    Permiso para verificar si el usuario puede acceder a una nota
+    """
+
 class CanModifyNota(permissions.BasePermission):
     """
     Permiso para verificar si el usuario puede modificar una nota
@@ -189,93 +150,21 @@ class CanModifyNota(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
-        
+
         # Si es admin, puede modificar todo
         if request.user.is_superuser:
             return True
-        
+
         # Solo el tutor del curso puede modificar notas
-        try:
-            maestro = Maestro.objects.get(user=request.user)
-            if obj.alumno.curso.tutor == maestro:
-                return True
-        except Maestro.DoesNotExist:
-            pass
-        
-        return False
+        rol = get_rol(request)
+        return rol.es_maestro and rol.es_tutor_de(obj.alumno.curso_id)
 
-class CanAccessAsistencia(permissions.BasePermission):
+class CanAccessAsistencia(_CanAccessRegistroAlumno):
     """
     Permiso para verificar si el usuario puede acceder a registros de asistencia
     """
-    def has_object_permission(self, request, view, obj):
-        if not request.user.is_authenticated:
-            return False
-        
-        # Si es admin, puede acceder a todo
-        if request.user.is_superuser:
-            return True
-        
-        # Si es el alumno de la asistencia
-        try:
-            alumno = Alumno.objects.get(user=request.user)
-            if obj.alumno == alumno:
-                return True
-        except Alumno.DoesNotExist:
-            pass
-        
-        # Si es tutor del curso del alumno
-        try:
-            maestro = Maestro.objects.get(user=request.user)
-            if obj.alumno.curso.tutor == maestro:
-                return True
-        except Maestro.DoesNotExist:
-            pass
-        
-        # Si es padre del alumno
-        try:
-            padre = Padre.objects.get(user=request.user)
-            if obj.alumno in padre.hijos.all():
-                return True
-        except Padre.DoesNotExist:
-            pass
-        
-        return False
 
-class CanAccessParticipacion(permissions.BasePermission):
+class CanAccessParticipacion(_CanAccessRegistroAlumno):
     """
     Permiso para verificar si el usuario puede acceder a registros de participación
     """
-    def has_object_permission(self, request, view, obj):
-        if not request.user.is_authenticated:
-            return False
-        
-        # Si es admin, puede acceder a todo
-        if request.user.is_superuser:
-            return True
-        
-        # Si es el alumno de la participación
-        try:
-            alumno = Alumno.objects.get(user=request.user)
-            if obj.alumno == alumno:
-                return True
-        except Alumno.DoesNotExist:
-            pass
-        
-        # Si es tutor del curso del alumno
-        try:
-            maestro = Maestro.objects.get(user=request.user)
-            if obj.alumno.curso.tutor == maestro:
-                return True
-        except Maestro.DoesNotExist:
-            pass
-        
-        # Si es padre del alumno
-        try:
-            padre = Padre.objects.get(user=request.user)
-            if obj.alumno in padre.hijos.all():
-                return True
-        except Padre.DoesNotExist:
-            pass
-        
-        return False 
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Predicción de rendimiento académico.
+
+Las variables de cada alumno se leen de los resúmenes materializados con una
+consulta agrupada por variable, sin importar cuántos alumnos se evalúen, y se
+puntúan juntas como una matriz de NumPy:
+
+    columna 0: promedio de notas de los períodos anteriores
+    columna 1: porcentaje de asistencia del año lectivo del período, desde la
+               primera fecha de los períodos de ese año hasta el inicio del período
+    columna 2: promedio de participaciones (escala 1-5) anteriores al período
+
+Solo se usa lo ocurrido antes del inicio del período: al entrenar con
+períodos pasados, los datos posteriores filtrarían el resultado que se
+quiere predecir.
+
+Si existe un modelo entrenado con `manage.py entrenar_modelo_rendimiento`
+(settings.PREDICCION_MODELO_PATH), la matriz se puntúa con él; si no, con la
+fórmula ponderada.
+"""
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+
+from .models import ResumenPeriodoAlumno, ResumenDiarioAlumno
+from .periodos import anteriores, ordenar, ventana_del_anio
+
+VARIABLES = ('promedio_notas_anteriores', 'porcentaje_asistencia', 'promedio_participaciones')
+
+# Predicción simple basada en pesos sobre variables llevadas a escala 0-100
+PESOS = np.array([0.5, 0.3, 0.2])
+ESCALAS = np.array([1.0, 1.0, 100 / 5])
+
+UMBRAL_ALTO = 85
+UMBRAL_MEDIO = 70
+
+logger = logging.getLogger(__name__)
+
+# Modelo cargado en este proceso: (ruta, mtime, artefacto). El mtime del archivo
+# se revisa como mucho cada PREDICCION_MODELO_CACHE_TTL segundos y se recarga
+# solo si cambió, así un reentrenamiento no requiere reiniciar.
+_modelo_cache = None
+_modelo_vence = 0.0
+_modelo_lock = threading.Lock()
+
+
+def construir_caracteristicas(alumno_ids, periodo):
+    """
+    Matriz (n_alumnos, 3) con las variables de predicción del Periodo
+    `periodo`, en el orden de alumno_ids.
+    Sin historial se usan los mismos valores por defecto que la vista original:
+    notas 0, asistencia 100 y participaciones 0; también para asistencia y
+    participaciones si el período no tiene fechas cargadas.
+    """
+    indice = {alumno_id: i for i, alumno_id in enumerate(alumno_ids)}
+    X = np.zeros((len(indice), len(VARIABLES)))
+    X[:, 1] = 100
+    if not indice:
+        return X
+
+    notas = (
+        ResumenPeriodoAlumno.objects
+        .filter(alumno_id__in=indice, periodo_id__in=anteriores(periodo), num_notas__gt=0)
+        .values('alumno_id')
+        .annotate(suma=Sum('suma_notas'), num=Sum('num_notas'))
+        .order_by()
+    )
+    for fila in notas:
+        X[indice[fila['alumno_id']], 0] = fila['suma'] / fila['num']
+
+    if periodo.inicio is None:
+        # Sin fechas no se sabe qué días son anteriores al período
+        return X
+
+    inicio_del_anio = (ventana_del_anio(periodo.anio) or (periodo.inicio,))[0]
+    asistencias = (
+        ResumenDiarioAlumno.objects
+        .filter(alumno_id__in=indice, fecha__gte=inicio_del_anio, fecha__lt=periodo.inicio, presente__isnull=False)
+        .values('alumno_id')
+        .annotate(total=Count('id'), presentes=Count('id', filter=Q(presente=True)))
+        .order_by()
+    )
+    for fila in asistencias:
+        X[indice[fila['alumno_id']], 1] = fila['presentes'] / fila['total'] * 100
+
+    participaciones = (
+        ResumenDiarioAlumno.objects
+        .filter(alumno_id__in=indice, fecha__lt=periodo.inicio, num_participaciones__gt=0)
+        .values('alumno_id')
+        .annotate(suma=Sum('suma_participaciones'), num=Sum('num_participaciones'))
+        .order_by()
+    )
+    for fila in participaciones:
+        X[indice[fila['alumno_id']], 2] = fila['suma'] / fila['num']
+
+    return X
+
+
+def puntuar_ponderado(X):
+    """Fórmula ponderada original, usada cuando no hay modelo entrenado"""
+    return (X * ESCALAS) @ PESOS
+
+
+def cargar_modelo():
+    """
+    Artefacto del modelo entrenado, cargado una vez por proceso.
+    Devuelve None si no hay modelo o no es compatible con VARIABLES.
+    """
+    global _modelo_cache, _modelo_vence
+    ruta = str(getattr(settings, 'PREDICCION_MODELO_PATH', '') or '')
+    ahora = time.monotonic()
+    cache = _modelo_cache
+    if cache is not None and cache[0] == ruta and _modelo_vence > ahora:
+        return cache[2]
+
+    with _modelo_lock:
+        cache = _modelo_cache
+        if cache is not None and cache[0] == ruta and _modelo_vence > ahora:
+            return cache[2]
+
+        try:
+            mtime = os.stat(ruta).st_mtime if ruta else None
+        except OSError:
+            mtime = None
+        _modelo_vence = ahora + int(getattr(settings, 'PREDICCION_MODELO_CACHE_TTL', 60))
+        if cache is not None and cache[0] == ruta and cache[1] == mtime:
+            return cache[2]
+
+        artefacto = None
+        if mtime is not None:
+            try:
+                import joblib
+                artefacto = joblib.load(ruta)
+            except Exception as e:
+                logger.error(f"No se pudo cargar el modelo de rendimiento {ruta}: {e}")
+            else:
+                if tuple(artefacto.get('variables', ())) != VARIABLES:
+                    logger.error(f"El modelo {ruta} usa otras variables; se usa la fórmula ponderada")
+                    artefacto = None
+        _modelo_cache = (ruta, mtime, artefacto)
+        return artefacto
+
+
+def invalidar_modelo():
+    global _modelo_cache
+    with _modelo_lock:
+        _modelo_cache = None
+
+
+def puntuar(X):
+    """Predicción numérica (0-100) de cada fila de la matriz de variables"""
+    artefacto = cargar_modelo()
+    if artefacto is None:
+        return puntuar_ponderado(X)
+    return np.clip(artefacto['modelo'].predict(X), 0, 100)
+
+
+def clasificar(predicciones):
+    return np.select(
+        [predicciones >= UMBRAL_ALTO, predicciones >= UMBRAL_MEDIO],
+        ['alto', 'medio'],
+        default='bajo'
+    )
+
+
+def construir_dataset(periodos=None):
+    """
+    Conjunto de entrenamiento: una fila por (alumno, período) con notas.
+    Las variables son las que habría tenido la predicción de ese período y el
+    objetivo es el promedio que el alumno obtuvo en él. `periodos` limita a
+    esos códigos.
+    """
+    resumenes = ResumenPeriodoAlumno.objects.filter(num_notas__gt=0)
+    if periodos:
+        resumenes = resumenes.filter(periodo__codigo__in=periodos)
+
+    por_periodo = {}
+    for alumno_id, periodo_id, suma, num in resumenes.values_list(
+        'alumno_id', 'periodo_id', 'suma_notas', 'num_notas'
+    ).order_by('alumno_id'):
+        por_periodo.setdefault(periodo_id, ([], []))
+        por_periodo[periodo_id][0].append(alumno_id)
+        por_periodo[periodo_id][1].append(suma / num)
+
+    bloques_X, bloques_y = [], []
+    for periodo in ordenar(por_periodo, recientes_primero=False):
+        alumno_ids, promedios = por_periodo[periodo.id]
+        bloques_X.append(construir_caracteristicas(alumno_ids, periodo))
+        bloques_y.append(np.array(promedios))
+    if not bloques_X:
+        return np.zeros((0, len(VARIABLES))), np.zeros(0)
+    return np.vstack(bloques_X), np.concatenate(bloques_y)
+
+
+def predecir(alumno_ids, periodo):
+    """Predicciones de varios alumnos para un Periodo, en el mismo orden que alumno_ids"""
+    alumno_ids = list(alumno_ids)
+    X = construir_caracteristicas(alumno_ids, periodo)
+    predicciones = puntuar(X)
+    clasificaciones = clasificar(predicciones)
+
+    resultados = []
+    for i, alumno_id in enumerate(alumno_ids):
+        resultado = {
+            'alumno_id': alumno_id,
+            'prediccion_numerica': round(float(predicciones[i]), 2),
+            'clasificacion': str(clasificaciones[i]),
+        }
+        for j, variable in enumerate(VARIABLES):
+            resultado[variable] = round(float(X[i, j]), 2)
+        resultados.append(resultado)
+    return resultados
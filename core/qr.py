@@ -0,0 +1,180 @@
+"""
+Códigos QR rotativos de asistencia.
+
+Con QR_TOKEN_ROTATIVO activo, la pantalla de la entrada muestra un código que
+cambia cada QR_TOKEN_PASO segundos, al estilo TOTP:
+
+    <colegio_id>.<paso>.<firma>
+
+donde la firma es un HMAC-SHA256 del colegio y el paso con un secreto propio
+de cada colegio, derivado de SECRET_KEY y Colegio.token_qr. Validar un código
+es solo CPU: el secreto se deriva una vez por proceso y se aceptan el paso
+actual y QR_TOKEN_VENTANA pasos a cada lado (desfase de reloj del teléfono).
+Un QR impreso o una foto dejan de servir pasados unos segundos.
+
+El camino del escaneo tampoco consulta alumno, curso y colegio en cada
+petición: datos_qr_alumno() guarda por proceso el colegio y su token para
+cada alumno (ver core/signals.py para la invalidación), horario_qr() parsea
+la ventana horaria una sola vez y la ubicación se valida contra el índice de
+core/geocercas.py.
+"""
+import hashlib
+import hmac
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+LONGITUD_FIRMA = 16
+
+
+def paso_segundos():
+    return int(getattr(settings, 'QR_TOKEN_PASO', 30))
+
+
+def paso_actual(ahora=None):
+    return int((time.time() if ahora is None else ahora) // paso_segundos())
+
+
+def segundos_restantes(ahora=None):
+    """Segundos hasta que cambie el código actual"""
+    ahora = time.time() if ahora is None else ahora
+    return paso_segundos() - ahora % paso_segundos()
+
+
+@lru_cache(maxsize=1024)
+def secreto_colegio(colegio_id, token_qr):
+    """Secreto HMAC del colegio; cambia si se regenera token_qr"""
+    return hmac.new(
+        settings.SECRET_KEY.encode(), f'qr:{colegio_id}:{token_qr}'.encode(), hashlib.sha256
+    ).digest()
+
+
+def _firma(secreto, colegio_id, paso):
+    return hmac.new(secreto, f'{colegio_id}:{paso}'.encode(), hashlib.sha256).hexdigest()[:LONGITUD_FIRMA]
+
+
+def generar_codigo(colegio_id, token_qr, paso=None):
+    """Código a mostrar en la pantalla QR del colegio para el paso indicado"""
+    paso = paso_actual() if paso is None else paso
+    return f'{colegio_id}.{paso}.{_firma(secreto_colegio(colegio_id, token_qr), colegio_id, paso)}'
+
+
+def validar_codigo(codigo, colegio_id, token_qr, ahora=None):
+    """
+    Devuelve el paso del código si es del colegio y está dentro de la ventana
+    aceptada, o None si no es válido.
+    """
+    try:
+        colegio_codigo, paso, firma = codigo.split('.')
+        colegio_codigo, paso = int(colegio_codigo), int(paso)
+    except (AttributeError, ValueError):
+        return None
+    if colegio_codigo != colegio_id:
+        return None
+    if abs(paso - paso_actual(ahora)) > int(getattr(settings, 'QR_TOKEN_VENTANA', 1)):
+        return None
+    esperada = _firma(secreto_colegio(colegio_id, token_qr), colegio_id, paso)
+    if not hmac.compare_digest(firma, esperada):
+        return None
+    return paso
+
+
+class RegistroUsos:
+    """
+    Conjunto en memoria de (alumno, paso) ya aceptados en la ventana vigente.
+    Un código repetido por el mismo alumno se responde sin tocar la base de
+    datos; los pasos que salen de la ventana se descartan.
+    """
+
+    def __init__(self):
+        self._usos = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, alumno_id, paso):
+        """True si es el primer uso de ese paso por el alumno"""
+        with self._lock:
+            minimo = paso_actual() - int(getattr(settings, 'QR_TOKEN_VENTANA', 1))
+            for viejo in [p for p in self._usos if p < minimo]:
+                del self._usos[viejo]
+            usados = self._usos.setdefault(paso, set())
+            if alumno_id in usados:
+                return False
+            usados.add(alumno_id)
+            return True
+
+    def usado(self, alumno_id, paso):
+        with self._lock:
+            return alumno_id in self._usos.get(paso, ())
+
+
+registro_usos = RegistroUsos()
+
+
+# --- Datos del colegio por alumno y ventana horaria, en memoria del proceso ---
+
+DatosQRAlumno = namedtuple('DatosQRAlumno', 'alumno_id curso_id colegio_id token_qr')
+
+_datos_alumnos = {}
+_datos_lock = threading.Lock()
+_horario = None
+
+
+def datos_qr_alumno(alumno_id):
+    """
+    Colegio y token QR del alumno. Solo consulta la base de datos la
+    primera vez o cuando la entrada venció (QR_CACHE_TTL), para cubrir los
+    cambios hechos desde otros procesos. None si el alumno no existe.
+    """
+    ahora = time.monotonic()
+    entrada = _datos_alumnos.get(alumno_id)
+    if entrada is not None and entrada[0] > ahora:
+        return entrada[1]
+
+    from .models import Alumno
+
+    fila = Alumno.objects.filter(id=alumno_id).values_list(
+        'id', 'curso_id', 'curso__colegio_id', 'curso__colegio__token_qr'
+    ).first()
+    if fila is None:
+        return None
+    datos = DatosQRAlumno(*fila)
+    with _datos_lock:
+        _datos_alumnos[alumno_id] = (ahora + int(getattr(settings, 'QR_CACHE_TTL', 300)), datos)
+    return datos
+
+
+def invalidar_alumno(alumno_id):
+    with _datos_lock:
+        _datos_alumnos.pop(alumno_id, None)
+
+
+def invalidar_datos_qr():
+    """Vaciar el cache completo (cambios de colegio o de curso, poco frecuentes)"""
+    with _datos_lock:
+        _datos_alumnos.clear()
+
+
+def horario_qr():
+    """(inicio, fin) de la ventana de registro, parseados una vez por proceso"""
+    global _horario
+    if _horario is None:
+        _horario = tuple(
+            datetime.strptime(getattr(settings, nombre, defecto), '%H:%M').time()
+            for nombre, defecto in (
+                ('QR_ATTENDANCE_TIME_START', '07:00'), ('QR_ATTENDANCE_TIME_END', '08:30')
+            )
+        )
+    return _horario
+
+
+@receiver(setting_changed)
+def _recalcular_horario(setting, **kwargs):
+    global _horario
+    if setting in ('QR_ATTENDANCE_TIME_START', 'QR_ATTENDANCE_TIME_END'):
+        _horario = None
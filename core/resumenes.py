@@ -0,0 +1,249 @@
+"""
+Mantenimiento de los resúmenes materializados por alumno.
+
+- ResumenPeriodoAlumno: suma y cantidad de notas por (alumno, periodo).
+- ResumenDiarioAlumno: asistencia y participaciones por (alumno, fecha),
+  la base de las ventanas móviles de asistencia de los dashboards.
+
+Los guardados individuales de Nota, Asistencia y Participacion recalculan su
+bucket desde ResumenIncrementalMixin.save(); los borrados (también en
+cascada) ajustan el bucket desde la señal post_delete. Las escrituras masivas
+(bulk_create, queryset.update) deben llamar a actualizar_resumenes_de() o
+actualizar_resumenes() dentro de su transacción.
+
+Todas las escrituras de un bucket pasan por el bloqueo de su fila: el
+recálculo lee las filas de origen solo después de obtenerlo y el descuento de
+un borrado lo toma con su UPDATE. Así dos transacciones que tocan el mismo
+bucket (una asistencia y una participación del mismo día, dos notas del mismo
+período) se ordenan y la segunda agrega ya con lo que confirmó la primera.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum, Q
+
+from .models import (
+    Nota, Asistencia, Participacion, ResumenPeriodoAlumno, ResumenDiarioAlumno
+)
+
+BATCH_SIZE = 1000
+
+
+def _normalizar(modelo, claves):
+    """Convertir las claves a los tipos de la base de datos (fecha como date, etc.)"""
+    campo = modelo._meta.get_field(modelo.campos_resumen[1])
+    return {(int(alumno_id), campo.to_python(valor)) for alumno_id, valor in claves}
+
+
+def _filtro_claves(claves, campo):
+    """Q que selecciona exactamente los buckets pedidos, agrupados por alumno"""
+    por_alumno = defaultdict(set)
+    for alumno_id, valor in claves:
+        por_alumno[alumno_id].add(valor)
+    filtro = Q()
+    for alumno_id, valores in por_alumno.items():
+        filtro |= Q(alumno_id=alumno_id, **{f'{campo}__in': valores})
+    return filtro
+
+
+def _bloquear_buckets(modelo, campo, claves):
+    """
+    Crear los buckets que falten y bloquear sus filas hasta el fin de la transacción.
+
+    El INSERT ... ON CONFLICT DO NOTHING espera a quien haya creado el mismo
+    bucket sin confirmar todavía; el SELECT ... FOR UPDATE espera a quien lo
+    esté recalculando. Ambos recorren los buckets en el mismo orden para no
+    cruzar bloqueos entre lotes.
+    """
+    ordenadas = sorted(claves)
+    modelo.objects.bulk_create(
+        [modelo(alumno_id=alumno_id, **{campo: valor}) for alumno_id, valor in ordenadas],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    list(
+        modelo.objects.select_for_update()
+        .filter(_filtro_claves(ordenadas, campo))
+        .order_by('alumno_id', campo)
+        .values_list('id', flat=True)
+    )
+
+
+@transaction.atomic(savepoint=False)
+def actualizar_resumen_periodo(claves):
+    """Recalcular los buckets (alumno_id, periodo) indicados a partir de las notas"""
+    claves = _normalizar(Nota, claves)
+    if not claves:
+        return
+
+    _bloquear_buckets(ResumenPeriodoAlumno, 'periodo_id', claves)
+    totales = {
+        (fila['alumno_id'], fila['periodo']): fila
+        for fila in Nota.objects.filter(_filtro_claves(claves, 'periodo'))
+        .values('alumno_id', 'periodo')
+        .annotate(suma=Sum('valor'), num=Count('id'))
+    }
+    resumenes = [
+        ResumenPeriodoAlumno(
+            alumno_id=alumno_id,
+            periodo_id=periodo,
+            suma_notas=totales.get((alumno_id, periodo), {}).get('suma') or 0,
+            num_notas=totales.get((alumno_id, periodo), {}).get('num') or 0,
+        )
+        for alumno_id, periodo in claves
+    ]
+    ResumenPeriodoAlumno.objects.bulk_create(
+        resumenes,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['alumno', 'periodo'],
+        update_fields=['suma_notas', 'num_notas'],
+    )
+
+
+@transaction.atomic(savepoint=False)
+def actualizar_resumen_diario(claves):
+    """Recalcular los buckets (alumno_id, fecha) indicados a partir de asistencias y participaciones"""
+    claves = _normalizar(Asistencia, claves)
+    if not claves:
+        return
+
+    _bloquear_buckets(ResumenDiarioAlumno, 'fecha', claves)
+    filtro = _filtro_claves(claves, 'fecha')
+    asistencias = dict(
+        ((alumno_id, fecha), presente)
+        for alumno_id, fecha, presente in Asistencia.objects.filter(filtro)
+        .values_list('alumno_id', 'fecha', 'presente')
+    )
+    participaciones = {
+        (fila['alumno_id'], fila['fecha']): fila
+        for fila in Participacion.objects.filter(filtro)
+        .values('alumno_id', 'fecha')
+        .annotate(suma=Sum('valor'), num=Count('id'))
+    }
+    resumenes = [
+        ResumenDiarioAlumno(
+            alumno_id=alumno_id,
+            fecha=fecha,
+            presente=asistencias.get((alumno_id, fecha)),
+            num_participaciones=participaciones.get((alumno_id, fecha), {}).get('num') or 0,
+            suma_participaciones=participaciones.get((alumno_id, fecha), {}).get('suma') or 0,
+        )
+        for alumno_id, fecha in claves
+    ]
+    ResumenDiarioAlumno.objects.bulk_create(
+        resumenes,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['alumno', 'fecha'],
+        update_fields=['presente', 'num_participaciones', 'suma_participaciones'],
+    )
+
+
+def actualizar_presencia_diaria(alumno_ids, fecha):
+    """
+    Copiar al resumen diario el campo presente de la asistencia de `fecha`.
+    Pensado para escrituras en bloque de un mismo día: no toca los totales de
+    participaciones del bucket.
+    """
+    alumno_ids = list(alumno_ids)
+    for inicio in range(0, len(alumno_ids), BATCH_SIZE):
+        lote = alumno_ids[inicio:inicio + BATCH_SIZE]
+        ResumenDiarioAlumno.objects.bulk_create(
+            [
+                ResumenDiarioAlumno(alumno_id=alumno_id, fecha=fecha, presente=presente)
+                for alumno_id, presente in Asistencia.objects.filter(
+                    alumno_id__in=lote, fecha=fecha
+                ).values_list('alumno_id', 'presente')
+            ],
+            update_conflicts=True,
+            unique_fields=['alumno', 'fecha'],
+            update_fields=['presente'],
+        )
+
+
+def actualizar_resumenes(modelo, claves):
+    """Recalcular los buckets afectados por escrituras sobre `modelo`"""
+    if modelo is Nota:
+        actualizar_resumen_periodo(claves)
+    else:
+        actualizar_resumen_diario(claves)
+
+
+def actualizar_resumenes_de(objetos):
+    """Recalcular los resúmenes de instancias escritas en bloque (bulk_create/update)"""
+    por_modelo = defaultdict(set)
+    for objeto in objetos:
+        clave = objeto.clave_resumen()
+        if clave is not None:
+            por_modelo[type(objeto)].add(clave)
+    for modelo, claves in por_modelo.items():
+        actualizar_resumenes(modelo, claves)
+
+
+def descontar_eliminado(instancia):
+    """
+    Ajustar el bucket de un registro eliminado sin volver a agregar.
+    Se llama desde post_delete, dentro de la transacción del borrado; el
+    UPDATE toma el mismo bloqueo de fila que el recálculo, así que un guardado
+    concurrente del bucket agrega antes o después del descuento, nunca en medio.
+    """
+    clave = instancia.clave_resumen()
+    if clave is None:
+        return
+    alumno_id, valor = clave
+
+    if isinstance(instancia, Nota):
+        ResumenPeriodoAlumno.objects.filter(alumno_id=alumno_id, periodo=valor).update(
+            suma_notas=F('suma_notas') - instancia.valor,
+            num_notas=F('num_notas') - 1,
+        )
+    elif isinstance(instancia, Asistencia):
+        ResumenDiarioAlumno.objects.filter(alumno_id=alumno_id, fecha=valor).update(presente=None)
+    elif isinstance(instancia, Participacion):
+        ResumenDiarioAlumno.objects.filter(alumno_id=alumno_id, fecha=valor).update(
+            suma_participaciones=F('suma_participaciones') - instancia.valor,
+            num_participaciones=F('num_participaciones') - 1,
+        )
+
+
+@transaction.atomic
+def reconstruir_resumenes(stdout=None):
+    """Reconstruir desde cero ambos resúmenes con agregaciones agrupadas"""
+    ResumenPeriodoAlumno.objects.all().delete()
+    ResumenDiarioAlumno.objects.all().delete()
+
+    periodos = (
+        Nota.objects.values('alumno_id', 'periodo')
+        .annotate(suma=Sum('valor'), num=Count('id'))
+        .order_by()
+    )
+    ResumenPeriodoAlumno.objects.bulk_create(
+        (
+            ResumenPeriodoAlumno(
+                alumno_id=fila['alumno_id'], periodo_id=fila['periodo'],
+                suma_notas=fila['suma'], num_notas=fila['num']
+            )
+            for fila in periodos.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    diarios = {}
+    for alumno_id, fecha, presente in Asistencia.objects.values_list('alumno_id', 'fecha', 'presente').iterator():
+        diarios[(alumno_id, fecha)] = ResumenDiarioAlumno(alumno_id=alumno_id, fecha=fecha, presente=presente)
+    participaciones = (
+        Participacion.objects.values('alumno_id', 'fecha')
+        .annotate(suma=Sum('valor'), num=Count('id'))
+        .order_by()
+    )
+    for fila in participaciones.iterator():
+        clave = (fila['alumno_id'], fila['fecha'])
+        resumen = diarios.setdefault(clave, ResumenDiarioAlumno(alumno_id=clave[0], fecha=clave[1]))
+        resumen.num_participaciones = fila['num']
+        resumen.suma_participaciones = fila['suma']
+    ResumenDiarioAlumno.objects.bulk_create(diarios.values(), batch_size=BATCH_SIZE)
+
+    if stdout is not None:
+        stdout.write(f"Resúmenes de período: {ResumenPeriodoAlumno.objects.count()}")
+        stdout.write(f"Resúmenes diarios: {len(diarios)}")
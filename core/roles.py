@@ -0,0 +1,163 @@
+from django.contrib.auth.models import User
+
+
+class RolUsuario:
+    """
+    Rol y alcance de un usuario, resuelto una sola vez por petición.
+
+    Guarda los ids de cada perfil (maestro, alumno, padre) por separado para
+    que vistas y permisos puedan mantener el mismo orden de verificación que
+    usaban con las consultas individuales.
+    """
+
+    def __init__(self, user_id=None, is_superuser=False, maestro_id=None,
+                 cursos_tutor=(), alumno_id=None, curso_id=None,
+                 padre_id=None, hijos=(), cursos_hijos=(),
+                 username='', is_staff=False):
+        self.user_id = user_id
+        self.username = username
+        self.is_superuser = is_superuser
+        self.is_staff = is_staff
+        self.maestro_id = maestro_id
+        self.cursos_tutor = list(cursos_tutor)
+        self.alumno_id = alumno_id
+        self.curso_id = curso_id
+        self.padre_id = padre_id
+        self.hijos = list(hijos)
+        self.cursos_hijos = list(cursos_hijos)
+
+    @property
+    def es_maestro(self):
+        return self.maestro_id is not None
+
+    @property
+    def es_alumno(self):
+        return self.alumno_id is not None
+
+    @property
+    def es_padre(self):
+        return self.padre_id is not None
+
+    @property
+    def es_tutor(self):
+        return bool(self.cursos_tutor)
+
+    @property
+    def role(self):
+        """Rol principal, con la misma prioridad que el login"""
+        if self.es_maestro:
+            return 'maestro'
+        if self.es_alumno:
+            return 'alumno'
+        if self.es_padre:
+            return 'padre'
+        return 'admin' if self.is_superuser else 'unknown'
+
+    @property
+    def role_id(self):
+        return {
+            'maestro': self.maestro_id,
+            'alumno': self.alumno_id,
+            'padre': self.padre_id,
+        }.get(self.role)
+
+    def es_tutor_de(self, curso_id):
+        return curso_id in self.cursos_tutor
+
+    def es_padre_de(self, alumno_id):
+        return alumno_id in self.hijos
+
+    def as_claims(self):
+        """Representación compacta para firmar dentro del access token"""
+        return {
+            'maestro_id': self.maestro_id,
+            'cursos_tutor': self.cursos_tutor,
+            'alumno_id': self.alumno_id,
+            'curso_id': self.curso_id,
+            'padre_id': self.padre_id,
+            'hijos': self.hijos,
+            'cursos_hijos': self.cursos_hijos,
+        }
+
+    @classmethod
+    def from_claims(cls, user_id, is_superuser, claims):
+        return cls(user_id=user_id, is_superuser=is_superuser, **claims)
+
+
+def resolver_rol(user):
+    """
+    Resolver el rol de un usuario con una única consulta.
+
+    Los perfiles son OneToOne con User, así que un LEFT JOIN por perfil más
+    los cursos tutoreados y los hijos devuelve pocas filas por usuario.
+    """
+    if user is None or not user.is_authenticated:
+        return RolUsuario()
+    return resolver_rol_por_id(user.pk)
+
+
+def resolver_rol_por_id(user_id):
+    """Igual que resolver_rol, pero a partir del id (p. ej. desde un JWT)"""
+    filas = User.objects.filter(pk=user_id).values_list(
+        'username', 'is_staff', 'is_superuser',
+        'maestro__id', 'maestro__cursos_tutor__id',
+        'alumno__id', 'alumno__curso_id',
+        'padre__id', 'padre__hijos__id', 'padre__hijos__curso_id',
+    )
+
+    rol = RolUsuario(user_id=user_id)
+    cursos_tutor, hijos, cursos_hijos = set(), set(), set()
+    for (username, is_staff, is_superuser, maestro_id, curso_tutor_id,
+         alumno_id, curso_id, padre_id, hijo_id, curso_hijo_id) in filas:
+        rol.username = username
+        rol.is_staff = is_staff
+        rol.is_superuser = is_superuser
+        rol.maestro_id = rol.maestro_id or maestro_id
+        rol.alumno_id = rol.alumno_id or alumno_id
+        rol.curso_id = rol.curso_id or curso_id
+        rol.padre_id = rol.padre_id or padre_id
+        if curso_tutor_id is not None:
+            cursos_tutor.add(curso_tutor_id)
+        if hijo_id is not None:
+            hijos.add(hijo_id)
+            cursos_hijos.add(curso_hijo_id)
+
+    rol.cursos_tutor = sorted(cursos_tutor)
+    rol.hijos = sorted(hijos)
+    rol.cursos_hijos = sorted(cursos_hijos)
+    return rol
+
+
+def get_rol(request):
+    """
+    Obtener el rol del usuario de la petición, resolviéndolo solo la primera vez.
+
+    El resultado queda guardado en la propia petición, de modo que la vista y
+    todas sus clases de permiso comparten la misma resolución.
+    """
+    user = request.user
+    rol = getattr(request, '_rol_usuario', None)
+    if rol is None or rol.user_id != getattr(user, 'pk', None):
+        # Con JWT_ROLE_CLAIMS el usuario del token ya trae el rol firmado
+        rol = getattr(user, 'rol_usuario', None) or resolver_rol(user)
+        request._rol_usuario = rol
+    return rol
+
+
+def filtrar_por_alumno(queryset, rol, campo='alumno', campo_curso=None):
+    """
+    Restringir un queryset de registros académicos al alcance del rol.
+
+    Aplica el mismo orden que usaban las vistas de listado: tutor, alumno,
+    padre. Los superusuarios no tienen restricción. `campo_curso` permite
+    filtrar por un curso guardado en la propia fila (marcas de borrado).
+    """
+    if rol.is_superuser:
+        return queryset
+    if rol.es_maestro:
+        return queryset.filter(**{f'{campo_curso or campo + "__curso_id"}__in': rol.cursos_tutor})
+    if rol.es_alumno:
+        return queryset.filter(**{f'{campo}_id': rol.alumno_id})
+    if rol.es_padre:
+        return queryset.filter(**{f'{campo}_id__in': rol.hijos})
+    return queryset.none()
@@ -2,8 +2,9 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import (
     Colegio, Curso, Materia, Maestro, Alumno, Padre, 
-    Nota, Asistencia, Participacion
+    Nota, Asistencia, Participacion, Periodo
 )
+from .periodos import codigo_de, periodo_por_codigo
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer para el modelo User"""
@@ -65,7 +66,9 @@ class CursoSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_num_alumnos(self, obj):
-        return obj.alumnos.count()
+        # Las vistas lo anotan en la consulta; sin anotación se cuenta aparte
+        num_alumnos = getattr(obj, 'num_alumnos', None)
+        return obj.alumnos.count() if num_alumnos is None else num_alumnos
 
 class MateriaSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Materia"""
@@ -91,7 +94,9 @@ class PadreSerializer(serializers.ModelSerializer):
         return padre
     
     def get_hijos_count(self, obj):
-        return obj.hijos.count()
+        # Las vistas lo anotan en la consulta; sin anotación se cuenta aparte
+        hijos_count = getattr(obj, 'hijos_count', None)
+        return obj.hijos.count() if hijos_count is None else hijos_count
 
 class AlumnoSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Alumno"""
@@ -102,6 +107,7 @@ class AlumnoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Alumno
         fields = '__all__'
+        relaciones = ('padres__user',)  # get_padres_info
     
     def create(self, validated_data):
         user_data = validated_data.pop('user')
@@ -128,10 +134,41 @@ class AlumnoListSerializer(serializers.ModelSerializer):
     def get_nombre_completo(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}"
 
+class PeriodoField(serializers.SlugRelatedField):
+    """
+    Período por su código ("2024-T1"). Se resuelve con el catálogo en memoria
+    (core/periodos.py): ni leerlo ni validarlo consulta la base, tampoco en
+    las cargas masivas.
+    """
+    default_error_messages = {
+        'does_not_exist': 'No existe el período "{value}".',
+        'invalid': 'Código de período inválido.',
+    }
+
+    def __init__(self, **kwargs):
+        if not kwargs.get('read_only'):
+            kwargs.setdefault('queryset', Periodo.objects.all())
+        super().__init__(slug_field='codigo', **kwargs)
+
+    def use_pk_only_optimization(self):
+        return True
+
+    def to_representation(self, value):
+        return codigo_de(value.pk)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        periodo = periodo_por_codigo(data)
+        if periodo is None:
+            self.fail('does_not_exist', slug_name=self.slug_field, value=data)
+        return periodo
+
 class NotaSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Nota"""
     alumno_nombre = serializers.CharField(source='alumno.user.get_full_name', read_only=True)
     materia_nombre = serializers.CharField(source='materia.nombre', read_only=True)
+    periodo = PeriodoField()
     
     class Meta:
         model = Nota
@@ -142,6 +179,26 @@ class NotaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La nota debe estar entre 0 y 100")
         return value
 
+class NotaBulkItemSerializer(serializers.Serializer):
+    """
+    Una celda de la carga masiva de notas. El rango 0-100 no se valida aquí:
+    la vista lo comprueba de una vez para todas las celdas.
+    """
+    alumno = serializers.IntegerField()
+    materia = serializers.IntegerField()
+    periodo = PeriodoField(required=False)
+    valor = serializers.FloatField()
+    observaciones = serializers.CharField(required=False, allow_blank=True)
+
+class NotaBulkSerializer(serializers.Serializer):
+    """Carga masiva de notas; `periodo` se aplica a las celdas que no lo traen"""
+    MAX_CELDAS = 2000
+
+    periodo = PeriodoField(required=False)
+    notas = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_CELDAS
+    )
+
 class AsistenciaSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Asistencia"""
     alumno_nombre = serializers.CharField(source='alumno.user.get_full_name', read_only=True)
@@ -149,13 +206,50 @@ class AsistenciaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Asistencia
         fields = '__all__'
-        read_only_fields = ('fecha_registro', 'registrado_por_qr')
+        # registrado_en lo fija el servidor: un valor futuro bloquearía cualquier registro posterior
+        read_only_fields = ('fecha_registro', 'registrado_por_qr', 'registrado_en')
+
+class AsistenciaBulkItemSerializer(serializers.Serializer):
+    """Una fila de la toma de asistencia masiva"""
+    alumno = serializers.IntegerField()
+    presente = serializers.BooleanField()
+    # Opcionales sin valor por defecto: si no vienen, no se pisan los guardados
+    hora_llegada = serializers.TimeField(required=False, allow_null=True)
+    observaciones = serializers.CharField(required=False, allow_blank=True)
+
+class AsistenciaBulkSerializer(serializers.Serializer):
+    """Toma de asistencia de un curso completo para una fecha"""
+    MAX_REGISTROS = 500
+
+    fecha = serializers.DateField()
+    # Hora del dispositivo al tomar la asistencia (puede llegar más tarde)
+    momento = serializers.DateTimeField(required=False)
+    # Cada fila se valida por separado para poder informar errores por fila
+    registros = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_REGISTROS
+    )
 
 class QRAsistenciaSerializer(serializers.Serializer):
     """Serializer para el registro de asistencia por QR"""
     qr_token = serializers.CharField(max_length=100)
     latitud = serializers.FloatField()
     longitud = serializers.FloatField()
+    # Hora del teléfono al escanear; en vivo solo se compara con la del servidor
+    momento = serializers.DateTimeField(required=False)
+
+class CheckinOfflineSerializer(QRAsistenciaSerializer):
+    """Un escaneo de la cola sin conexión del teléfono"""
+    clave = serializers.CharField(max_length=64)
+    momento = serializers.DateTimeField()
+
+class SincronizarQRSerializer(serializers.Serializer):
+    """Cola de escaneos QR hechos sin conexión"""
+    MAX_CHECKINS = 100
+
+    # Cada escaneo se valida por separado para informar el resultado de cada uno
+    checkins = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_CHECKINS
+    )
 
 class ParticipacionSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Participacion"""
@@ -173,7 +267,31 @@ class ParticipacionSerializer(serializers.ModelSerializer):
 
 # --- Serializers para el Dashboard del Padre ---
 
-class HijoDashboardSerializer(serializers.ModelSerializer):
+class CalculosMemoizadosMixin:
+    """
+    Cache de bloques derivados durante la representación de un objeto.
+
+    Varios SerializerMethodField de los dashboards dependen de los mismos
+    cálculos (estadísticas, análisis, tendencia). Con memoizar() cada bloque
+    se calcula una sola vez por objeto serializado y los demás campos lo reutilizan.
+    """
+    def to_representation(self, instance):
+        self._calculos = {}
+        try:
+            return super().to_representation(instance)
+        finally:
+            self._calculos = None
+
+    def memoizar(self, nombre, calcular, obj):
+        calculos = getattr(self, '_calculos', None)
+        if calculos is None:
+            # Llamado fuera de to_representation: calcular sin cache
+            return calcular(obj)
+        if nombre not in calculos:
+            calculos[nombre] = calcular(obj)
+        return calculos[nombre]
+
+class HijoDashboardSerializer(CalculosMemoizadosMixin, serializers.ModelSerializer):
     """Serializer mejorado para mostrar un resumen completo de cada hijo en el dashboard del padre."""
     nombre_completo = serializers.CharField(source='user.get_full_name', read_only=True)
     curso_nombre = serializers.CharField(source='curso.nombre', read_only=True)
@@ -214,6 +332,9 @@ class HijoDashboardSerializer(serializers.ModelSerializer):
         return f"https://i.pravatar.cc/150?u={obj.user.username}"
     
     def get_tendencia_academica(self, obj):
+        return self.memoizar('tendencia_academica', self._calcular_tendencia_academica, obj)
+    
+    def _calcular_tendencia_academica(self, obj):
         """Calcular tendencia académica comparando períodos"""
         promedio_actual = getattr(obj, 'promedio_periodo', None)
         promedio_anterior = getattr(obj, 'promedio_anterior', None)
@@ -336,11 +457,12 @@ class MateriaConDetalleSerializer(serializers.Serializer):
     """Serializer para una materia con sus notas, asistencias y participaciones asociadas."""
     id = serializers.IntegerField(read_only=True)
     nombre = serializers.CharField(read_only=True)
-    notas = NotaPadreSerializer(many=True, read_only=True)
-    participaciones = ParticipacionPadreSerializer(many=True, read_only=True)
+    # Notas y participaciones del hijo precargadas por DetalleHijoView
+    notas = NotaPadreSerializer(source='notas_filtradas', many=True, read_only=True)
+    participaciones = ParticipacionPadreSerializer(source='participaciones_filtradas', many=True, read_only=True)
 
 
-class DetalleHijoSerializer(serializers.Serializer):
+class DetalleHijoSerializer(CalculosMemoizadosMixin, serializers.Serializer):
     """Serializer mejorado para la vista de detalle de un hijo, con toda su información académica."""
     id = serializers.IntegerField(read_only=True)
     nombre_completo = serializers.CharField(read_only=True)
@@ -363,6 +485,12 @@ class DetalleHijoSerializer(serializers.Serializer):
     recomendaciones = serializers.SerializerMethodField()
     
     def get_estadisticas_periodo(self, obj):
+        return self.memoizar('estadisticas_periodo', self._calcular_estadisticas_periodo, obj)
+    
+    def get_analisis_rendimiento(self, obj):
+        return self.memoizar('analisis_rendimiento', self._calcular_analisis_rendimiento, obj)
+    
+    def _calcular_estadisticas_periodo(self, obj):
         """Calcular estadísticas completas del período"""
         materias = obj.get('materias', [])
         asistencias = obj.get('asistencias', [])
@@ -408,7 +536,7 @@ class DetalleHijoSerializer(serializers.Serializer):
             'total_materias': len(materias)
         }
     
-    def get_analisis_rendimiento(self, obj):
+    def _calcular_analisis_rendimiento(self, obj):
         """Generar análisis del rendimiento académico"""
         estadisticas = self.get_estadisticas_periodo(obj)
         promedio = estadisticas['promedio_general']
@@ -515,6 +643,8 @@ class DetalleHijoSerializer(serializers.Serializer):
 # --- Serializers para el Dashboard del Maestro ---
 
 class NotaMaestroSerializer(serializers.ModelSerializer):
+    periodo = PeriodoField(read_only=True)
+
     class Meta:
         model = Nota
         fields = ('id', 'materia', 'valor', 'periodo', 'fecha_registro')
@@ -528,7 +658,7 @@ class AlumnoParaMaestroSerializer(serializers.ModelSerializer):
     """Serializer de un alumno para la vista de gestión del maestro tutor."""
     nombre_completo = serializers.CharField(source='user.get_full_name', read_only=True)
     notas = serializers.SerializerMethodField()
-    participaciones = ParticipacionMaestroSerializer(many=True, read_only=True)
+    participaciones = serializers.SerializerMethodField()
     foto_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -542,6 +672,12 @@ class AlumnoParaMaestroSerializer(serializers.ModelSerializer):
         else:
             return NotaMaestroSerializer(obj.notas.all(), many=True).data
 
+    def get_participaciones(self, obj):
+        # Participaciones acotadas por la vista; si no vienen, todas las del alumno
+        if hasattr(obj, 'participaciones_filtradas'):
+            return ParticipacionMaestroSerializer(obj.participaciones_filtradas, many=True).data
+        return ParticipacionMaestroSerializer(obj.participaciones.all(), many=True).data
+
     def get_foto_url(self, obj):
         return f"https://i.pravatar.cc/150?u={obj.user.username}"
 
@@ -551,6 +687,8 @@ class MaestroDashboardSerializer(serializers.Serializer):
     materias = MateriaSerializer(many=True)
     alumnos = AlumnoParaMaestroSerializer(many=True)
     periodos = serializers.ListField(child=serializers.CharField())
+    participaciones_desde = serializers.DateField()
+    paginacion = serializers.DictField(required=False)
 
 
 class PrediccionSerializer(serializers.Serializer):
@@ -559,4 +697,10 @@ class PrediccionSerializer(serializers.Serializer):
     clasificacion = serializers.CharField()
     promedio_notas_anteriores = serializers.FloatField()
     porcentaje_asistencia = serializers.FloatField()
-    promedio_participaciones = serializers.FloatField() 
\ No newline at end of file
+    promedio_participaciones = serializers.FloatField()
+
+
+class PrediccionAlumnoSerializer(PrediccionSerializer):
+    """Predicción de un alumno dentro de la predicción de todo su curso"""
+    alumno_id = serializers.IntegerField()
+    nombre_completo = serializers.CharField()
@@ -0,0 +1,65 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cambios import preparar_eliminacion, registrar_eliminacion
+from .geocercas import invalidar_indice
+from .models import Colegio, Geocerca, Curso, Alumno, Nota, Asistencia, Participacion, Periodo
+from .periodos import invalidar_catalogo
+from .qr import invalidar_alumno, invalidar_datos_qr
+from .resumenes import descontar_eliminado
+
+
+@receiver(post_delete, sender=Nota)
+@receiver(post_delete, sender=Asistencia)
+@receiver(post_delete, sender=Participacion)
+def ajustar_resumen_eliminado(sender, instance, **kwargs):
+    """Los borrados (incluidos los en cascada) ajustan su resumen en la misma transacción"""
+    descontar_eliminado(instance)
+
+
+@receiver(pre_delete, sender=Nota)
+@receiver(pre_delete, sender=Asistencia)
+@receiver(pre_delete, sender=Participacion)
+def contar_eliminado(sender, instance, origin=None, **kwargs):
+    """Las marcas de borrado de un mismo borrado se insertan juntas"""
+    preparar_eliminacion(origin)
+
+
+@receiver(post_delete, sender=Nota)
+@receiver(post_delete, sender=Asistencia)
+@receiver(post_delete, sender=Participacion)
+def marcar_eliminado(sender, instance, origin=None, **kwargs):
+    """Marca de borrado para los feeds de cambios"""
+    registrar_eliminacion(instance, origin)
+
+
+@receiver(post_save, sender=Colegio)
+@receiver(post_delete, sender=Colegio)
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_cache_qr(sender, instance, **kwargs):
+    """Ubicación, token o colegio del curso cambiaron: vaciar el cache del QR"""
+    invalidar_datos_qr()
+
+
+@receiver(post_save, sender=Colegio)
+@receiver(post_delete, sender=Colegio)
+@receiver(post_save, sender=Geocerca)
+@receiver(post_delete, sender=Geocerca)
+def invalidar_indice_geocercas(sender, instance, **kwargs):
+    """Cambió una zona o la ubicación de un colegio: reconstruir la grilla"""
+    invalidar_indice()
+
+
+@receiver(post_save, sender=Alumno)
+@receiver(post_delete, sender=Alumno)
+def invalidar_cache_qr_alumno(sender, instance, **kwargs):
+    """El alumno pudo cambiar de curso"""
+    invalidar_alumno(instance.id)
+
+
+@receiver(post_save, sender=Periodo)
+@receiver(post_delete, sender=Periodo)
+def invalidar_catalogo_periodos(sender, instance, **kwargs):
+    """Período nuevo, editado o borrado: recargar la lista ordenada"""
+    invalidar_catalogo()
@@ -1,3 +1,1269 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Q
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .asistencias import alumnos_activos, crear_ausencias, marcar_presentes, volcar_checkins
+from .authentication import CLAIM_ROL, RolRefreshToken
+from .cambios import _lotes
+from .geocercas import construir_indice, indice_geocercas, invalidar_indice
+from .management.commands.explicar_consultas import consultas_frecuentes, recorrido_completo
+from .models import (
+    Alumno, Asistencia, CheckinPendiente, Colegio, Curso, Eliminacion, Geocerca, Maestro, Materia, Nota, Padre, Participacion,
+    Periodo, ResumenDiarioAlumno, ResumenPeriodoAlumno,
+)
+from .pagination import KeysetPagination
+from .periodos import catalogo, invalidar_catalogo, periodo_por_codigo, periodos_del_anio
+from . import prediccion as modulo_prediccion
+from .prediccion import cargar_modelo, construir_caracteristicas, invalidar_modelo
+from .qr import datos_qr_alumno, generar_codigo, invalidar_datos_qr, paso_actual, registro_usos
+from .resumenes import reconstruir_resumenes
+from .roles import RolUsuario, filtrar_por_alumno, get_rol, resolver_rol, resolver_rol_por_id
+from .serializers import DetalleHijoSerializer, HijoDashboardSerializer
+
+
+class DatosColegioMixin:
+    """
+    Un colegio con un curso tutoreado por `maestro`, dos materias, los tres
+    trimestres de 2024 y `ALUMNOS` alumnos con un padre cada uno.
+    """
+    ALUMNOS = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.colegio = Colegio.objects.create(
+            nombre='Colegio San José', direccion='Av. Siempre Viva 123',
+            latitud=-16.5, longitud=-68.1193, token_qr='tok-123',
+        )
+        cls.maestro = Maestro.objects.create(user=User.objects.create_user('maestro1'))
+        cls.curso = Curso.objects.create(
+            nombre='1ro A', nivel='Primaria', seccion='A', colegio=cls.colegio, tutor=cls.maestro
+        )
+        cls.materias = [
+            Materia.objects.create(nombre=nombre, curso=cls.curso, maestro=cls.maestro)
+            for nombre in ('Matemáticas', 'Lenguaje')
+        ]
+        cls.periodos = periodos_del_anio(2024, 3)
+        cls.alumnos, cls.padres = [], []
+        for numero in range(1, cls.ALUMNOS + 1):
+            cls.agregar_alumno(numero, cls.curso)
+
+    @classmethod
+    def agregar_alumno(cls, numero, curso):
+        alumno = Alumno.objects.create(
+            user=User.objects.create_user(f'alumno{numero}'), curso=curso
+        )
+        padre = Padre.objects.create(user=User.objects.create_user(f'padre{numero}'))
+        alumno.padres.add(padre)
+        cls.alumnos.append(alumno)
+        cls.padres.append(padre)
+        return alumno
+
+    def setUp(self):
+        # Los caches del proceso sobreviven al rollback de cada test
+        invalidar_catalogo()
+        invalidar_datos_qr()
+        invalidar_indice()
+        invalidar_modelo()
+
+    def cliente(self, user):
+        cliente = APIClient()
+        cliente.force_authenticate(user=user)
+        return cliente
+
+
+class KeysetPaginationTests(DatosColegioMixin, TestCase):
+
+    def test_recorre_todas_las_paginas(self):
+        for dia in range(1, 6):
+            for alumno in self.alumnos:
+                Asistencia.objects.create(alumno=alumno, fecha=date(2024, 5, dia), presente=True)
+        cliente = self.cliente(self.maestro.user)
+
+        vistas, url = [], '/api/asistencia/?cursor=&page_size=7'
+        while url:
+            respuesta = cliente.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            vistas += [fila['id'] for fila in respuesta.data['results']]
+            url = respuesta.data['next']
+        self.assertEqual(len(vistas), 5 * self.ALUMNOS)
+        self.assertEqual(len(set(vistas)), len(vistas))
+
+    def test_sin_cursor_pagina_por_numero(self):
+        for dia in range(1, 26):
+            Asistencia.objects.create(alumno=self.alumnos[0], fecha=date(2024, 5, dia), presente=True)
+        cliente = self.cliente(self.maestro.user)
+        for params in ({}, {'page': 2}):
+            with self.subTest(params=params):
+                respuesta = cliente.get('/api/asistencia/', params)
+                self.assertEqual(set(respuesta.data), {'count', 'next', 'previous', 'results'})
+                self.assertEqual(respuesta.data['count'], 25)
+        primera = cliente.get('/api/asistencia/').data['results']
+        self.assertEqual(primera[0]['fecha'], '2024-05-25')
+
+    def test_cursor_invalido_es_404(self):
+        cliente = self.cliente(self.maestro.user)
+        for valores in (['x', 'y'], ['2024-05-01', 'x'], [None, 1], [[1], 2], [{'a': 1}, 2], [True, 1], [1]):
+            with self.subTest(valores=valores):
+                cursor = KeysetPagination.codificar_cursor(valores)
+                self.assertEqual(cliente.get('/api/asistencia/', {'cursor': cursor}).status_code, 404)
+        cursor = KeysetPagination.codificar_cursor(['x', 'y'])
+        self.assertEqual(cliente.get('/api/notas/', {'cursor': cursor}).status_code, 404)
+        self.assertEqual(cliente.get('/api/asistencia/', {'cursor': '!!no-es-base64'}).status_code, 404)
+
+
+class ListadosNumConsultasTests(DatosColegioMixin, TestCase):
+    """Los listados paginados hacen las mismas consultas con 20 filas que con pocas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser('admin')
+        for numero in range(2, 26):
+            tutor = Maestro.objects.create(user=User.objects.create_user(f'maestro{numero}'))
+            curso = Curso.objects.create(
+                nombre=f'Curso {numero}', nivel='Primaria', seccion='A', colegio=cls.colegio, tutor=tutor
+            )
+            cls.agregar_alumno(cls.ALUMNOS + numero, curso)
+
+    def assertConsultasPorPagina(self, url, consultas):
+        cliente = self.cliente(self.admin)
+        for pagina, filas in ((1, 20), (2, None)):
+            with self.subTest(url=url, pagina=pagina), self.assertNumQueries(consultas):
+                respuesta = cliente.get(url, {'page': pagina})
+            self.assertEqual(respuesta.status_code, 200)
+            if filas:
+                self.assertEqual(len(respuesta.data['results']), filas)
+            else:
+                self.assertLess(len(respuesta.data['results']), 20)
+
+    def test_cursos(self):
+        # COUNT(*) de la paginación y la página con tutor, colegio y num_alumnos
+        self.assertConsultasPorPagina('/api/cursos/', 2)
+
+    def test_padres(self):
+        self.assertConsultasPorPagina('/api/padres/', 2)
+
+    def test_alumnos(self):
+        self.assertConsultasPorPagina('/api/alumnos/', 2)
+
+
+class GeocercaTests(DatosColegioMixin, TestCase):
+
+    def test_save_valida(self):
+        with self.assertRaises(ValidationError):
+            Geocerca.objects.create(colegio=self.colegio, nombre='Sede', tipo=Geocerca.CIRCULO, latitud=-16.5)
+        with self.assertRaises(ValidationError):
+            Geocerca.objects.create(colegio=self.colegio, nombre='Sede', tipo=Geocerca.POLIGONO, vertices=[[1, 2]])
+        self.assertFalse(Geocerca.objects.exists())
+
+    def test_rangos(self):
+        circulo = {'colegio': self.colegio, 'nombre': 'Sede', 'tipo': Geocerca.CIRCULO}
+        invalidas = [
+            Geocerca(**circulo, latitud=-16.5, longitud=-68.1, radio_metros=Geocerca.RADIO_MAX_METROS + 1),
+            Geocerca(**circulo, latitud=-91, longitud=-68.1, radio_metros=50),
+            Geocerca(**circulo, latitud=-16.5, longitud=181, radio_metros=50),
+            Geocerca(colegio=self.colegio, nombre='Sede', tipo=Geocerca.POLIGONO,
+                     vertices=[[-16.5, -68.1], [-16.5, -68.09], [95, -68.09]]),
+            Geocerca(colegio=self.colegio, nombre='Sede', tipo=Geocerca.POLIGONO,
+                     vertices=[[-16.5, -68.1], [-16.5, -68.0], [-16.4, -68.0]]),  # unos 11 km de lado
+            Geocerca(colegio=self.colegio, nombre='Sede', tipo=Geocerca.POLIGONO,
+                     vertices=[[-16.5, -68.1], [-16.5, True], [-16.49, -68.1]]),
+        ]
+        for geocerca in invalidas:
+            with self.subTest(radio=geocerca.radio_metros, vertices=geocerca.vertices):
+                with self.assertRaises(ValidationError):
+                    geocerca.save()
+        Geocerca.objects.create(**circulo, latitud=-16.5, longitud=-68.1, radio_metros=Geocerca.RADIO_MAX_METROS)
+        Geocerca.objects.create(colegio=self.colegio, nombre='Campus', tipo=Geocerca.POLIGONO,
+                                vertices=[[-16.5, -68.1], [-16.5, -68.02], [-16.45, -68.02]])
+
+    def test_indice_omite_radios_enormes(self):
+        campus = Geocerca.objects.create(
+            colegio=self.colegio, nombre='Campus', tipo=Geocerca.CIRCULO, latitud=-16.6, longitud=-68.2, radio_metros=50
+        )
+        Geocerca.objects.filter(id=campus.id).update(radio_metros=10_000_000)
+        with self.assertLogs('core.geocercas', 'WARNING'):
+            indice = construir_indice()
+        # Solo la celda del círculo por defecto del colegio, que se quedó sin geocercas válidas
+        self.assertLessEqual(len(indice.celdas), 4)
+
+    def test_indice_omite_geocercas_invalidas(self):
+        sede = Geocerca.objects.create(
+            colegio=self.colegio, nombre='Sede', tipo=Geocerca.POLIGONO,
+            vertices=[[-16.51, -68.13], [-16.51, -68.11], [-16.49, -68.11], [-16.49, -68.13]],
+        )
+        campus = Geocerca.objects.create(
+            colegio=self.colegio, nombre='Campus', tipo=Geocerca.CIRCULO, latitud=-16.6, longitud=-68.2, radio_metros=50
+        )
+        # Un dato roto en la base (sin pasar por save) no debe tumbar el registro QR
+        Geocerca.objects.filter(id=campus.id).update(radio_metros=None)
+
+        with self.assertLogs('core.geocercas', 'WARNING') as avisos:
+            indice = construir_indice()
+        self.assertIn(f'Geocerca {campus.id}', avisos.output[0])
+        self.assertEqual(indice.zona_de_colegio(self.colegio.id, -16.5, -68.12).nombre, sede.nombre)
+        self.assertIsNone(indice.zona_de_colegio(self.colegio.id, -16.6, -68.2))
+
+
+class PrediccionTests(DatosColegioMixin, TestCase):
+
+    def test_caracteristicas_solo_usan_datos_anteriores_al_periodo(self):
+        alumno, materia = self.alumnos[0], self.materias[0]
+        primero, segundo = self.periodos[0], self.periodos[1]
+        Nota.objects.create(alumno=alumno, materia=materia, periodo=primero, valor=60)
+        Nota.objects.create(alumno=alumno, materia=materia, periodo=segundo, valor=90)
+        antes, despues = segundo.inicio - timedelta(days=10), segundo.inicio + timedelta(days=10)
+        Asistencia.objects.create(alumno=alumno, fecha=antes, presente=True)
+        Asistencia.objects.create(alumno=alumno, fecha=despues, presente=False)
+        Participacion.objects.create(alumno=alumno, materia=materia, fecha=antes, valor=2)
+        Participacion.objects.create(alumno=alumno, materia=materia, fecha=despues, valor=5)
+
+        notas, asistencia, participaciones = construir_caracteristicas([alumno.id], segundo)[0]
+        self.assertEqual((notas, asistencia, participaciones), (60, 100, 2))
+
+
+class EliminacionesTests(DatosColegioMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for alumno in cls.alumnos:
+            for materia in cls.materias:
+                Nota.objects.create(alumno=alumno, materia=materia, periodo=cls.periodos[0], valor=70)
+            Asistencia.objects.create(alumno=alumno, fecha=date(2024, 5, 20), presente=True)
+
+    def consultas_a(self, consultas, tabla):
+        return [q['sql'] for q in consultas.captured_queries if f'"{tabla}"' in q['sql']]
+
+    def test_borrado_masivo_inserta_las_marcas_juntas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            Nota.objects.filter(periodo=self.periodos[0]).delete()
+        inserciones = [sql for sql in self.consultas_a(consultas, 'core_eliminacion') if sql.startswith('INSERT')]
+        self.assertEqual(len(inserciones), 1)
+        self.assertEqual(len(self.consultas_a(consultas, 'core_alumno')), 1)
+        self.assertEqual(
+            set(Eliminacion.objects.values_list('modelo', 'curso_id')), {('nota', self.curso.id)}
+        )
+        self.assertEqual(Eliminacion.objects.count(), len(self.alumnos) * len(self.materias))
+
+    def test_cascada_y_borrado_individual(self):
+        alumno = self.alumnos[0]
+        Asistencia.objects.get(alumno=alumno).delete()
+        self.assertEqual(Eliminacion.objects.get().modelo, 'asistencia')
+
+        alumno.delete()
+        self.assertEqual(
+            sorted(Eliminacion.objects.values_list('modelo', 'curso_id')),
+            [('asistencia', self.curso.id)] + [('nota', self.curso.id)] * len(self.materias)
+        )
+        # Terminado el borrado no quedan lotes pendientes en el hilo
+        self.assertEqual(len(_lotes.por_origen), 0)
+
+
+@override_settings(QR_ATTENDANCE_TIME_START='00:00', QR_ATTENDANCE_TIME_END='23:59', QR_TOKEN_ROTATIVO=False)
+class NumConsultasTests(DatosColegioMixin, TestCase):
+    """Las vistas con varias filas hacen una cantidad fija de consultas"""
+
+    def crear_notas(self, periodos):
+        for alumno in self.alumnos:
+            for periodo in periodos:
+                for materia in self.materias:
+                    Nota.objects.create(alumno=alumno, materia=materia, periodo=periodo, valor=70)
+
+    def test_detalle_hijo_no_crece_con_los_periodos(self):
+        hoy = date.today()
+        hijo, padre = self.alumnos[0], self.padres[0]
+        for dias in range(5):
+            Asistencia.objects.create(alumno=hijo, fecha=hoy - timedelta(days=dias), presente=True)
+            Participacion.objects.create(alumno=hijo, materia=self.materias[0], fecha=hoy - timedelta(days=dias), valor=3)
+        cliente = self.cliente(padre.user)
+        url = f'/api/padre/hijo/{hijo.id}/'
+
+        self.crear_notas(self.periodos)
+        cliente.get(url)  # Carga el catálogo de períodos del proceso
+        # Rol, hijo, promedios, asistencias, materias y sus dos prefetch, navegación
+        with self.assertNumQueries(8):
+            respuesta = cliente.get(url)
+        self.assertEqual(len(respuesta.data['periodos_disponibles']), 3)
+
+        self.crear_notas(periodos_del_anio(2025, 4) + periodos_del_anio(2026, 2))
+        cliente.get(url)
+        with self.assertNumQueries(8):
+            respuesta = cliente.get(url)
+        self.assertEqual(len(respuesta.data['periodos_disponibles']), 9)
+
+    def test_gradebook(self):
+        cliente = self.cliente(self.maestro.user)
+        url = f'/api/cursos/{self.curso.id}/gradebook/{self.periodos[0].codigo}/'
+        self.crear_notas(self.periodos[:1])
+        cliente.get(url)  # Carga el catálogo de períodos del proceso
+        # Curso, rol, alumnos, materias y una sola consulta de notas
+        with self.assertNumQueries(5):
+            respuesta = cliente.get(url)
+        self.assertEqual(len(respuesta.data['valores']), self.ALUMNOS * 2)
+
+        for numero in range(self.ALUMNOS + 1, self.ALUMNOS + 11):
+            alumno = Alumno.objects.create(user=User.objects.create_user(f'alumno{numero}'), curso=self.curso)
+            Nota.objects.create(alumno=alumno, materia=self.materias[0], periodo=self.periodos[0], valor=50)
+        with self.assertNumQueries(5):
+            respuesta = cliente.get(url)
+        self.assertEqual(len(respuesta.data['valores']), (self.ALUMNOS + 10) * 2)
+
+    def test_dashboard_padre(self):
+        hoy = date.today()
+        padre = self.padres[0]
+        self.crear_notas(self.periodos[:2])
+        for hijo in self.alumnos:
+            for dias in range(3):
+                Asistencia.objects.create(alumno=hijo, fecha=hoy - timedelta(days=dias), presente=dias != 0)
+                for materia in self.materias:
+                    Participacion.objects.create(alumno=hijo, materia=materia, fecha=hoy - timedelta(days=dias), valor=4)
+        cliente = self.cliente(padre.user)
+        cliente.get('/api/padre/dashboard/')  # Carga el catálogo de períodos del proceso
+
+        # Rol, períodos recientes con notas y los hijos con todas sus estadísticas
+        with self.assertNumQueries(3):
+            respuesta = cliente.get('/api/padre/dashboard/')
+        self.assertEqual(len(respuesta.data['hijos']), 1)
+
+        padre.hijos.add(*self.alumnos[1:])
+        with self.assertNumQueries(3):
+            respuesta = cliente.get('/api/padre/dashboard/')
+        self.assertEqual(len(respuesta.data['hijos']), self.ALUMNOS)
+        self.assertEqual(respuesta.data['periodo_actual'], self.periodos[1].codigo)
+        # Los conteos no se inflan por el JOIN entre notas, asistencias y participaciones
+        for hijo in respuesta.data['hijos']:
+            self.assertEqual(hijo['promedio_periodo'], 70)
+            self.assertEqual(hijo['dias_ausente_mes'], 1)
+            self.assertEqual(hijo['total_participaciones_mes'], 6)
+            self.assertEqual(hijo['promedio_participaciones'], 4)
+            self.assertAlmostEqual(hijo['porcentaje_asistencia'], 200 / 3)
+
+    def tomar_asistencia(self, alumnos, fecha):
+        return self.cliente(self.maestro.user).post('/api/asistencia/bulk/', {
+            'fecha': fecha,
+            'registros': [{'alumno': alumno.id, 'presente': True, 'observaciones': 'ok'} for alumno in alumnos],
+        }, format='json')
+
+    def test_asistencia_bulk(self):
+        # Rol, alumnos permitidos, registros posteriores y, en la transacción,
+        # el bulk_create y los resúmenes diarios (alta y bloqueo de los buckets,
+        # asistencias, participaciones y upsert)
+        with self.assertNumQueries(11):
+            self.assertEqual(self.tomar_asistencia(self.alumnos[:1], '2024-05-20').status_code, 200)
+        with self.assertNumQueries(11):
+            respuesta = self.tomar_asistencia(self.alumnos, '2024-05-21')
+        self.assertEqual(respuesta.data['guardados'], self.ALUMNOS)
+
+    def calentar_caches_qr(self):
+        # Datos de los alumnos e índice de geocercas quedan en memoria del proceso
+        for alumno in self.alumnos:
+            datos_qr_alumno(alumno.id)
+        indice_geocercas()
+
+    def escaneo(self, **extra):
+        return {'qr_token': 'tok-123', 'latitud': self.colegio.latitud, 'longitud': self.colegio.longitud, **extra}
+
+    def test_qr_asistencia(self):
+        cliente = self.cliente(self.alumnos[0].user)
+        self.calentar_caches_qr()
+        # Rol y, en la transacción, el UPDATE sin fila precreada, el alta y su resumen
+        with self.assertNumQueries(8):
+            respuesta = cliente.post('/api/asistencia/qr/', self.escaneo(), format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertTrue(Asistencia.objects.get(alumno=self.alumnos[0], fecha=timezone.localdate()).presente)
+
+    def sincronizar(self, alumno, cantidad):
+        ahora = timezone.now()
+        checkins = [
+            self.escaneo(clave=f'clave-{numero}', momento=(ahora - timedelta(seconds=numero)).isoformat())
+            for numero in range(cantidad)
+        ]
+        return self.cliente(alumno.user).post(
+            '/api/asistencia/qr/sincronizar/', {'checkins': checkins}, format='json'
+        )
+
+    def test_qr_sincronizar(self):
+        self.calentar_caches_qr()
+        # Rol, claves ya usadas y una sola transacción para toda la cola
+        with self.assertNumQueries(9):
+            self.assertEqual(self.sincronizar(self.alumnos[0], 1).data['recibidos'], 1)
+        with self.assertNumQueries(9):
+            respuesta = self.sincronizar(self.alumnos[1], 5)
+        self.assertEqual(respuesta.data['registrados'], 1)
+
+
+@override_settings(QR_ATTENDANCE_TIME_START='00:00', QR_ATTENDANCE_TIME_END='23:59', QR_TOKEN_ROTATIVO=False)
+class MomentoAsistenciaTests(DatosColegioMixin, TestCase):
+    """La hora de los dispositivos solo se acepta dentro de los márgenes configurados"""
+
+    def escaneo(self, momento):
+        return {
+            'qr_token': 'tok-123', 'latitud': self.colegio.latitud, 'longitud': self.colegio.longitud,
+            'momento': momento.isoformat(),
+        }
+
+    def test_qr_en_vivo_usa_la_hora_del_servidor(self):
+        cliente = self.cliente(self.alumnos[0].user)
+        for desfase in (timedelta(hours=-3), timedelta(minutes=5)):
+            with self.subTest(desfase=desfase):
+                respuesta = cliente.post('/api/asistencia/qr/', self.escaneo(timezone.now() + desfase), format='json')
+                self.assertEqual(respuesta.status_code, 400)
+        respuesta = cliente.post('/api/asistencia/qr/', self.escaneo(timezone.now() - timedelta(seconds=30)), format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertLess(timezone.now() - Asistencia.objects.get(alumno=self.alumnos[0]).registrado_en, timedelta(seconds=5))
+
+    @override_settings(QR_SINCRONIZACION_MAX_MINUTOS=15)
+    def test_sincronizar_rechaza_escaneos_viejos(self):
+        checkins = [
+            {**self.escaneo(timezone.now() - timedelta(hours=2)), 'clave': 'vieja'},
+            {**self.escaneo(timezone.now() - timedelta(minutes=5)), 'clave': 'reciente'},
+        ]
+        respuesta = self.cliente(self.alumnos[0].user).post(
+            '/api/asistencia/qr/sincronizar/', {'checkins': checkins}, format='json'
+        )
+        self.assertEqual([r['estado'] for r in respuesta.data['resultados']], [400, 201])
+
+    def test_registrado_en_lo_fija_el_servidor(self):
+        futuro = timezone.now() + timedelta(days=30)
+        respuesta = self.cliente(self.maestro.user).post('/api/asistencia/', {
+            'alumno': self.alumnos[0].id, 'fecha': '2024-05-20', 'presente': False,
+            'registrado_en': futuro.isoformat(),
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertLess(Asistencia.objects.get(id=respuesta.data['id']).registrado_en, futuro)
+
+
+@override_settings(QR_ATTENDANCE_TIME_START='00:00', QR_ATTENDANCE_TIME_END='23:59', QR_TOKEN_ROTATIVO=True)
+class RegistroUsosQRTests(DatosColegioMixin, TestCase):
+
+    def test_uso_del_codigo_se_recuerda_al_confirmar(self):
+        alumno, paso = self.alumnos[0], paso_actual()
+        registro_usos._usos.clear()
+        escaneo = {
+            'qr_token': generar_codigo(self.colegio.id, self.colegio.token_qr, paso),
+            'latitud': self.colegio.latitud, 'longitud': self.colegio.longitud,
+        }
+        with self.captureOnCommitCallbacks(execute=False):
+            respuesta = self.cliente(alumno.user).post('/api/asistencia/qr/', escaneo, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        # Sin commit (p. ej. la transacción falló) el código puede reintentarse
+        self.assertFalse(registro_usos.usado(alumno.id, paso))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cliente(alumno.user).post('/api/asistencia/qr/', escaneo, format='json')
+        self.assertTrue(registro_usos.usado(alumno.id, paso))
+
+
+class AsistenciaBulkTests(DatosColegioMixin, TestCase):
+
+    def test_campos_omitidos_no_se_borran(self):
+        primero, segundo = self.alumnos[:2]
+        cliente = self.cliente(self.maestro.user)
+        cliente.post('/api/asistencia/bulk/', {'fecha': '2024-05-20', 'registros': [
+            {'alumno': primero.id, 'presente': True, 'hora_llegada': '07:45', 'observaciones': 'Tarde'},
+            {'alumno': segundo.id, 'presente': True, 'hora_llegada': '07:30', 'observaciones': 'Justificada'},
+        ]}, format='json')
+        respuesta = cliente.post('/api/asistencia/bulk/', {'fecha': '2024-05-20', 'registros': [
+            {'alumno': primero.id, 'presente': False},
+            {'alumno': segundo.id, 'presente': True, 'hora_llegada': None},
+        ]}, format='json')
+        self.assertEqual(respuesta.data['guardados'], 2)
+
+        asistencias = {a.alumno_id: a for a in Asistencia.objects.filter(fecha=date(2024, 5, 20))}
+        self.assertFalse(asistencias[primero.id].presente)
+        self.assertEqual(str(asistencias[primero.id].hora_llegada), '07:45:00')
+        self.assertEqual(asistencias[primero.id].observaciones, 'Tarde')
+        self.assertIsNone(asistencias[segundo.id].hora_llegada)
+        self.assertEqual(asistencias[segundo.id].observaciones, 'Justificada')
+
+
+@skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'recorrido_completo solo lee planes de PostgreSQL y SQLite')
+class ExplicarConsultasTests(DatosColegioMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        hoy = date.today()
+        for alumno in cls.alumnos:
+            Asistencia.objects.create(alumno=alumno, fecha=hoy, presente=True)
+            for materia in cls.materias:
+                Nota.objects.create(alumno=alumno, materia=materia, periodo=cls.periodos[-1], valor=80)
+                Participacion.objects.create(alumno=alumno, materia=materia, fecha=hoy, valor=3)
+
+    def test_consultas_frecuentes_usan_indices(self):
+        if connection.vendor == 'postgresql':
+            # Con tablas chicas el planificador prefiere recorrerlas (ver el comando)
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for nombre, queryset in consultas_frecuentes():
+            with self.subTest(consulta=nombre):
+                plan = queryset.explain()
+                self.assertFalse(recorrido_completo(plan, queryset.model._meta.db_table), plan)
+
+    def test_comando_estricto(self):
+        salida = StringIO()
+        call_command('explicar_consultas', '--estricto', stdout=salida)
+        self.assertIn('Todas las consultas usan índices', salida.getvalue())
+
+    def test_comando_estricto_falla_sin_indice(self):
+        # Un plan que recorre core_asistencia (p. ej. tras perder un índice) hace fallar CI
+        def sin_indice_en_asistencia(plan, tabla):
+            return tabla == 'core_asistencia' or recorrido_completo(plan, tabla)
+
+        salida = StringIO()
+        with mock.patch('core.management.commands.explicar_consultas.recorrido_completo', sin_indice_en_asistencia):
+            with self.assertRaisesMessage(CommandError, 'asistencia.lista'):
+                call_command('explicar_consultas', '--estricto', stdout=salida)
+            call_command('explicar_consultas', stdout=salida)
+        self.assertIn('asistencia.lista: recorre core_asistencia sin índice', salida.getvalue())
+        self.assertNotIn('Todas las consultas usan índices', salida.getvalue())
+
+
+@override_settings(JWT_ROLE_CLAIMS=True)
+class ClaimsJWTTests(DatosColegioMixin, TestCase):
+    """Los claims del access token salen siempre de la base, también al refrescar"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.maestro.user
+        self.user.set_password('maestro123')
+        self.user.is_staff = True
+        self.user.save()
+
+    def login(self):
+        respuesta = APIClient().post('/api/auth/login/', {'username': 'maestro1', 'password': 'maestro123'})
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def refrescar(self, refresh):
+        respuesta = APIClient().post('/api/auth/refresh/', {'refresh': refresh})
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def listar_padres(self, access):
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return cliente.get('/api/padres/')
+
+    def test_claims_en_el_login(self):
+        tokens = self.login()
+        access = AccessToken(tokens['access'])
+        self.assertEqual(access['username'], 'maestro1')
+        self.assertTrue(access['is_staff'])
+        self.assertFalse(access['is_superuser'])
+        self.assertEqual(access[CLAIM_ROL]['maestro_id'], self.maestro.id)
+        self.assertEqual(access[CLAIM_ROL]['cursos_tutor'], [self.curso.id])
+        # El refresh token no lleva nada que pueda quedar desactualizado
+        refresh = RolRefreshToken(tokens['refresh'])
+        for claim in ('username', 'is_staff', 'is_superuser', CLAIM_ROL):
+            self.assertNotIn(claim, refresh.payload)
+
+    def test_refresh_recalcula_los_claims(self):
+        tokens = self.refrescar(self.login()['refresh'])
+        access = AccessToken(tokens['access'])
+        self.assertTrue(access['is_staff'])
+        self.assertEqual(access[CLAIM_ROL]['cursos_tutor'], [self.curso.id])
+        self.assertNotIn('is_staff', RolRefreshToken(tokens['refresh']).payload)
+
+    def test_degradacion_y_cambio_de_rol(self):
+        tokens = self.login()
+        self.assertEqual(self.listar_padres(tokens['access']).status_code, 200)
+
+        User.objects.filter(id=self.user.id).update(is_staff=False, username='ex-maestro')
+        Curso.objects.filter(id=self.curso.id).update(tutor=None)
+        tokens = self.refrescar(tokens['refresh'])
+        access = AccessToken(tokens['access'])
+        self.assertFalse(access['is_staff'])
+        self.assertEqual(access['username'], 'ex-maestro')
+        self.assertEqual(access[CLAIM_ROL]['cursos_tutor'], [])
+        self.assertEqual(self.listar_padres(tokens['access']).status_code, 403)
+
+        # Tampoco sobrevive a una segunda rotación
+        tokens = self.refrescar(tokens['refresh'])
+        self.assertFalse(AccessToken(tokens['access'])['is_staff'])
+
+
+class ResumenesTests(DatosColegioMixin, TestCase):
+    """Los resúmenes incrementales coinciden con una reconstrucción desde cero"""
+
+    def resumenes(self):
+        periodo = {
+            (r.alumno_id, r.periodo_id): (round(r.suma_notas, 6), r.num_notas)
+            for r in ResumenPeriodoAlumno.objects.filter(num_notas__gt=0)
+        }
+        diario = {
+            (r.alumno_id, r.fecha): (r.presente, round(r.suma_participaciones, 6), r.num_participaciones)
+            for r in ResumenDiarioAlumno.objects.filter(Q(presente__isnull=False) | Q(num_participaciones__gt=0))
+        }
+        return periodo, diario
+
+    def assertCoincideConReconstruccion(self):
+        incremental = self.resumenes()
+        reconstruir_resumenes()
+        self.assertEqual(incremental, self.resumenes())
+
+    def test_notas(self):
+        alumno, (matematicas, lenguaje) = self.alumnos[0], self.materias
+        primero, segundo = self.periodos[:2]
+        nota = Nota.objects.create(alumno=alumno, materia=matematicas, periodo=primero, valor=60)
+        Nota.objects.create(alumno=alumno, materia=lenguaje, periodo=primero, valor=80)
+        self.assertCoincideConReconstruccion()
+
+        nota.valor = 90
+        nota.save()
+        self.assertCoincideConReconstruccion()
+        self.assertEqual(ResumenPeriodoAlumno.objects.get(alumno=alumno, periodo=primero).promedio, 85)
+
+        # Cambiar de período recalcula el bucket de origen y el de destino
+        nota.periodo = segundo
+        nota.save()
+        self.assertCoincideConReconstruccion()
+
+        nota.delete()
+        self.assertCoincideConReconstruccion()
+
+    def test_asistencias_y_participaciones_del_mismo_dia(self):
+        alumno, materia, dia = self.alumnos[0], self.materias[0], date(2024, 5, 20)
+        asistencia = Asistencia.objects.create(alumno=alumno, fecha=dia, presente=True)
+        participacion = Participacion.objects.create(alumno=alumno, materia=materia, fecha=dia, valor=4)
+        Participacion.objects.create(alumno=alumno, materia=materia, fecha=dia, valor=2)
+        self.assertCoincideConReconstruccion()
+        self.assertEqual(
+            ResumenDiarioAlumno.objects.filter(alumno=alumno, fecha=dia)
+            .values_list('presente', 'num_participaciones', 'suma_participaciones').get(),
+            (True, 2, 6)
+        )
+
+        asistencia.presente = False
+        asistencia.save()
+        participacion.valor = 5
+        participacion.save()
+        self.assertCoincideConReconstruccion()
+
+        participacion.fecha = dia + timedelta(days=1)
+        participacion.save()
+        self.assertCoincideConReconstruccion()
+
+        asistencia.delete()
+        participacion.delete()
+        self.assertCoincideConReconstruccion()
+
+    def test_borrado_en_cascada(self):
+        alumno, materia, dia = self.alumnos[0], self.materias[0], date(2024, 5, 20)
+        for otro in self.alumnos[:2]:
+            Nota.objects.create(alumno=otro, materia=materia, periodo=self.periodos[0], valor=70)
+            Asistencia.objects.create(alumno=otro, fecha=dia, presente=True)
+            Participacion.objects.create(alumno=otro, materia=materia, fecha=dia, valor=3)
+        materia.delete()
+        self.assertCoincideConReconstruccion()
+        alumno.delete()
+        self.assertCoincideConReconstruccion()
+
+
+class MigracionPeriodosTests(TransactionTestCase):
+    """0011 crea un Periodo por código sin inventar sus fechas"""
+    antes = [('core', '0010_periodo')]
+    despues = [('core', '0011_poblar_periodos')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes('core'))
+
+    def test_crear_periodos(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.antes)
+        apps = executor.loader.project_state(self.antes).apps
+        user = apps.get_model('auth', 'User').objects.create(username='alumno1')
+        colegio = apps.get_model('core', 'Colegio').objects.create(
+            nombre='Colegio', direccion='-', latitud=-16.5, longitud=-68.1193
+        )
+        curso = apps.get_model('core', 'Curso').objects.create(nombre='1ro A', nivel='Primaria', seccion='A', colegio=colegio)
+        alumno = apps.get_model('core', 'Alumno').objects.create(user=user, curso=curso)
+        Nota = apps.get_model('core', 'Nota')
+        for numero, codigo in enumerate(['2024-T1', '2024-T1', '2024-T2', '2024-S1', 'Final']):
+            materia = apps.get_model('core', 'Materia').objects.create(nombre=f'Materia {numero}', curso=curso)
+            Nota.objects.create(alumno=alumno, materia=materia, periodo=codigo, valor=70)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.despues)
+        apps = executor.loader.project_state(self.despues).apps
+        periodos = {
+            p.codigo: (p.anio, p.ordinal, p.inicio, p.fin)
+            for p in apps.get_model('core', 'Periodo').objects.all()
+        }
+        anio_actual = timezone.now().year
+        self.assertEqual(periodos, {
+            '2024-T1': (2024, 1, None, None),
+            '2024-T2': (2024, 2, None, None),
+            # Mismo (anio, ordinal) que 2024-T1 con menos notas: pasa al final del año
+            '2024-S1': (2024, 3, None, None),
+            'Final': (anio_actual, 1, None, None),
+        })
+        self.assertFalse(apps.get_model('core', 'Nota').objects.filter(periodo_ref=None).exists())
+
+
+class CatalogoPeriodosTests(DatosColegioMixin, TestCase):
+
+    @override_settings(PERIODOS_AUSENTES_MAX=3)
+    def test_codigos_ausentes_acotados(self):
+        for numero in range(10):
+            self.assertIsNone(periodo_por_codigo(f'no-existe-{numero}'))
+        self.assertEqual(list(catalogo().ausentes), ['no-existe-7', 'no-existe-8', 'no-existe-9'])
+        # Un código reciente no vuelve a consultar la base; uno olvidado, sí
+        with self.assertNumQueries(0):
+            periodo_por_codigo('no-existe-9')
+        with self.assertNumQueries(1):
+            periodo_por_codigo('no-existe-0')
+        # Uno más largo que el campo no puede existir: ni consulta ni ocupa lugar
+        with self.assertNumQueries(0):
+            self.assertIsNone(periodo_por_codigo('x' * 51))
+        self.assertNotIn('x' * 51, catalogo().ausentes)
+
+    def test_periodo_creado_despues(self):
+        self.assertIsNone(periodo_por_codigo('2024-T4'))
+        Periodo.objects.create(codigo='2024-T4', anio=2024, ordinal=4)
+        # La señal invalida el catálogo y con él los ausentes
+        self.assertEqual(periodo_por_codigo('2024-T4').ordinal, 4)
+
+    def test_detalle_hijo_sin_fechas_usa_los_ultimos_dias(self):
+        hijo, hoy = self.alumnos[0], timezone.localdate()
+        periodo = Periodo.objects.create(codigo='2024-T4', anio=2024, ordinal=4)
+        Nota.objects.create(alumno=hijo, materia=self.materias[0], periodo=periodo, valor=80)
+        Asistencia.objects.create(alumno=hijo, fecha=hoy - timedelta(days=10), presente=True)
+        Asistencia.objects.create(alumno=hijo, fecha=hoy - timedelta(days=100), presente=True)
+
+        respuesta = self.cliente(self.padres[0].user).get(f'/api/padre/hijo/{hijo.id}/', {'periodo': '2024-T4'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([a['fecha'] for a in respuesta.data['asistencias']], [str(hoy - timedelta(days=10))])
+
+
+class NotaBulkTests(DatosColegioMixin, TestCase):
+
+    def cargar(self, user, notas, periodo='2024-T1'):
+        return self.cliente(user).post('/api/notas/bulk/', {'periodo': periodo, 'notas': notas}, format='json')
+
+    def celdas(self, valor=80, **extra):
+        return [
+            {'alumno': alumno.id, 'materia': materia.id, 'valor': valor, **extra}
+            for alumno in self.alumnos for materia in self.materias
+        ]
+
+    def test_lote_valido_y_resumenes(self):
+        respuesta = self.cargar(self.maestro.user, self.celdas(observaciones='Primera carga'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['guardadas'], self.ALUMNOS * 2)
+        self.assertEqual(set(respuesta.data['estados']), {'ok'})
+
+        # Volver a cargar actualiza por (alumno, materia, periodo) sin borrar observaciones
+        celdas = self.celdas()
+        celdas[0]['valor'] = 40
+        self.assertEqual(self.cargar(self.maestro.user, celdas).status_code, 200)
+        self.assertEqual(Nota.objects.count(), self.ALUMNOS * 2)
+        self.assertEqual(set(Nota.objects.values_list('observaciones', flat=True)), {'Primera carga'})
+
+        resumen = ResumenPeriodoAlumno.objects.get(alumno=self.alumnos[0], periodo=self.periodos[0])
+        self.assertEqual((resumen.num_notas, resumen.promedio), (2, 60))
+        self.assertEqual(ResumenPeriodoAlumno.objects.filter(num_notas=2).count(), self.ALUMNOS)
+
+    def test_una_celda_invalida_rechaza_el_lote(self):
+        otro_curso = Curso.objects.create(nombre='2do A', nivel='Primaria', seccion='A', colegio=self.colegio)
+        ajeno = Alumno.objects.create(user=User.objects.create_user('alumno99'), curso=otro_curso)
+        casos = {
+            'invalida': {'alumno': self.alumnos[0].id, 'valor': 50},
+            'fuera_de_rango': {'alumno': self.alumnos[0].id, 'materia': self.materias[0].id, 'valor': 101},
+            'repetida': self.celdas()[0],
+            'alumno_no_pertenece': {'alumno': ajeno.id, 'materia': self.materias[0].id, 'valor': 50},
+        }
+        for estado, celda in casos.items():
+            with self.subTest(estado=estado):
+                respuesta = self.cargar(self.maestro.user, self.celdas() + [celda])
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.data['guardadas'], 0)
+                self.assertEqual(respuesta.data['estados'][-1], estado)
+                self.assertFalse(Nota.objects.exists())
+                self.assertFalse(ResumenPeriodoAlumno.objects.filter(num_notas__gt=0).exists())
+
+    def test_permisos(self):
+        for user in (self.alumnos[0].user, self.padres[0].user):
+            with self.subTest(user=user.username):
+                self.assertEqual(self.cargar(user, self.celdas()).status_code, 403)
+
+        # Un tutor de otro curso no puede cargar notas de materias ajenas
+        otro = Maestro.objects.create(user=User.objects.create_user('maestro2'))
+        Curso.objects.create(nombre='2do A', nivel='Primaria', seccion='A', colegio=self.colegio, tutor=otro)
+        respuesta = self.cargar(otro.user, self.celdas())
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(set(respuesta.data['estados']), {'sin_permiso'})
+        self.assertFalse(Nota.objects.exists())
+
+        admin = User.objects.create_superuser('admin')
+        self.assertEqual(self.cargar(admin, self.celdas()).status_code, 200)
+
+
+class GradebookTests(DatosColegioMixin, TestCase):
+
+    def url(self, periodo='2024-T1', curso=None):
+        return f'/api/cursos/{(curso or self.curso).id}/gradebook/{periodo}/'
+
+    def test_matriz(self):
+        primero, segundo = self.alumnos[:2]
+        matematicas, lenguaje = self.materias
+        primero.user.last_name, segundo.user.last_name = 'Zapata', 'Arce'
+        primero.user.save()
+        segundo.user.save()
+        Nota.objects.create(alumno=primero, materia=matematicas, periodo=self.periodos[0], valor=60)
+        Nota.objects.create(alumno=primero, materia=lenguaje, periodo=self.periodos[0], valor=81)
+        Nota.objects.create(alumno=segundo, materia=matematicas, periodo=self.periodos[0], valor=90)
+        Nota.objects.create(alumno=segundo, materia=lenguaje, periodo=self.periodos[1], valor=10)
+
+        datos = self.cliente(self.maestro.user).get(self.url()).data
+        # Filas por apellido (vacíos primero) y columnas por nombre de materia
+        self.assertEqual(datos['filas'][-2:], [segundo.id, primero.id])
+        self.assertEqual(datos['columnas'], [lenguaje.id, matematicas.id])
+        self.assertEqual(datos['nombres_columnas'], ['Lenguaje', 'Matemáticas'])
+        self.assertEqual(len(datos['valores']), len(datos['filas']) * len(datos['columnas']))
+        self.assertEqual(datos['valores'][-4:], [None, 90.0, 81.0, 60.0])
+        self.assertEqual(datos['promedios_filas'], [None] * (self.ALUMNOS - 2) + [90.0, 70.5])
+        self.assertEqual(datos['promedios_columnas'], [81.0, 75.0])
+
+    def test_permisos(self):
+        otro = Maestro.objects.create(user=User.objects.create_user('maestro2'))
+        for user in (otro.user, self.alumnos[0].user, self.padres[0].user):
+            with self.subTest(user=user.username):
+                self.assertEqual(self.cliente(user).get(self.url()).status_code, 403)
+        admin = User.objects.create_superuser('admin')
+        self.assertEqual(self.cliente(admin).get(self.url()).status_code, 200)
+        self.assertEqual(self.cliente(self.maestro.user).get(self.url('2099-T9')).status_code, 404)
+
+
+class AsistenciaDiariaTests(DatosColegioMixin, TestCase):
+    """precrear_asistencias y cerrar_asistencia"""
+    LUNES, SABADO = date(2024, 5, 20), date(2024, 5, 18)
+
+    def comando(self, nombre, *args):
+        salida = StringIO()
+        call_command(nombre, *args, stdout=salida)
+        return salida.getvalue()
+
+    def presencias(self, fecha):
+        return dict(Asistencia.objects.filter(fecha=fecha).values_list('alumno_id', 'presente'))
+
+    def a_las(self, hora, minuto):
+        return timezone.make_aware(datetime.combine(self.LUNES, time(hora, minuto)))
+
+    def test_precrear_es_idempotente(self):
+        inactivo = self.alumnos[-1].user
+        inactivo.is_active = False
+        inactivo.save()
+
+        self.assertIn(f'{self.ALUMNOS - 1}', self.comando('precrear_asistencias', '--fecha', '2024-05-20'))
+        self.assertIn(': 0', self.comando('precrear_asistencias', '--fecha', '2024-05-20'))
+        self.assertEqual(self.presencias(self.LUNES), {alumno.id: False for alumno in self.alumnos[:-1]})
+        self.assertEqual(
+            ResumenDiarioAlumno.objects.filter(fecha=self.LUNES, presente=False).count(), self.ALUMNOS - 1
+        )
+
+    def test_precrear_no_pisa_registros(self):
+        Asistencia.objects.create(alumno=self.alumnos[0], fecha=self.LUNES, presente=True)
+        self.comando('precrear_asistencias', '--fecha', '2024-05-20')
+        self.assertTrue(self.presencias(self.LUNES)[self.alumnos[0].id])
+
+    def test_dias_no_lectivos(self):
+        self.assertIn('no es día lectivo', self.comando('precrear_asistencias', '--fecha', '2024-05-18'))
+        self.assertIn('no es día lectivo', self.comando('cerrar_asistencia', '--fecha', '2024-05-18'))
+        self.assertFalse(Asistencia.objects.exists())
+
+        self.comando('precrear_asistencias', '--fecha', '2024-05-18', '--forzar')
+        self.assertEqual(len(self.presencias(self.SABADO)), self.ALUMNOS)
+
+    def test_cerrar_con_la_ventana_abierta(self):
+        with mock.patch.object(timezone, 'localtime', return_value=self.a_las(8, 0)):
+            with self.assertRaises(CommandError):
+                self.comando('cerrar_asistencia')
+            self.assertFalse(Asistencia.objects.exists())
+
+            self.comando('cerrar_asistencia', '--forzar')
+        self.assertEqual(len(self.presencias(self.LUNES)), self.ALUMNOS)
+
+    def test_cerrar_marca_ausentes_y_es_idempotente(self):
+        Asistencia.objects.create(alumno=self.alumnos[0], fecha=self.LUNES, presente=True)
+        with mock.patch.object(timezone, 'localtime', return_value=self.a_las(9, 0)):
+            salida = self.comando('cerrar_asistencia')
+            self.assertIn(f'{self.ALUMNOS - 1} ausencias registradas', salida)
+            self.assertIn(f'1ro A: 1 presentes, {self.ALUMNOS - 1} ausentes', salida)
+            self.assertIn('0 ausencias registradas', self.comando('cerrar_asistencia'))
+
+        presencias = self.presencias(self.LUNES)
+        self.assertEqual(sum(presencias.values()), 1)
+        self.assertEqual(len(presencias), self.ALUMNOS)
+        self.assertEqual(
+            dict(ResumenDiarioAlumno.objects.filter(fecha=self.LUNES).values_list('alumno_id', 'presente')),
+            presencias
+        )
+
+
+@override_settings(QR_ATTENDANCE_TIME_START='00:00', QR_ATTENDANCE_TIME_END='23:59', QR_TOKEN_ROTATIVO=False)
+class AusenciaPrecreadaQRTests(DatosColegioMixin, TestCase):
+    """El QR convierte la ausencia precreada en presencia"""
+
+    def escanear(self, alumno):
+        return self.cliente(alumno.user).post('/api/asistencia/qr/', {
+            'qr_token': 'tok-123', 'latitud': self.colegio.latitud, 'longitud': self.colegio.longitud,
+        }, format='json')
+
+    def resumen(self, alumno, fecha):
+        return ResumenDiarioAlumno.objects.get(alumno=alumno, fecha=fecha).presente
+
+    def test_escaneo_sobre_ausencia_precreada(self):
+        hoy = timezone.localdate()
+        crear_ausencias(hoy, alumnos_activos())
+        alumno = self.alumnos[0]
+        self.assertIs(self.resumen(alumno, hoy), False)
+
+        self.assertEqual(self.escanear(alumno).status_code, 201)
+        asistencia = Asistencia.objects.get(alumno=alumno, fecha=hoy)
+        self.assertTrue(asistencia.presente and asistencia.registrado_por_qr)
+        self.assertIsNotNone(asistencia.registrado_en)
+        self.assertIs(self.resumen(alumno, hoy), True)
+        # El resto del curso sigue ausente
+        self.assertIs(self.resumen(self.alumnos[1], hoy), False)
+
+        self.assertEqual(self.escanear(alumno).status_code, 200)
+        self.assertEqual(Asistencia.objects.filter(alumno=alumno, fecha=hoy).count(), 1)
+
+    def test_ausencia_precreada_sin_resumen(self):
+        hoy, alumno = timezone.localdate(), self.alumnos[0]
+        crear_ausencias(hoy, alumnos_activos())
+        ResumenDiarioAlumno.objects.filter(alumno=alumno).delete()
+        self.assertEqual(self.escanear(alumno).status_code, 201)
+        self.assertIs(self.resumen(alumno, hoy), True)
+
+    def test_marcar_presentes_respeta_registros_posteriores(self):
+        hoy, (primero, segundo) = timezone.localdate(), self.alumnos[:2]
+        crear_ausencias(hoy, alumnos_activos())
+        ahora = timezone.now()
+        # El tutor tomó la asistencia del segundo después del escaneo sin conexión
+        Asistencia.objects.filter(alumno=segundo, fecha=hoy).update(registrado_en=ahora)
+
+        with transaction.atomic():
+            marcados = marcar_presentes({hoy: {primero.id: ahora - timedelta(minutes=5),
+                                               segundo.id: ahora - timedelta(minutes=5)}})
+        self.assertEqual(marcados, {hoy: [primero.id]})
+        self.assertIs(self.resumen(primero, hoy), True)
+        self.assertIs(self.resumen(segundo, hoy), False)
+
+
+@override_settings(QR_ATTENDANCE_TIME_START='00:00', QR_ATTENDANCE_TIME_END='23:59', QR_TOKEN_ROTATIVO=False,
+                   QR_ASISTENCIA_DIFERIDA=True)
+class CheckinsDiferidosTests(DatosColegioMixin, TestCase):
+    """Cola de QR_ASISTENCIA_DIFERIDA y su worker"""
+
+    def encolar(self, alumno, fecha, minutos=0):
+        return CheckinPendiente.objects.create(
+            alumno=alumno, fecha=fecha, recibido=timezone.now() - timedelta(minutes=minutos)
+        )
+
+    def test_escaneo_se_encola(self):
+        respuesta = self.cliente(self.alumnos[0].user).post('/api/asistencia/qr/', {
+            'qr_token': 'tok-123', 'latitud': self.colegio.latitud, 'longitud': self.colegio.longitud,
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 202)
+        self.assertEqual(CheckinPendiente.objects.get().alumno_id, self.alumnos[0].id)
+        self.assertFalse(Asistencia.objects.exists())
+
+        salida = StringIO()
+        call_command('procesar_checkins', stdout=salida)
+        self.assertIn('Cola vacía: 1 check-ins, 1 asistencias marcadas', salida.getvalue())
+        self.assertFalse(CheckinPendiente.objects.exists())
+        hoy = timezone.localdate()
+        self.assertTrue(Asistencia.objects.get(alumno=self.alumnos[0], fecha=hoy).registrado_por_qr)
+        self.assertIs(ResumenDiarioAlumno.objects.get(alumno=self.alumnos[0], fecha=hoy).presente, True)
+
+    def test_lotes_parciales(self):
+        for alumno in self.alumnos:
+            self.encolar(alumno, date(2024, 5, 20))
+        self.encolar(self.alumnos[0], date(2024, 5, 21))
+
+        self.assertEqual(volcar_checkins(lote=2), (2, 2))
+        self.assertEqual(CheckinPendiente.objects.count(), self.ALUMNOS - 1)
+        self.assertEqual(volcar_checkins(lote=2), (2, 2))
+        self.assertEqual(volcar_checkins(lote=2), (1, 1))
+        self.assertEqual(volcar_checkins(lote=2), (0, 0))
+        self.assertEqual(Asistencia.objects.filter(presente=True).count(), self.ALUMNOS + 1)
+
+    def test_comando_vacia_la_cola_en_varios_lotes(self):
+        for alumno in self.alumnos:
+            self.encolar(alumno, date(2024, 5, 20))
+        salida = StringIO()
+        call_command('procesar_checkins', '--lote', '3', stdout=salida)
+        self.assertIn(f'Cola vacía: {self.ALUMNOS} check-ins', salida.getvalue())
+        self.assertFalse(CheckinPendiente.objects.exists())
+
+    def test_escaneos_repetidos(self):
+        primero, segundo = self.alumnos[:2]
+        dia = date(2024, 5, 20)
+        inicial = self.encolar(primero, dia, minutos=10)
+        self.encolar(primero, dia, minutos=5)
+        # Quien ya estaba presente consume su check-in sin cambiar
+        Asistencia.objects.create(alumno=segundo, fecha=dia, presente=True, observaciones='Tutor')
+        self.encolar(segundo, dia)
+
+        self.assertEqual(volcar_checkins(), (3, 1))
+        self.assertFalse(CheckinPendiente.objects.exists())
+        asistencia = Asistencia.objects.get(alumno=primero, fecha=dia)
+        self.assertEqual(asistencia.registrado_en, inicial.recibido)
+        self.assertFalse(Asistencia.objects.get(alumno=segundo, fecha=dia).registrado_por_qr)
+
+
+class RolesTests(DatosColegioMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.otro_curso = Curso.objects.create(nombre='2do A', nivel='Primaria', seccion='A', colegio=cls.colegio)
+        cls.ajeno = Alumno.objects.create(user=User.objects.create_user('alumno99'), curso=cls.otro_curso)
+        # Un padre con dos hijos en cursos distintos
+        cls.padres[0].hijos.add(cls.ajeno)
+        for alumno in cls.alumnos + [cls.ajeno]:
+            Asistencia.objects.create(alumno=alumno, fecha=date(2024, 5, 20), presente=True)
+
+    def test_maestro(self):
+        with self.assertNumQueries(1):
+            rol = resolver_rol(self.maestro.user)
+        self.assertEqual((rol.role, rol.role_id), ('maestro', self.maestro.id))
+        self.assertEqual(rol.cursos_tutor, [self.curso.id])
+        self.assertTrue(rol.es_tutor and rol.es_tutor_de(self.curso.id))
+        self.assertFalse(rol.es_tutor_de(self.otro_curso.id))
+
+        no_tutor = Maestro.objects.create(user=User.objects.create_user('maestro2'))
+        rol = resolver_rol(no_tutor.user)
+        self.assertEqual((rol.role, rol.cursos_tutor, rol.es_tutor), ('maestro', [], False))
+
+    def test_alumno(self):
+        alumno = self.alumnos[0]
+        rol = resolver_rol(alumno.user)
+        self.assertEqual((rol.role, rol.role_id, rol.curso_id), ('alumno', alumno.id, self.curso.id))
+        self.assertFalse(rol.es_maestro or rol.es_padre)
+
+    def test_padre(self):
+        rol = resolver_rol(self.padres[0].user)
+        self.assertEqual((rol.role, rol.role_id), ('padre', self.padres[0].id))
+        self.assertEqual(rol.hijos, sorted([self.alumnos[0].id, self.ajeno.id]))
+        self.assertEqual(rol.cursos_hijos, sorted([self.curso.id, self.otro_curso.id]))
+        self.assertTrue(rol.es_padre_de(self.ajeno.id))
+        self.assertFalse(rol.es_padre_de(self.alumnos[1].id))
+
+    def test_superusuario_y_sin_rol(self):
+        admin = resolver_rol(User.objects.create_superuser('admin'))
+        self.assertEqual((admin.role, admin.role_id, admin.is_superuser), ('admin', None, True))
+        nadie = resolver_rol(User.objects.create_user('nadie'))
+        self.assertEqual((nadie.role, nadie.role_id, nadie.is_superuser), ('unknown', None, False))
+        # Ni el usuario anónimo ni un id inexistente consultan la base o fallan
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver_rol(None).role, 'unknown')
+        self.assertEqual(resolver_rol_por_id(0).role, 'unknown')
+
+    def test_claims_ida_y_vuelta(self):
+        rol = resolver_rol(self.padres[0].user)
+        copia = RolUsuario.from_claims(rol.user_id, rol.is_superuser, rol.as_claims())
+        self.assertEqual((copia.role, copia.hijos, copia.cursos_hijos), (rol.role, rol.hijos, rol.cursos_hijos))
+
+    def test_get_rol_se_resuelve_una_vez_por_peticion(self):
+        peticion = mock.Mock(spec=['user'], user=self.maestro.user)
+        with self.assertNumQueries(1):
+            rol = get_rol(peticion)
+            self.assertIs(get_rol(peticion), rol)
+        # Otro usuario en el mismo objeto (p. ej. force_authenticate) vuelve a resolver
+        peticion.user = self.alumnos[0].user
+        with self.assertNumQueries(1):
+            self.assertEqual(get_rol(peticion).role, 'alumno')
+
+    def test_filtrar_por_alumno(self):
+        asistencias = Asistencia.objects.all()
+
+        def alumnos_visibles(user, **kwargs):
+            filtradas = filtrar_por_alumno(asistencias, resolver_rol(user), **kwargs)
+            return set(filtradas.values_list('alumno_id', flat=True))
+
+        todos = {a.id for a in self.alumnos} | {self.ajeno.id}
+        self.assertEqual(alumnos_visibles(User.objects.create_superuser('admin')), todos)
+        self.assertEqual(alumnos_visibles(self.maestro.user), {a.id for a in self.alumnos})
+        self.assertEqual(alumnos_visibles(self.alumnos[1].user), {self.alumnos[1].id})
+        self.assertEqual(alumnos_visibles(self.padres[0].user), {self.alumnos[0].id, self.ajeno.id})
+        self.assertEqual(alumnos_visibles(User.objects.create_user('nadie')), set())
+
+        # campo_curso filtra por el curso guardado en la propia fila
+        Eliminacion.objects.create(modelo='asistencia', objeto_id=1, curso_id=self.curso.id, alumno_id=self.ajeno.id)
+        marcas = filtrar_por_alumno(Eliminacion.objects.all(), resolver_rol(self.maestro.user), campo_curso='curso_id')
+        self.assertEqual(marcas.count(), 1)
+
+
+class CalculosMemoizadosTests(DatosColegioMixin, TestCase):
+    """Los bloques que comparten varios campos se calculan una vez por objeto"""
+
+    def espiar(self, serializer, metodo):
+        original = getattr(serializer, metodo)
+        return mock.patch.object(serializer, metodo, autospec=True, side_effect=original)
+
+    def test_detalle_hijo(self):
+        hijo, hoy = self.alumnos[0], date.today()
+        for materia, valor in zip(self.materias, (60, 90)):
+            Nota.objects.create(alumno=hijo, materia=materia, periodo=self.periodos[0], valor=valor)
+        Asistencia.objects.create(alumno=hijo, fecha=hoy, presente=True)
+        cliente = self.cliente(self.padres[0].user)
+        url = f'/api/padre/hijo/{hijo.id}/'
+
+        with self.espiar(DetalleHijoSerializer, '_calcular_estadisticas_periodo') as estadisticas, \
+                self.espiar(DetalleHijoSerializer, '_calcular_analisis_rendimiento') as analisis:
+            respuesta = cliente.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(estadisticas.call_count, 1)
+        self.assertEqual(analisis.call_count, 1)
+        # El resultado es el mismo que sin memoizar
+        self.assertEqual(respuesta.data['estadisticas_periodo']['promedio_general'], 75)
+        self.assertTrue(respuesta.data['recomendaciones'])
+
+    def test_dashboard_padre_por_hijo(self):
+        padre = self.padres[0]
+        padre.hijos.add(self.alumnos[1])
+        Nota.objects.create(alumno=self.alumnos[0], materia=self.materias[0], periodo=self.periodos[0], valor=95)
+        Nota.objects.create(alumno=self.alumnos[1], materia=self.materias[0], periodo=self.periodos[0], valor=40)
+
+        with self.espiar(HijoDashboardSerializer, '_calcular_tendencia_academica') as tendencia:
+            respuesta = self.cliente(padre.user).get('/api/padre/dashboard/')
+        # Una vez por hijo: el cache no se comparte entre objetos
+        self.assertEqual(tendencia.call_count, 2)
+        estados = {h['id']: h['estado_academico'] for h in respuesta.data['hijos']}
+        self.assertNotEqual(estados[self.alumnos[0].id], estados[self.alumnos[1].id])
+
+    def test_fuera_de_to_representation_no_guarda_nada(self):
+        serializer = HijoDashboardSerializer()
+        calcular = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(serializer.memoizar('bloque', calcular, object()), 1)
+        self.assertEqual(serializer.memoizar('bloque', calcular, object()), 2)
+
+
+@override_settings(MAESTRO_DASHBOARD_PARTICIPACIONES_DIAS=30)
+class MaestroDashboardTests(DatosColegioMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        hoy = timezone.now().date()
+        for alumno in cls.alumnos:
+            for dias in (1, 29, 31, 400):
+                Participacion.objects.create(
+                    alumno=alumno, materia=cls.materias[0], fecha=hoy - timedelta(days=dias), valor=3
+                )
+            Nota.objects.create(alumno=alumno, materia=cls.materias[0], periodo=cls.periodos[0], valor=60)
+            Nota.objects.create(alumno=alumno, materia=cls.materias[0], periodo=cls.periodos[1], valor=80)
+
+    def dashboard(self, **params):
+        return self.cliente(self.maestro.user).get('/api/maestro/dashboard/', params)
+
+    def test_participaciones_acotadas(self):
+        datos = self.dashboard().data
+        self.assertEqual(datos['participaciones_desde'], str(timezone.now().date() - timedelta(days=30)))
+        self.assertNotIn('paginacion', datos)
+        self.assertEqual(len(datos['alumnos']), self.ALUMNOS)
+        for alumno in datos['alumnos']:
+            self.assertEqual(
+                [p['fecha'] for p in alumno['participaciones']],
+                [str(timezone.now().date() - timedelta(days=dias)) for dias in (1, 29)]
+            )
+            # Solo las notas del período más reciente
+            self.assertEqual([n['valor'] for n in alumno['notas']], [80])
+
+    def test_periodo_elegido(self):
+        datos = self.dashboard(periodo=self.periodos[0].codigo).data
+        self.assertEqual({n['valor'] for a in datos['alumnos'] for n in a['notas']}, {60})
+
+    def test_paginacion_opcional(self):
+        datos = self.dashboard(page_size=3).data
+        self.assertEqual([a['id'] for a in datos['alumnos']], [a.id for a in self.alumnos[:3]])
+        self.assertEqual((datos['paginacion']['count'], datos['paginacion']['num_pages']), (self.ALUMNOS, 2))
+        segunda = self.dashboard(page_size=3, page=2).data
+        self.assertEqual([a['id'] for a in segunda['alumnos']], [self.alumnos[3].id])
+        self.assertEqual(len(segunda['alumnos'][0]['participaciones']), 2)
+        self.assertEqual(self.dashboard(page_size=3, page=5).status_code, 404)
+
+
+@override_settings(PREDICCION_MODELO_PATH='')
+class PrediccionCursoTests(DatosColegioMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        primero, segundo = cls.periodos[:2]
+        antes = segundo.inicio - timedelta(days=5)
+        for numero, alumno in enumerate(cls.alumnos):
+            for materia in cls.materias:
+                Nota.objects.create(alumno=alumno, materia=materia, periodo=primero, valor=50 + 10 * numero)
+            Asistencia.objects.create(alumno=alumno, fecha=antes, presente=numero % 2 == 0)
+            Participacion.objects.create(alumno=alumno, materia=cls.materias[0], fecha=antes, valor=numero + 1)
+
+    def url(self, periodo=None):
+        return f'/api/prediccion/curso/{self.curso.id}/{periodo or self.periodos[1].codigo}/'
+
+    def test_coincide_con_la_prediccion_individual(self):
+        cliente = self.cliente(self.maestro.user)
+        datos = cliente.get(self.url()).data
+        self.assertEqual(len(datos['alumnos']), self.ALUMNOS)
+        numericas = [p['prediccion_numerica'] for p in datos['alumnos']]
+        self.assertEqual(numericas, sorted(numericas))
+        for prediccion in datos['alumnos']:
+            individual = cliente.get(f"/api/prediccion/{prediccion['alumno_id']}/{self.periodos[1].codigo}/").data
+            with self.subTest(alumno=prediccion['alumno_id']):
+                for campo, valor in individual.items():
+                    self.assertEqual(prediccion[campo], valor)
+
+    def test_consultas_no_crecen_con_el_curso(self):
+        cliente = self.cliente(self.maestro.user)
+        cliente.get(self.url())  # Carga el catálogo de períodos del proceso
+        # Curso, rol, alumnos, notas, asistencia y participaciones anteriores
+        with self.assertNumQueries(6):
+            cliente.get(self.url())
+        for numero in range(self.ALUMNOS + 1, self.ALUMNOS + 11):
+            Alumno.objects.create(user=User.objects.create_user(f'alumno{numero}'), curso=self.curso)
+        with self.assertNumQueries(6):
+            respuesta = cliente.get(self.url())
+        self.assertEqual(len(respuesta.data['alumnos']), self.ALUMNOS + 10)
+
+    def test_permisos(self):
+        otro = Maestro.objects.create(user=User.objects.create_user('maestro2'))
+        for user in (otro.user, self.alumnos[0].user, self.padres[0].user):
+            with self.subTest(user=user.username):
+                self.assertEqual(self.cliente(user).get(self.url()).status_code, 403)
+        admin = User.objects.create_superuser('admin')
+        self.assertEqual(self.cliente(admin).get(self.url()).status_code, 200)
+        self.assertEqual(self.cliente(self.maestro.user).get(self.url('2099-T9')).status_code, 404)
+
+    @override_settings(PREDICCION_MODELO_PATH='/tmp/no-existe.joblib', PREDICCION_MODELO_CACHE_TTL=60)
+    def test_revisa_el_modelo_solo_al_vencer_el_ttl(self):
+        with mock.patch.object(modulo_prediccion.os, 'stat', side_effect=OSError) as stat:
+            for _ in range(5):
+                self.assertIsNone(cargar_modelo())
+            self.assertEqual(stat.call_count, 1)
+
+            # Al reentrenar se invalida el cache y se vuelve a revisar el archivo
+            invalidar_modelo()
+            cargar_modelo()
+            self.assertEqual(stat.call_count, 2)
+
+            ahora = modulo_prediccion.time.monotonic()
+            with mock.patch.object(modulo_prediccion.time, 'monotonic', return_value=ahora + 61):
+                cargar_modelo()
+            self.assertEqual(stat.call_count, 3)
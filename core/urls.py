@@ -13,6 +13,7 @@ urlpatterns = [
     # Colegios
     path('colegios/', views.ColegioListCreateView.as_view(), name='colegio-list-create'),
     path('colegios/<int:pk>/', views.ColegioDetailView.as_view(), name='colegio-detail'),
+    path('colegios/<int:pk>/qr/', views.ColegioQRView.as_view(), name='colegio-qr'),
     
     # Maestros
     path('maestros/', views.MaestroListCreateView.as_view(), name='maestro-list-create'),
@@ -22,6 +23,7 @@ urlpatterns = [
     # Cursos
     path('cursos/', views.CursoListCreateView.as_view(), name='curso-list-create'),
     path('cursos/<int:pk>/', views.CursoDetailView.as_view(), name='curso-detail'),
+    path('cursos/<int:pk>/gradebook/<str:periodo>/', views.CursoGradebookView.as_view(), name='curso-gradebook'),
     
     # Materias
     path('materias/', views.MateriaListCreateView.as_view(), name='materia-list-create'),
@@ -37,16 +39,22 @@ urlpatterns = [
     
     # Notas
     path('notas/', views.NotaListCreateView.as_view(), name='nota-list-create'),
+    path('notas/bulk/', views.NotaBulkView.as_view(), name='nota-bulk'),
+    path('notas/cambios/', views.NotaCambiosView.as_view(), name='nota-cambios'),
     path('notas/<int:pk>/', views.NotaDetailView.as_view(), name='nota-detail'),
     
     # Asistencia
     path('asistencia/', views.AsistenciaListCreateView.as_view(), name='asistencia-list-create'),
     path('asistencia/<int:pk>/', views.AsistenciaDetailView.as_view(), name='asistencia-detail'),
+    path('asistencia/bulk/', views.AsistenciaBulkView.as_view(), name='asistencia-bulk'),
+    path('asistencia/cambios/', views.AsistenciaCambiosView.as_view(), name='asistencia-cambios'),
     path('asistencia/qr/', views.QRAsistenciaView.as_view(), name='qr-asistencia'),
+    path('asistencia/qr/sincronizar/', views.QRSincronizarView.as_view(), name='qr-asistencia-sincronizar'),
     
     # Participaciones
     path('participaciones/', views.ParticipacionListCreateView.as_view(), name='participacion-list-create'),
     path('participaciones/<int:pk>/', views.ParticipacionDetailView.as_view(), name='participacion-detail'),
+    path('participaciones/cambios/', views.ParticipacionCambiosView.as_view(), name='participacion-cambios'),
     
     # Vistas para el Dashboard del Padre
     path('padre/dashboard/', views.PadreDashboardView.as_view(), name='padre-dashboard'),
@@ -54,4 +62,5 @@ urlpatterns = [
     
     # Predicción de rendimiento
     path('prediccion/<int:alumno_id>/<str:periodo>/', views.PrediccionRendimientoView.as_view(), name='prediccion-rendimiento'),
+    path('prediccion/curso/<int:curso_id>/<str:periodo>/', views.PrediccionCursoView.as_view(), name='prediccion-curso'),
 ] 
\ No newline at end of file
@@ -1,36 +1,58 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404, render
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.views.generic import TemplateView
-from datetime import datetime, date, time
 import math
+import numpy as np
 import pickle
 import os
 
 from .models import (
     Colegio, Curso, Materia, Maestro, Alumno, Padre, 
-    Nota, Asistencia, Participacion
+    Nota, Asistencia, Participacion, ResumenPeriodoAlumno, ResumenDiarioAlumno,
+    CheckinPendiente
 )
 from .serializers import (
     UserSerializer, ColegioSerializer, CursoSerializer, MateriaSerializer,
     MaestroSerializer, MaestroListSerializer, AlumnoSerializer, AlumnoListSerializer,
     PadreSerializer, NotaSerializer, AsistenciaSerializer, ParticipacionSerializer,
     QRAsistenciaSerializer, PrediccionSerializer, HijoDashboardSerializer, 
-    DetalleHijoSerializer, MaestroDashboardSerializer
+    DetalleHijoSerializer, MaestroDashboardSerializer, PrediccionAlumnoSerializer,
+    NotaBulkSerializer, NotaBulkItemSerializer, AsistenciaBulkSerializer, AsistenciaBulkItemSerializer,
+    CheckinOfflineSerializer, SincronizarQRSerializer
 )
 from .permissions import (
     IsMaestroTutor, IsAlumno, IsPadre, IsMaestro,
     CanAccessCurso, CanAccessAlumno, CanAccessNota, CanModifyNota,
     CanAccessAsistencia, CanAccessParticipacion, IsPadre
 )
-from django.db.models import Avg, Count, Q, Case, When, FloatField, Prefetch
-from django.db.models.functions import Cast
+from .roles import get_rol, resolver_rol, filtrar_por_alumno
+from .consultas import RelacionesSerializerMixin, aplicar_relaciones
+from .pagination import AlumnosDashboardPagination, NotasPagination, RegistrosPorFechaPagination
+from .periodos import ordenar, periodo_por_codigo
+from .prediccion import predecir
+from .resumenes import actualizar_resumenes, actualizar_resumenes_de
+from .asistencias import atraso_qr_sin_conexion, desfase_tolerado, marcar_presentes, momento_aceptable
+from .cambios import CursorInvalido, cursor_vencido, decodificar_cursor, leer_cambios
+from .idempotencia import buscar_claves, guardar_claves, idempotente
+from .geocercas import indice_geocercas
+from .qr import (
+    datos_qr_alumno, generar_codigo, horario_qr, paso_segundos, registro_usos,
+    segundos_restantes, validar_codigo
+)
+from django.db.models import (
+    Count, Sum, Q, Case, When, FloatField, Prefetch, OuterRef, Subquery, Value,
+    prefetch_related_objects
+)
+from django.db.models.functions import Cast, Coalesce
 from datetime import timedelta
 
 # Vistas de autenticación
@@ -51,44 +73,63 @@ class CustomTokenObtainPairView(TokenObtainPairView):
             }
             
             # Determinar el rol del usuario
-            try:
-                maestro = Maestro.objects.get(user=user)
-                user_data['role'] = 'maestro'
-                user_data['role_id'] = maestro.id
-                if maestro.cursos_tutor.exists():
-                    user_data['is_tutor'] = True
-                    user_data['curso_tutor'] = maestro.cursos_tutor.first().id
-            except Maestro.DoesNotExist:
-                try:
-                    alumno = Alumno.objects.get(user=user)
-                    user_data['role'] = 'alumno'
-                    user_data['role_id'] = alumno.id
-                    user_data['curso'] = alumno.curso.id
-                except Alumno.DoesNotExist:
-                    try:
-                        padre = Padre.objects.get(user=user)
-                        user_data['role'] = 'padre'
-                        user_data['role_id'] = padre.id
-                        user_data['hijos'] = list(padre.hijos.values_list('id', flat=True))
-                    except Padre.DoesNotExist:
-                        user_data['role'] = 'admin' if user.is_superuser else 'unknown'
+            rol = resolver_rol(user)
+            user_data['role'] = rol.role
+            if rol.role_id is not None:
+                user_data['role_id'] = rol.role_id
+            if rol.role == 'maestro' and rol.es_tutor:
+                user_data['is_tutor'] = True
+                user_data['curso_tutor'] = rol.cursos_tutor[0]
+            elif rol.role == 'alumno':
+                user_data['curso'] = rol.curso_id
+            elif rol.role == 'padre':
+                user_data['hijos'] = rol.hijos
             
             response.data['user'] = user_data
         return response
 
 # Vistas para Colegios
-class ColegioListCreateView(generics.ListCreateAPIView):
+class ColegioListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
     queryset = Colegio.objects.all()
     serializer_class = ColegioSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class ColegioDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ColegioDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Colegio.objects.all()
     serializer_class = ColegioSerializer
     permission_classes = [permissions.IsAdminUser]
 
+class ColegioQRView(APIView):
+    """
+    Código QR vigente del colegio, para la pantalla de la entrada.
+    Con QR_TOKEN_ROTATIVO el código cambia cada QR_TOKEN_PASO segundos.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        colegio = get_object_or_404(Colegio, id=pk)
+
+        # Solo un administrador o un tutor de un curso del colegio
+        if not request.user.is_superuser:
+            rol = get_rol(request)
+            if not Curso.objects.filter(id__in=rol.cursos_tutor, colegio=colegio).exists():
+                return Response(
+                    {'error': 'No tienes permisos para ver el QR de este colegio'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+        if not getattr(settings, 'QR_TOKEN_ROTATIVO', False):
+            return Response({'codigo': colegio.token_qr, 'rotativo': False})
+
+        return Response({
+            'codigo': generar_codigo(colegio.id, colegio.token_qr),
+            'rotativo': True,
+            'paso_segundos': paso_segundos(),
+            'expira_en': round(segundos_restantes(), 1),
+        })
+
 # Vistas para Maestros
-class MaestroListCreateView(generics.ListCreateAPIView):
+class MaestroListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
     queryset = Maestro.objects.all()
     permission_classes = [permissions.IsAdminUser]
     
@@ -97,7 +138,7 @@ class MaestroListCreateView(generics.ListCreateAPIView):
             return MaestroListSerializer
         return MaestroSerializer
 
-class MaestroDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MaestroDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Maestro.objects.all()
     serializer_class = MaestroSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -111,8 +152,10 @@ class MaestroDashboardView(APIView):
 
     def get(self, request):
         try:
-            maestro = Maestro.objects.get(user=request.user)
-            curso_tutor = maestro.cursos_tutor.first()
+            rol = get_rol(request)
+            if not rol.es_maestro:
+                raise Maestro.DoesNotExist
+            curso_tutor = cursos_con_conteos().filter(id__in=rol.cursos_tutor).order_by('id').first()
 
             if not curso_tutor:
                 return Response(
@@ -123,42 +166,70 @@ class MaestroDashboardView(APIView):
             # Obtener materias del curso
             materias = Materia.objects.filter(curso=curso_tutor)
 
-            # Obtener período de la query, o usar el más reciente
-            periodos_disponibles = list(Nota.objects.filter(alumno__curso=curso_tutor).values_list('periodo', flat=True).distinct().order_by('-periodo'))
+            # Obtener período de la query, o usar el más reciente. Los períodos con
+            # notas salen de los resúmenes (uno por alumno y período) y se ordenan
+            # con el catálogo
+            periodos_disponibles = [
+                periodo.codigo for periodo in ordenar(
+                    ResumenPeriodoAlumno.objects.filter(alumno__curso=curso_tutor, num_notas__gt=0)
+                    .values_list('periodo_id', flat=True).distinct()
+                )
+            ]
             periodo_seleccionado = request.query_params.get('periodo', periodos_disponibles[0] if periodos_disponibles else None)
             
+            # Participaciones acotadas a una ventana reciente: el historial
+            # completo de todos los años no cabe en el dashboard
+            dias = settings.MAESTRO_DASHBOARD_PARTICIPACIONES_DIAS
+            desde = timezone.now().date() - timedelta(days=dias)
+            prefetches = [
+                Prefetch(
+                    'participaciones',
+                    queryset=Participacion.objects.filter(fecha__gte=desde).order_by('-fecha'),
+                    to_attr='participaciones_filtradas'
+                )
+            ]
+
             # Obtener alumnos con sus notas y participaciones
             if periodo_seleccionado:
-                alumnos = Alumno.objects.filter(curso=curso_tutor).prefetch_related(
-                    Prefetch(
-                        'notas',
-                        queryset=Nota.objects.filter(periodo=periodo_seleccionado),
-                        to_attr='notas_periodo'
-                    ),
-                    'participaciones'
-                ).select_related('user')
-                
-                # Para el serializer, necesitamos pasar las notas filtradas
-                for alumno in alumnos:
-                    alumno.notas_filtradas = alumno.notas_periodo
+                prefetches.append(Prefetch(
+                    'notas',
+                    queryset=Nota.objects.filter(periodo=periodo_por_codigo(periodo_seleccionado)),
+                    to_attr='notas_filtradas'
+                ))
             else:
                 # Si no hay período seleccionado, obtener alumnos sin notas filtradas
-                alumnos = Alumno.objects.filter(curso=curso_tutor).prefetch_related(
-                    'notas', 'participaciones'
-                ).select_related('user')
+                prefetches.append('notas')
+
+            alumnos = Alumno.objects.filter(curso=curso_tutor).select_related('user').order_by('id')
+
+            # Paginación opcional de alumnos (?page=, ?page_size=)
+            paginador = AlumnosDashboardPagination()
+            paginacion = None
+            if paginador.solicitada(request):
+                alumnos = paginador.paginate_queryset(alumnos, request, view=self)
+                prefetch_related_objects(alumnos, *prefetches)
+                paginacion = paginador.get_info_paginacion()
+            else:
+                alumnos = alumnos.prefetch_related(*prefetches)
 
             data = {
                 'curso': curso_tutor,
                 'materias': materias,
                 'alumnos': alumnos,
-                'periodos': periodos_disponibles
+                'periodos': periodos_disponibles,
+                'participaciones_desde': desde,
             }
+            if paginacion is not None:
+                data['paginacion'] = paginacion
             
             serializer = MaestroDashboardSerializer(data)
             return Response(serializer.data)
 
         except Maestro.DoesNotExist:
             return Response({'error': 'Perfil de maestro no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        except NotFound:
+            # Página de alumnos fuera de rango
+            raise
         except Exception as e:
             # Log the error for debugging
             import logging
@@ -168,46 +239,111 @@ class MaestroDashboardView(APIView):
 
 
 # Vistas para Cursos
-class CursoListCreateView(generics.ListCreateAPIView):
+def cursos_con_conteos():
+    """Cursos con lo que muestra CursoSerializer en la misma consulta"""
+    return Curso.objects.select_related('tutor__user', 'colegio').annotate(num_alumnos=Count('alumnos'))
+
+class CursoListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
     queryset = Curso.objects.all()
     serializer_class = CursoSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
+        cursos = cursos_con_conteos()
         user = self.request.user
         if user.is_superuser:
-            return Curso.objects.all()
+            return cursos
+        
+        rol = get_rol(self.request)
         
         # Si es maestro, solo ve sus cursos como tutor
-        try:
-            maestro = Maestro.objects.get(user=user)
-            return maestro.cursos_tutor.all()
-        except Maestro.DoesNotExist:
-            pass
+        if rol.es_maestro:
+            return cursos.filter(id__in=rol.cursos_tutor)
         
         # Si es alumno, solo ve su curso
-        try:
-            alumno = Alumno.objects.get(user=user)
-            return Curso.objects.filter(id=alumno.curso.id)
-        except Alumno.DoesNotExist:
-            pass
+        if rol.es_alumno:
+            return cursos.filter(id=rol.curso_id)
         
         # Si es padre, ve los cursos de sus hijos
-        try:
-            padre = Padre.objects.get(user=user)
-            return Curso.objects.filter(alumnos__in=padre.hijos.all()).distinct()
-        except Padre.DoesNotExist:
-            pass
+        if rol.es_padre:
+            return cursos.filter(id__in=rol.cursos_hijos)
         
-        return Curso.objects.none()
+        return cursos.none()
 
-class CursoDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Curso.objects.all()
+class CursoDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = cursos_con_conteos()
     serializer_class = CursoSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessCurso]
 
+class CursoGradebookView(APIView):
+    """
+    Planilla de notas de un curso para un período como matriz densa
+    alumnos × materias. `valores` va fila por fila (row-major), con null donde
+    el alumno no tiene nota en esa materia.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk, periodo):
+        curso = get_object_or_404(Curso, id=pk)
+
+        # Solo el tutor del curso o un administrador
+        if not request.user.is_superuser:
+            rol = get_rol(request)
+            if not (rol.es_maestro and rol.es_tutor_de(curso.id)):
+                return Response(
+                    {'error': 'No tienes permisos para ver la planilla de este curso'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+        periodo_nota = periodo_por_codigo(periodo)
+        if periodo_nota is None:
+            return Response({'error': 'Período no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        alumnos = list(
+            Alumno.objects.filter(curso=curso).order_by('user__last_name', 'user__first_name', 'id')
+            .values_list('id', 'user__first_name', 'user__last_name')
+        )
+        materias = list(Materia.objects.filter(curso=curso).order_by('nombre', 'id').values_list('id', 'nombre'))
+        fila = {alumno_id: i for i, (alumno_id, _, _) in enumerate(alumnos)}
+        columna = {materia_id: j for j, (materia_id, _) in enumerate(materias)}
+
+        matriz = np.full((len(fila), len(columna)), np.nan)
+        for alumno_id, materia_id, valor in Nota.objects.filter(
+            alumno__curso=curso, periodo=periodo_nota
+        ).values_list('alumno_id', 'materia_id', 'valor'):
+            # Un alumno cambiado de curso puede conservar notas de otras materias
+            if alumno_id in fila and materia_id in columna:
+                matriz[fila[alumno_id], columna[materia_id]] = valor
+
+        return Response({
+            'curso': curso.id,
+            'periodo': periodo,
+            'filas': [alumno_id for alumno_id, _, _ in alumnos],
+            'nombres_filas': [f"{nombre} {apellido}".strip() for _, nombre, apellido in alumnos],
+            'columnas': [materia_id for materia_id, _ in materias],
+            'nombres_columnas': [nombre for _, nombre in materias],
+            'valores': self._lista(matriz.ravel(), decimales=None),
+            'promedios_filas': self._lista(self._promedios(matriz, eje=1)),
+            'promedios_columnas': self._lista(self._promedios(matriz, eje=0)),
+        })
+
+    @staticmethod
+    def _promedios(matriz, eje):
+        """Promedio ignorando celdas vacías; NaN si la fila/columna no tiene notas"""
+        cantidad = np.count_nonzero(~np.isnan(matriz), axis=eje)
+        suma = np.nansum(matriz, axis=eje)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(cantidad > 0, suma / cantidad, np.nan)
+
+    @staticmethod
+    def _lista(valores, decimales=2):
+        return [
+            None if np.isnan(v) else (float(v) if decimales is None else round(float(v), decimales))
+            for v in valores
+        ]
+
 # Vistas para Materias
-class MateriaListCreateView(generics.ListCreateAPIView):
+class MateriaListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
     serializer_class = MateriaSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -217,24 +353,28 @@ class MateriaListCreateView(generics.ListCreateAPIView):
             return Materia.objects.filter(curso_id=curso_id)
         return Materia.objects.all()
 
-class MateriaDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MateriaDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Materia.objects.all()
     serializer_class = MateriaSerializer
     permission_classes = [permissions.IsAdminUser]
 
 # Vistas para Padres
-class PadreListCreateView(generics.ListCreateAPIView):
-    queryset = Padre.objects.all()
+def padres_con_conteos():
+    """Padres con su usuario y la cantidad de hijos que muestra PadreSerializer"""
+    return Padre.objects.select_related('user').annotate(hijos_count=Count('hijos'))
+
+class PadreListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
+    queryset = padres_con_conteos()
     serializer_class = PadreSerializer
     permission_classes = [permissions.IsAdminUser]
 
-class PadreDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Padre.objects.all()
+class PadreDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = padres_con_conteos()
     serializer_class = PadreSerializer
     permission_classes = [permissions.IsAdminUser]
 
 # Vistas para Alumnos
-class AlumnoListCreateView(generics.ListCreateAPIView):
+class AlumnoListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -243,45 +383,39 @@ class AlumnoListCreateView(generics.ListCreateAPIView):
         return AlumnoSerializer
     
     def get_queryset(self):
+        alumnos = Alumno.objects.all()
         user = self.request.user
         if user.is_superuser:
-            return Alumno.objects.all()
+            return alumnos
+        
+        rol = get_rol(self.request)
         
         # Si es maestro tutor, solo ve alumnos de su curso
-        try:
-            maestro = Maestro.objects.get(user=user)
-            return Alumno.objects.filter(curso__tutor=maestro)
-        except Maestro.DoesNotExist:
-            pass
+        if rol.es_maestro:
+            return alumnos.filter(curso_id__in=rol.cursos_tutor)
         
         # Si es alumno, solo se ve a sí mismo
-        try:
-            alumno = Alumno.objects.get(user=user)
-            return Alumno.objects.filter(id=alumno.id)
-        except Alumno.DoesNotExist:
-            pass
+        if rol.es_alumno:
+            return alumnos.filter(id=rol.alumno_id)
         
         # Si es padre, ve a sus hijos
-        try:
-            padre = Padre.objects.get(user=user)
-            return padre.hijos.all()
-        except Padre.DoesNotExist:
-            pass
+        if rol.es_padre:
+            return alumnos.filter(id__in=rol.hijos)
         
-        return Alumno.objects.none()
+        return alumnos.none()
 
-class AlumnoDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AlumnoDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Alumno.objects.all()
     serializer_class = AlumnoSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessAlumno]
 
 # Vistas para Notas
-class NotaListCreateView(generics.ListCreateAPIView):
+class NotaListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
     serializer_class = NotaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotasPagination
     
     def get_queryset(self):
-        user = self.request.user
         queryset = Nota.objects.all()
         
         # Filtros por parámetros de query
@@ -294,50 +428,130 @@ class NotaListCreateView(generics.ListCreateAPIView):
         if materia_id:
             queryset = queryset.filter(materia_id=materia_id)
         if periodo:
-            queryset = queryset.filter(periodo=periodo)
-        
-        # Filtros por rol
-        if user.is_superuser:
-            return queryset
-        
-        # Si es maestro tutor, solo ve notas de su curso
-        try:
-            maestro = Maestro.objects.get(user=user)
-            return queryset.filter(alumno__curso__tutor=maestro)
-        except Maestro.DoesNotExist:
-            pass
-        
-        # Si es alumno, solo ve sus notas
-        try:
-            alumno = Alumno.objects.get(user=user)
-            return queryset.filter(alumno=alumno)
-        except Alumno.DoesNotExist:
-            pass
-        
-        # Si es padre, ve notas de sus hijos
-        try:
-            padre = Padre.objects.get(user=user)
-            return queryset.filter(alumno__in=padre.hijos.all())
-        except Padre.DoesNotExist:
-            pass
+            queryset = queryset.filter(periodo=periodo_por_codigo(periodo))
         
-        return Nota.objects.none()
+        # Filtros por rol (tutor, alumno o padre)
+        return filtrar_por_alumno(queryset, get_rol(self.request))
     
     def perform_create(self, serializer):
         # Solo maestros tutores pueden crear notas
-        try:
-            maestro = Maestro.objects.get(user=self.request.user)
+        rol = get_rol(self.request)
+        if rol.es_maestro:
             # Verificar que la materia pertenezca al curso del tutor
             materia = serializer.validated_data['materia']
-            if materia.curso.tutor != maestro:
-                raise permissions.PermissionDenied("No puedes registrar notas para este curso")
-        except Maestro.DoesNotExist:
-            if not self.request.user.is_superuser:
-                raise permissions.PermissionDenied("Solo los maestros tutores pueden registrar notas")
+            if not rol.es_tutor_de(materia.curso_id):
+                raise PermissionDenied("No puedes registrar notas para este curso")
+        elif not self.request.user.is_superuser:
+            raise PermissionDenied("Solo los maestros tutores pueden registrar notas")
         
         serializer.save()
 
-class NotaDetailView(generics.RetrieveUpdateDestroyAPIView):
+class NotaBulkView(APIView):
+    """
+    Carga masiva de notas (planilla de calificaciones).
+
+    Crea o actualiza cada celda (alumno, materia, periodo) en una sola
+    transacción, y solo si todas las celdas son válidas: una planilla a medio
+    guardar es más difícil de corregir que una rechazada. La respuesta trae un
+    estado por celda, en el mismo orden: ok, invalida, fuera_de_rango,
+    repetida, sin_permiso o alumno_no_pertenece.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        rol = get_rol(request)
+        if not (rol.es_tutor or request.user.is_superuser):
+            raise PermissionDenied("Solo los maestros tutores pueden registrar notas")
+
+        serializer = NotaBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        periodo_general = serializer.validated_data.get('periodo')
+        celdas = serializer.validated_data['notas']
+
+        estados = [None] * len(celdas)
+        errores = {}
+        validas = []
+        for indice, celda in enumerate(celdas):
+            item = NotaBulkItemSerializer(data=celda)
+            if not item.is_valid():
+                estados[indice] = 'invalida'
+                errores[indice] = item.errors
+                continue
+            datos = item.validated_data
+            datos.setdefault('periodo', periodo_general)
+            if not datos['periodo']:
+                estados[indice] = 'invalida'
+                errores[indice] = {'periodo': ['Este campo es requerido.']}
+                continue
+            validas.append((indice, datos))
+
+        # Rango 0-100 comprobado sobre todo el lote a la vez
+        valores = np.array([datos['valor'] for _, datos in validas], dtype=float)
+        en_rango = (valores >= 0) & (valores <= 100)
+        for (indice, _), ok in zip(validas, en_rango):
+            if not ok:
+                estados[indice] = 'fuera_de_rango'
+        validas = [celda for celda, ok in zip(validas, en_rango) if ok]
+
+        # Propiedad del tutor verificada una vez para todas las materias
+        cursos_materia = dict(
+            Materia.objects.filter(id__in={d['materia'] for _, d in validas}).values_list('id', 'curso_id')
+        )
+        cursos_alumno = dict(
+            Alumno.objects.filter(id__in={d['alumno'] for _, d in validas}).values_list('id', 'curso_id')
+        )
+
+        # Las celdas sin observaciones no deben borrar las ya guardadas
+        notas, notas_con_observaciones = [], []
+        vistas = set()
+        for indice, datos in validas:
+            curso_id = cursos_materia.get(datos['materia'])
+            clave = (datos['alumno'], datos['materia'], datos['periodo'].id)
+            if curso_id is None or not (request.user.is_superuser or rol.es_tutor_de(curso_id)):
+                estados[indice] = 'sin_permiso'
+            elif cursos_alumno.get(datos['alumno']) != curso_id:
+                estados[indice] = 'alumno_no_pertenece'
+            elif clave in vistas:
+                estados[indice] = 'repetida'
+            else:
+                vistas.add(clave)
+                estados[indice] = 'ok'
+                nota = Nota(
+                    alumno_id=datos['alumno'],
+                    materia_id=datos['materia'],
+                    periodo=datos['periodo'],
+                    valor=datos['valor'],
+                    observaciones=datos.get('observaciones', ''),
+                )
+                (notas_con_observaciones if 'observaciones' in datos else notas).append(nota)
+
+        # Una sola celda rechazada descarta el lote completo
+        guardadas = notas + notas_con_observaciones if all(e == 'ok' for e in estados) else []
+        if guardadas:
+            with transaction.atomic():
+                for lote, campos in (
+                    (notas, ['valor', 'actualizado']),
+                    (notas_con_observaciones, ['valor', 'observaciones', 'actualizado']),
+                ):
+                    if lote:
+                        Nota.objects.bulk_create(
+                            lote,
+                            update_conflicts=True,
+                            unique_fields=['alumno', 'materia', 'periodo'],
+                            update_fields=campos,
+                        )
+                actualizar_resumenes_de(guardadas)
+
+        return Response(
+            {
+                'guardadas': len(guardadas),
+                'estados': estados,
+                'errores': errores,
+            },
+            status=status.HTTP_200_OK if guardadas else status.HTTP_400_BAD_REQUEST
+        )
+
+class NotaDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Nota.objects.all()
     serializer_class = NotaSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessNota]
@@ -349,6 +563,19 @@ class NotaDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 # Vistas para el Dashboard del Padre
 
+def _subconsulta_por_alumno(queryset, agregado, default=None):
+    """Subconsulta correlacionada que agrega `queryset` para el alumno externo"""
+    subconsulta = Subquery(
+        queryset.filter(alumno=OuterRef('pk'))
+        .order_by()
+        .values('alumno')
+        .annotate(resultado=agregado)
+        .values('resultado')[:1]
+    )
+    if default is not None:
+        return Coalesce(subconsulta, Value(default))
+    return subconsulta
+
 class PadreDashboardView(APIView):
     """
     Vista mejorada para el dashboard del padre. Muestra una lista de sus hijos con información completa.
@@ -357,12 +584,14 @@ class PadreDashboardView(APIView):
 
     def get(self, request):
         try:
-            padre = Padre.objects.get(user=request.user)
+            rol = get_rol(request)
+            if not rol.es_padre:
+                raise Padre.DoesNotExist
             
             # Determinar los dos períodos más recientes con notas
-            periodos_recientes = list(Nota.objects.filter(
-                alumno__in=padre.hijos.all()
-            ).order_by('-periodo').values_list('periodo', flat=True).distinct()[:2])
+            periodos_recientes = ordenar(ResumenPeriodoAlumno.objects.filter(
+                alumno_id__in=rol.hijos, num_notas__gt=0
+            ).values_list('periodo_id', flat=True).distinct())[:2]
             
             periodo_actual = periodos_recientes[0] if periodos_recientes else None
             periodo_anterior = periodos_recientes[1] if len(periodos_recientes) > 1 else None
@@ -370,48 +599,9 @@ class PadreDashboardView(APIView):
             # Calcular datos de los últimos 30 días
             hace_30_dias = timezone.now().date() - timedelta(days=30)
             
-            hijos = padre.hijos.all().select_related('user', 'curso').annotate(
-                # Promedio de notas del período actual
-                promedio_periodo=Avg(
-                    'notas__valor', 
-                    filter=Q(notas__periodo=periodo_actual)
-                ),
-                # Promedio de notas del período anterior (para comparar tendencia)
-                promedio_anterior=Avg(
-                    'notas__valor', 
-                    filter=Q(notas__periodo=periodo_anterior)
-                ) if periodo_anterior else None,
-                
-                # Estadísticas de asistencia (últimos 30 días)
-                total_dias_clase=Count(
-                    'asistencias',
-                    filter=Q(asistencias__fecha__gte=hace_30_dias)
-                ),
-                dias_presente=Count(
-                    'asistencias',
-                    filter=Q(asistencias__fecha__gte=hace_30_dias, asistencias__presente=True)
-                ),
-                dias_ausente_mes=Count(
-                    'asistencias',
-                    filter=Q(asistencias__fecha__gte=hace_30_dias, asistencias__presente=False)
-                ),
-                
-                # Estadísticas de participación (último mes)
-                total_participaciones_mes=Count(
-                    'participaciones',
-                    filter=Q(participaciones__fecha__gte=hace_30_dias)
-                ),
-                promedio_participaciones=Avg(
-                    'participaciones__valor',
-                    filter=Q(participaciones__fecha__gte=hace_30_dias)
-                )
-            ).annotate(
-                # Calcular porcentaje de asistencia
-                porcentaje_asistencia=Case(
-                    When(total_dias_clase__gt=0, then=(Cast('dias_presente', FloatField()) * 100.0 / Cast('total_dias_clase', FloatField()))),
-                    default=100.0,  # Si no hay datos, asumir 100%
-                    output_field=FloatField()
-                )
+            hijos = self.anotar_estadisticas(
+                Alumno.objects.filter(id__in=rol.hijos).select_related('user', 'curso'),
+                periodo_actual, periodo_anterior, hace_30_dias
             )
 
             serializer = HijoDashboardSerializer(hijos, many=True)
@@ -420,7 +610,7 @@ class PadreDashboardView(APIView):
             dashboard_data = {
                 'hijos': serializer.data,
                 'resumen_general': self._generar_resumen_general(hijos),
-                'periodo_actual': periodo_actual,
+                'periodo_actual': periodo_actual.codigo if periodo_actual else None,
                 'alertas_importantes': self._generar_alertas_importantes(hijos)
             }
             
@@ -432,6 +622,58 @@ class PadreDashboardView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @staticmethod
+    def anotar_estadisticas(hijos, periodo_actual, periodo_anterior, desde):
+        """
+        Anotar las estadísticas del dashboard leyendo los resúmenes materializados.
+
+        Cada agregado es una subconsulta correlacionada sobre ResumenPeriodoAlumno
+        (una fila por período) o ResumenDiarioAlumno (una fila por día). Agregar
+        notas, asistencias y participaciones en un mismo queryset multiplicaba
+        las filas del JOIN e inflaba los conteos.
+        """
+        periodos = ResumenPeriodoAlumno.objects.filter(num_notas__gt=0)
+        promedio_notas = Sum('suma_notas') / Sum('num_notas')
+        diarios = ResumenDiarioAlumno.objects.filter(fecha__gte=desde)
+
+        return hijos.annotate(
+            # Promedio de notas del período actual
+            promedio_periodo=_subconsulta_por_alumno(
+                periodos.filter(periodo=periodo_actual), promedio_notas
+            ),
+            # Promedio de notas del período anterior (para comparar tendencia)
+            promedio_anterior=_subconsulta_por_alumno(
+                periodos.filter(periodo=periodo_anterior), promedio_notas
+            ) if periodo_anterior else Value(None, output_field=FloatField()),
+            
+            # Estadísticas de asistencia (últimos 30 días)
+            total_dias_clase=_subconsulta_por_alumno(
+                diarios.filter(presente__isnull=False), Count('id'), default=0
+            ),
+            dias_presente=_subconsulta_por_alumno(
+                diarios.filter(presente=True), Count('id'), default=0
+            ),
+            dias_ausente_mes=_subconsulta_por_alumno(
+                diarios.filter(presente=False), Count('id'), default=0
+            ),
+            
+            # Estadísticas de participación (último mes)
+            total_participaciones_mes=_subconsulta_por_alumno(
+                diarios, Sum('num_participaciones'), default=0
+            ),
+            promedio_participaciones=_subconsulta_por_alumno(
+                diarios.filter(num_participaciones__gt=0),
+                Sum('suma_participaciones') / Sum('num_participaciones')
+            )
+        ).annotate(
+            # Calcular porcentaje de asistencia
+            porcentaje_asistencia=Case(
+                When(total_dias_clase__gt=0, then=(Cast('dias_presente', FloatField()) * 100.0 / Cast('total_dias_clase', FloatField()))),
+                default=100.0,  # Si no hay datos, asumir 100%
+                output_field=FloatField()
+            )
+        )
+    
     def _generar_resumen_general(self, hijos):
         """Generar resumen general del dashboard"""
         total_hijos = len(hijos)
@@ -485,32 +727,48 @@ class DetalleHijoView(APIView):
 
     def get(self, request, alumno_id):
         try:
-            padre = Padre.objects.get(user=request.user)
-            hijo = get_object_or_404(padre.hijos.all(), id=alumno_id)
+            rol = get_rol(request)
+            if not rol.es_padre:
+                raise Padre.DoesNotExist
+            hijo = get_object_or_404(
+                Alumno.objects.filter(id__in=rol.hijos).select_related('user', 'curso'),
+                id=alumno_id
+            )
 
-            # Obtener todos los períodos disponibles
-            periodos_disponibles = list(Nota.objects.filter(alumno=hijo).values_list('periodo', flat=True).distinct().order_by('-periodo'))
+            # Obtener todos los períodos disponibles con su promedio (una fila por período),
+            # que alimentan también la comparación y las tendencias
+            promedios = {
+                periodo_id: (suma / num, num)
+                for periodo_id, suma, num in ResumenPeriodoAlumno.objects.filter(
+                    alumno=hijo, num_notas__gt=0
+                ).values_list('periodo_id', 'suma_notas', 'num_notas')
+            }
+            promedios_periodo = {periodo.codigo: promedios[periodo.id] for periodo in ordenar(promedios)}
+            periodos_disponibles = list(promedios_periodo)
             periodo_seleccionado = request.query_params.get('periodo', periodos_disponibles[0] if periodos_disponibles else None)
+            periodo = periodo_por_codigo(periodo_seleccionado)
 
-            # Filtrar asistencias (últimos 60 días para mejor contexto)
-            fecha_limite = timezone.now().date() - timedelta(days=60)
-            asistencias = Asistencia.objects.filter(
-                alumno=hijo, 
-                fecha__gte=fecha_limite
-            ).order_by('-fecha')
+            # Asistencias y participaciones de las fechas del período; sin período
+            # o sin sus fechas cargadas, los últimos 60 y 90 días
+            hoy = timezone.now().date()
+            if periodo is not None and periodo.inicio and periodo.fin:
+                fechas_asistencias = fechas_participaciones = {'fecha__range': (periodo.inicio, periodo.fin)}
+            else:
+                fechas_asistencias = {'fecha__gte': hoy - timedelta(days=60)}
+                fechas_participaciones = {'fecha__gte': hoy - timedelta(days=90)}
+            asistencias = Asistencia.objects.filter(alumno=hijo, **fechas_asistencias).order_by('-fecha')
 
             # Pre-cargar materias con sus notas y participaciones
             materias = Materia.objects.filter(curso=hijo.curso).prefetch_related(
                 Prefetch(
                     'notas',
-                    queryset=Nota.objects.filter(alumno=hijo, periodo=periodo_seleccionado),
+                    queryset=Nota.objects.filter(alumno=hijo, periodo=periodo),
                     to_attr='notas_filtradas'
                 ),
                 Prefetch(
                     'participaciones',
                     queryset=Participacion.objects.filter(
-                        alumno=hijo, 
-                        fecha__gte=timezone.now().date() - timedelta(days=90)
+                        alumno=hijo, **fechas_participaciones
                     ).order_by('-fecha'),
                     to_attr='participaciones_filtradas'
                 )
@@ -549,9 +807,9 @@ class DetalleHijoView(APIView):
             # Enriquecer la respuesta con información adicional
             response_data = serializer.data
             response_data.update({
-                'navegacion': self._generar_navegacion(hijo, padre),
-                'comparacion_periodos': self._generar_comparacion_periodos(hijo, periodo_seleccionado, periodos_disponibles),
-                'resumen_tendencias': self._generar_resumen_tendencias(hijo, periodos_disponibles)
+                'navegacion': self._generar_navegacion(hijo, rol),
+                'comparacion_periodos': self._generar_comparacion_periodos(periodo_seleccionado, promedios_periodo),
+                'resumen_tendencias': self._generar_resumen_tendencias(promedios_periodo)
             })
             
             return Response(response_data)
@@ -560,76 +818,64 @@ class DetalleHijoView(APIView):
             return Response({'error': 'Perfil de padre no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
         except Alumno.DoesNotExist:
             return Response({'error': 'Hijo no encontrado o no tienes permiso para verlo.'}, status=status.HTTP_404_NOT_FOUND)
-        except IndexError:
-            return Response({'error': 'No hay períodos con notas disponibles para este alumno.'}, status=status.HTTP_404_NOT_FOUND)
-    
-    def _generar_navegacion(self, hijo, padre):
+
+    def _generar_navegacion(self, hijo, rol):
         """Generar información de navegación entre hermanos"""
-        hermanos = padre.hijos.exclude(id=hijo.id).values('id', 'user__first_name', 'user__last_name', 'curso__nombre')
+        hermanos = list(
+            Alumno.objects.filter(id__in=rol.hijos).exclude(id=hijo.id)
+            .values('id', 'user__first_name', 'user__last_name', 'curso__nombre')
+        )
         
         return {
-            'hermanos': list(hermanos),
-            'es_hijo_unico': not hermanos.exists()
+            'hermanos': hermanos,
+            'es_hijo_unico': not hermanos
         }
     
-    def _generar_comparacion_periodos(self, hijo, periodo_actual, periodos_disponibles):
-        """Generar comparación entre períodos"""
+    def _generar_comparacion_periodos(self, periodo_actual, promedios_periodo):
+        """
+        Generar comparación entre períodos.
+        `promedios_periodo` mapea cada período (del más reciente al más antiguo) a (promedio, num_notas).
+        """
+        periodos_disponibles = list(promedios_periodo)
         if len(periodos_disponibles) < 2:
             return None
         
-        # Obtener notas del período actual y anterior
-        notas_actual = Nota.objects.filter(alumno=hijo, periodo=periodo_actual).aggregate(
-            promedio=Avg('valor'),
-            total_notas=Count('id')
-        )
+        # Notas del período actual y anterior
+        promedio_actual, total_actual = promedios_periodo.get(periodo_actual, (None, 0))
+        periodo_anterior = periodos_disponibles[1]
+        promedio_anterior, total_anterior = promedios_periodo[periodo_anterior]
         
-        if len(periodos_disponibles) > 1:
-            periodo_anterior = periodos_disponibles[1]
-            notas_anterior = Nota.objects.filter(alumno=hijo, periodo=periodo_anterior).aggregate(
-                promedio=Avg('valor'),
-                total_notas=Count('id')
-            )
-            
-            diferencia = None
-            tendencia = 'estable'
-            
-            if notas_actual['promedio'] and notas_anterior['promedio']:
-                diferencia = notas_actual['promedio'] - notas_anterior['promedio']
-                if diferencia >= 3:
-                    tendencia = 'mejorando'
-                elif diferencia <= -3:
-                    tendencia = 'empeorando'
-            
-            return {
-                'periodo_anterior': periodo_anterior,
-                'promedio_actual': round(notas_actual['promedio'], 1) if notas_actual['promedio'] else None,
-                'promedio_anterior': round(notas_anterior['promedio'], 1) if notas_anterior['promedio'] else None,
-                'diferencia': round(diferencia, 1) if diferencia else None,
-                'tendencia': tendencia,
-                'evaluaciones_actual': notas_actual['total_notas'],
-                'evaluaciones_anterior': notas_anterior['total_notas']
-            }
+        diferencia = None
+        tendencia = 'estable'
         
-        return None
+        if promedio_actual and promedio_anterior:
+            diferencia = promedio_actual - promedio_anterior
+            if diferencia >= 3:
+                tendencia = 'mejorando'
+            elif diferencia <= -3:
+                tendencia = 'empeorando'
+        
+        return {
+            'periodo_anterior': periodo_anterior,
+            'promedio_actual': round(promedio_actual, 1) if promedio_actual else None,
+            'promedio_anterior': round(promedio_anterior, 1) if promedio_anterior else None,
+            'diferencia': round(diferencia, 1) if diferencia else None,
+            'tendencia': tendencia,
+            'evaluaciones_actual': total_actual,
+            'evaluaciones_anterior': total_anterior
+        }
     
-    def _generar_resumen_tendencias(self, hijo, periodos_disponibles):
+    def _generar_resumen_tendencias(self, promedios_periodo):
         """Generar análisis de tendencias académicas"""
-        if len(periodos_disponibles) < 3:
+        if len(promedios_periodo) < 3:
             return None
         
-        # Obtener promedios de los últimos 3 períodos
-        promedios_recientes = []
-        for periodo in periodos_disponibles[:3]:
-            promedio = Nota.objects.filter(
-                alumno=hijo, 
-                periodo=periodo
-            ).aggregate(promedio=Avg('valor'))['promedio']
-            
-            if promedio:
-                promedios_recientes.append({
-                    'periodo': periodo,
-                    'promedio': round(promedio, 1)
-                })
+        # Promedios de los últimos 3 períodos
+        promedios_recientes = [
+            {'periodo': periodo, 'promedio': round(promedio, 1)}
+            for periodo, (promedio, _) in list(promedios_periodo.items())[:3]
+            if promedio
+        ]
         
         if len(promedios_recientes) >= 2:
             # Calcular tendencia general
@@ -654,12 +900,12 @@ class DetalleHijoView(APIView):
 
 
 # Vistas para Asistencia
-class AsistenciaListCreateView(generics.ListCreateAPIView):
+class AsistenciaListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
     serializer_class = AsistenciaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RegistrosPorFechaPagination
     
     def get_queryset(self):
-        user = self.request.user
         queryset = Asistencia.objects.all()
         
         # Filtros por parámetros de query
@@ -671,42 +917,187 @@ class AsistenciaListCreateView(generics.ListCreateAPIView):
         if fecha:
             queryset = queryset.filter(fecha=fecha)
         
-        # Filtros por rol
-        if user.is_superuser:
-            return queryset
-        
-        # Si es maestro tutor, solo ve asistencia de su curso
-        try:
-            maestro = Maestro.objects.get(user=user)
-            return queryset.filter(alumno__curso__tutor=maestro)
-        except Maestro.DoesNotExist:
-            pass
-        
-        # Si es alumno, solo ve su asistencia
-        try:
-            alumno = Alumno.objects.get(user=user)
-            return queryset.filter(alumno=alumno)
-        except Alumno.DoesNotExist:
-            pass
-        
-        # Si es padre, ve asistencia de sus hijos
-        try:
-            padre = Padre.objects.get(user=user)
-            return queryset.filter(alumno__in=padre.hijos.all())
-        except Padre.DoesNotExist:
-            pass
-        
-        return Asistencia.objects.none()
+        # Filtros por rol (tutor, alumno o padre)
+        return filtrar_por_alumno(queryset, get_rol(self.request))
+    
+    @idempotente('asistencia')
+    def post(self, request, *args, **kwargs):
+        return self.create(request, *args, **kwargs)
+    
+    def perform_create(self, serializer):
+        serializer.save(registrado_en=timezone.now())
+
+class AsistenciaBulkView(APIView):
+    """
+    Toma de asistencia de todo un curso en una sola petición.
+    Crea o actualiza la asistencia de cada alumno para la fecha indicada.
+    """
+    permission_classes = [IsMaestroTutor]
+
+    @idempotente('asistencia_bulk')
+    def post(self, request):
+        serializer = AsistenciaBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        fecha = serializer.validated_data['fecha']
+        filas = serializer.validated_data['registros']
+        momento = serializer.validated_data.get('momento') or timezone.now()
+        if not momento_aceptable(momento):
+            return Response(
+                {'error': 'Hora del dispositivo fuera del rango aceptado'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resultados = [None] * len(filas)
+        validas = {}
+        for indice, fila in enumerate(filas):
+            item = AsistenciaBulkItemSerializer(data=fila)
+            if not item.is_valid():
+                resultados[indice] = {'indice': indice, 'ok': False, 'errores': item.errors}
+            elif item.validated_data['alumno'] in validas:
+                resultados[indice] = {
+                    'indice': indice, 'alumno': item.validated_data['alumno'], 'ok': False,
+                    'errores': {'alumno': ['Alumno repetido en la misma toma de asistencia.']}
+                }
+            else:
+                validas[item.validated_data['alumno']] = (indice, item.validated_data)
+
+        # Una sola consulta para comprobar que todos son alumnos del tutor
+        rol = get_rol(request)
+        permitidos = set(
+            Alumno.objects.filter(id__in=validas, curso_id__in=rol.cursos_tutor)
+            .values_list('id', flat=True)
+        )
+
+        # Una toma hecha sin conexión no pisa registros posteriores (QR o del tutor)
+        posteriores = set(
+            Asistencia.objects.filter(alumno_id__in=permitidos, fecha=fecha, registrado_en__gt=momento)
+            .values_list('alumno_id', flat=True)
+        )
 
-class AsistenciaDetailView(generics.RetrieveUpdateDestroyAPIView):
+        # Las filas sin hora de llegada u observaciones no deben borrar las
+        # ya guardadas: un lote por combinación de campos opcionales enviados
+        asistencias = []
+        lotes = {}
+        for alumno_id, (indice, datos) in validas.items():
+            if alumno_id not in permitidos:
+                resultados[indice] = {
+                    'indice': indice, 'alumno': alumno_id, 'ok': False,
+                    'errores': {'alumno': ['El alumno no pertenece a tu curso.']}
+                }
+                continue
+            if alumno_id in posteriores:
+                resultados[indice] = {
+                    'indice': indice, 'alumno': alumno_id, 'ok': False,
+                    'errores': {'momento': ['Hay un registro más reciente de esta asistencia.']}
+                }
+                continue
+            asistencia = Asistencia(
+                alumno_id=alumno_id,
+                fecha=fecha,
+                presente=datos['presente'],
+                hora_llegada=datos.get('hora_llegada'),
+                observaciones=datos.get('observaciones', ''),
+                registrado_en=momento,
+            )
+            asistencias.append((indice, asistencia))
+            opcionales = tuple(campo for campo in ('hora_llegada', 'observaciones') if campo in datos)
+            lotes.setdefault(opcionales, []).append(asistencia)
+
+        if asistencias:
+            with transaction.atomic():
+                for opcionales, lote in lotes.items():
+                    Asistencia.objects.bulk_create(
+                        lote,
+                        update_conflicts=True,
+                        unique_fields=['alumno', 'fecha'],
+                        update_fields=['presente', *opcionales, 'registrado_en', 'actualizado'],
+                    )
+                actualizar_resumenes_de([asistencia for _, asistencia in asistencias])
+            for indice, asistencia in asistencias:
+                resultados[indice] = {
+                    'indice': indice, 'alumno': asistencia.alumno_id, 'ok': True, 'id': asistencia.pk
+                }
+
+        return Response(
+            {
+                'fecha': fecha,
+                'guardados': len(asistencias),
+                'errores': len(filas) - len(asistencias),
+                'resultados': resultados,
+            },
+            status=status.HTTP_200_OK if asistencias else status.HTTP_400_BAD_REQUEST
+        )
+
+class AsistenciaDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Asistencia.objects.all()
     serializer_class = AsistenciaSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessAsistencia]
 
+    def perform_update(self, serializer):
+        # Una corrección manual es el registro más reciente de la asistencia
+        serializer.save(registrado_en=timezone.now())
+
 # Vista especial para registro de asistencia por QR
+AMBITO_QR = 'asistencia_qr'
+
 class QRAsistenciaView(APIView):
     permission_classes = [IsAlumno]
     
+    @staticmethod
+    def validar_escaneo(datos, qr_token, latitud, longitud, ahora):
+        """
+        Verificar token, ubicación y horario de un escaneo hecho a la hora
+        local `ahora`. Devuelve (paso del código rotativo, None) si es válido
+        o (None, Response) con la respuesta a devolver.
+        """
+        # Verificar token QR: código rotativo firmado o token fijo del colegio
+        paso_qr = None
+        if getattr(settings, 'QR_TOKEN_ROTATIVO', False):
+            paso_qr = validar_codigo(qr_token, datos.colegio_id, datos.token_qr, ahora.timestamp())
+            if paso_qr is None:
+                return None, Response(
+                    {'error': 'Código QR inválido o vencido'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if registro_usos.usado(datos.alumno_id, paso_qr):
+                return None, Response(
+                    {'message': 'Asistencia ya registrada para hoy'}, 
+                    status=status.HTTP_200_OK
+                )
+        elif str(datos.token_qr) != qr_token:
+            return None, Response(
+                {'error': 'Token QR inválido'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Verificar ubicación: alguna geocerca del colegio (o radio
+        # alrededor del colegio), buscada en la grilla precalculada
+        if indice_geocercas().zona_de_colegio(datos.colegio_id, latitud, longitud) is None:
+            return None, Response(
+                {'error': 'Ubicación fuera del rango permitido'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Verificar horario (hora local del colegio, TIME_ZONE)
+        start_time, end_time = horario_qr()
+        if not (start_time <= ahora.time() <= end_time):
+            return None, Response(
+                {'error': 'Fuera del horario permitido para registro de asistencia'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return paso_qr, None
+
+    @staticmethod
+    def registrar_uso(alumno_id, paso_qr):
+        """
+        Recordar el paso del código recién al confirmarse la escritura: si la
+        transacción falla, el alumno puede reintentar con el mismo código.
+        """
+        if paso_qr is not None:
+            transaction.on_commit(lambda: registro_usos.registrar(alumno_id, paso_qr))
+    
+    @idempotente(AMBITO_QR)
     def post(self, request):
         serializer = QRAsistenciaSerializer(data=request.data)
         if serializer.is_valid():
@@ -714,86 +1105,172 @@ class QRAsistenciaView(APIView):
             latitud = serializer.validated_data['latitud']
             longitud = serializer.validated_data['longitud']
             
-            try:
-                alumno = Alumno.objects.get(user=request.user)
-                colegio = alumno.curso.colegio
-                
-                # Verificar token QR
-                if str(colegio.token_qr) != qr_token:
-                    return Response(
-                        {'error': 'Token QR inválido'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # Verificar ubicación (tolerancia en grados)
-                tolerance = getattr(settings, 'QR_LOCATION_TOLERANCE', 0.001)
-                lat_diff = abs(colegio.latitud - latitud)
-                lng_diff = abs(colegio.longitud - longitud)
-                
-                if lat_diff > tolerance or lng_diff > tolerance:
-                    return Response(
-                        {'error': 'Ubicación fuera del rango permitido'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # Verificar horario
-                now = timezone.now()
-                start_time = datetime.strptime(
-                    getattr(settings, 'QR_ATTENDANCE_TIME_START', '07:00'), 
-                    '%H:%M'
-                ).time()
-                end_time = datetime.strptime(
-                    getattr(settings, 'QR_ATTENDANCE_TIME_END', '08:30'), 
-                    '%H:%M'
-                ).time()
-                
-                current_time = now.time()
-                if not (start_time <= current_time <= end_time):
-                    return Response(
-                        {'error': 'Fuera del horario permitido para registro de asistencia'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # Registrar asistencia
-                asistencia, created = Asistencia.objects.get_or_create(
-                    alumno=alumno,
-                    fecha=now.date(),
-                    defaults={
-                        'presente': True,
-                        'registrado_por_qr': True
-                    }
-                )
-                
-                if not created and asistencia.presente:
-                    return Response(
-                        {'message': 'Asistencia ya registrada para hoy'}, 
-                        status=status.HTTP_200_OK
-                    )
-                elif not created:
-                    asistencia.presente = True
-                    asistencia.registrado_por_qr = True
-                    asistencia.save()
-                
+            # El escaneo en vivo se valida con la hora del servidor; la del
+            # teléfono solo puede diferir por el desfase de reloj tolerado.
+            # Los escaneos hechos sin conexión van por /qr/sincronizar/
+            momento = timezone.now()
+            momento_dispositivo = serializer.validated_data.get('momento')
+            if momento_dispositivo is not None and abs(momento_dispositivo - momento) > desfase_tolerado():
                 return Response(
-                    {'message': 'Asistencia registrada exitosamente'}, 
-                    status=status.HTTP_201_CREATED
+                    {'error': 'Hora del dispositivo fuera del rango aceptado'}, 
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-                
-            except Alumno.DoesNotExist:
+            now = timezone.localtime(momento)
+            
+            # Datos del colegio desde el cache del proceso (sin consultas)
+            datos = datos_qr_alumno(get_rol(request).alumno_id)
+            if datos is None:
                 return Response(
                     {'error': 'Usuario no es un alumno'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            
+            paso_qr, rechazo = self.validar_escaneo(datos, qr_token, latitud, longitud, now)
+            if rechazo is not None:
+                return rechazo
+            
+            # Modo diferido: encolar y confirmar sin tocar Asistencia;
+            # procesar_checkins lo aplica en bloque
+            if getattr(settings, 'QR_ASISTENCIA_DIFERIDA', False):
+                with transaction.atomic():
+                    CheckinPendiente.objects.create(alumno_id=datos.alumno_id, fecha=now.date(), recibido=momento)
+                    self.registrar_uso(datos.alumno_id, paso_qr)
+                return Response(
+                    {'message': 'Asistencia recibida, se registrará en unos segundos'},
+                    status=status.HTTP_202_ACCEPTED
+                )
+
+            # Registrar asistencia: con la fila precreada como ausente
+            # basta un UPDATE condicional; el número de filas afectadas
+            # distingue un registro nuevo de uno repetido
+            with transaction.atomic():
+                actualizadas = Asistencia.objects.filter(
+                    Q(registrado_en__isnull=True) | Q(registrado_en__lte=momento),
+                    alumno_id=datos.alumno_id, fecha=now.date(), presente=False
+                ).update(
+                    presente=True, registrado_por_qr=True, registrado_en=momento, actualizado=timezone.now()
+                )
+                if actualizadas and not ResumenDiarioAlumno.objects.filter(
+                    alumno_id=datos.alumno_id, fecha=now.date()
+                ).update(presente=True):
+                    actualizar_resumenes(Asistencia, {(datos.alumno_id, now.date())})
+                
+                # Sin fila precreada, ya presente o con un registro posterior
+                if not actualizadas:
+                    actualizadas = len(marcar_presentes({now.date(): {datos.alumno_id: momento}})[now.date()])
+                self.registrar_uso(datos.alumno_id, paso_qr)
+            
+            if not actualizadas:
+                return Response(
+                    {'message': 'Asistencia ya registrada para hoy'}, 
+                    status=status.HTTP_200_OK
+                )
+            return Response(
+                {'message': 'Asistencia registrada exitosamente'}, 
+                status=status.HTTP_201_CREATED
+            )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class QRSincronizarView(APIView):
+    """
+    Sincronización de los escaneos QR que el teléfono guardó sin conexión:
+    toda la cola llega en una petición y se aplica en una sola transacción.
+    Cada escaneo trae su clave de idempotencia; los ya procesados (por aquí o
+    por el registro QR individual) devuelven la respuesta que se dio entonces.
+    """
+    permission_classes = [IsAlumno]
+
+    def post(self, request):
+        serializer = SincronizarQRSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filas = serializer.validated_data['checkins']
+
+        datos = datos_qr_alumno(get_rol(request).alumno_id)
+        if datos is None:
+            return Response({'error': 'Usuario no es un alumno'}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = [CheckinOfflineSerializer(data=fila) for fila in filas]
+        validos = [item.validated_data for item in items if item.is_valid()]
+        guardadas = buscar_claves(request.user.id, AMBITO_QR, [item['clave'] for item in validos])
+
+        resultados = [None] * len(filas)
+        respuestas = {}          # clave -> (estado, cuerpo) de los escaneos nuevos
+        primera = {}             # clave -> índice de su primera aparición en la cola
+        aceptados = []           # (momento, clave, fecha) de los escaneos válidos
+        por_fecha = {}
+        for indice, item in enumerate(items):
+            if item.errors:
+                resultados[indice] = {'indice': indice, 'estado': 400, 'errores': item.errors}
+                continue
+            clave = item.validated_data['clave']
+            if clave in guardadas:
+                resultados[indice] = {
+                    'indice': indice, 'clave': clave, 'repetido': True,
+                    'estado': guardadas[clave].estado, **guardadas[clave].respuesta
+                }
+                continue
+            if clave in primera:
+                continue
+            primera[clave] = indice
+
+            # Solo escaneos recientes: el código rotativo se valida con esta
+            # hora, así que un código viejo no puede reutilizarse más tarde
+            momento = item.validated_data['momento']
+            if not momento_aceptable(momento, maximo_atraso=atraso_qr_sin_conexion()):
+                respuestas[clave] = (
+                    status.HTTP_400_BAD_REQUEST, {'error': 'Hora del dispositivo fuera del rango aceptado'}
+                )
+                continue
+            ahora = timezone.localtime(momento)
+            _, rechazo = QRAsistenciaView.validar_escaneo(
+                datos, item.validated_data['qr_token'],
+                item.validated_data['latitud'], item.validated_data['longitud'], ahora
+            )
+            if rechazo is not None:
+                respuestas[clave] = (rechazo.status_code, rechazo.data)
+                continue
+            # Varios escaneos del mismo día: cuenta el primero
+            momentos = por_fecha.setdefault(ahora.date(), {})
+            momentos[datos.alumno_id] = min(momento, momentos.get(datos.alumno_id, momento))
+            aceptados.append((momento, clave, ahora.date()))
+
+        with transaction.atomic():
+            marcados = marcar_presentes(por_fecha)
+            registradas = set()
+            for _, clave, fecha in sorted(aceptados):
+                if marcados[fecha] and fecha not in registradas:
+                    registradas.add(fecha)
+                    respuestas[clave] = (status.HTTP_201_CREATED, {'message': 'Asistencia registrada exitosamente'})
+                else:
+                    respuestas[clave] = (status.HTTP_200_OK, {'message': 'Asistencia ya registrada para hoy'})
+            guardar_claves(request.user.id, AMBITO_QR, respuestas)
+
+        for indice, item in enumerate(items):
+            if resultados[indice] is None:
+                clave = item.validated_data['clave']
+                estado, cuerpo = respuestas[clave]
+                resultados[indice] = {
+                    'indice': indice, 'clave': clave, 'repetido': primera[clave] != indice,
+                    'estado': estado, **cuerpo
+                }
+
+        return Response(
+            {
+                'recibidos': len(filas),
+                'registrados': len(registradas),
+                'resultados': resultados,
+            },
+            status=status.HTTP_200_OK
+        )
+
 # Vistas para Participaciones
-class ParticipacionListCreateView(generics.ListCreateAPIView):
+class ParticipacionListCreateView(RelacionesSerializerMixin, generics.ListCreateAPIView):
     serializer_class = ParticipacionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RegistrosPorFechaPagination
     
     def get_queryset(self):
-        user = self.request.user
         queryset = Participacion.objects.all()
         
         # Filtros por parámetros de query
@@ -808,52 +1285,82 @@ class ParticipacionListCreateView(generics.ListCreateAPIView):
         if fecha:
             queryset = queryset.filter(fecha=fecha)
         
-        # Filtros por rol
-        if user.is_superuser:
-            return queryset
-        
-        # Si es maestro tutor, solo ve participaciones de su curso
-        try:
-            maestro = Maestro.objects.get(user=user)
-            return queryset.filter(alumno__curso__tutor=maestro)
-        except Maestro.DoesNotExist:
-            pass
-        
-        # Si es alumno, solo ve sus participaciones
-        try:
-            alumno = Alumno.objects.get(user=user)
-            return queryset.filter(alumno=alumno)
-        except Alumno.DoesNotExist:
-            pass
-        
-        # Si es padre, ve participaciones de sus hijos
-        try:
-            padre = Padre.objects.get(user=user)
-            return queryset.filter(alumno__in=padre.hijos.all())
-        except Padre.DoesNotExist:
-            pass
-        
-        return Participacion.objects.none()
+        # Filtros por rol (tutor, alumno o padre)
+        return filtrar_por_alumno(queryset, get_rol(self.request))
     
     def perform_create(self, serializer):
         # Solo maestros tutores pueden crear participaciones
-        try:
-            maestro = Maestro.objects.get(user=self.request.user)
+        rol = get_rol(self.request)
+        if rol.es_maestro:
             # Verificar que la materia pertenezca al curso del tutor
             materia = serializer.validated_data['materia']
-            if materia.curso.tutor != maestro:
-                raise permissions.PermissionDenied("No puedes registrar participaciones para este curso")
-        except Maestro.DoesNotExist:
-            if not self.request.user.is_superuser:
-                raise permissions.PermissionDenied("Solo los maestros tutores pueden registrar participaciones")
+            if not rol.es_tutor_de(materia.curso_id):
+                raise PermissionDenied("No puedes registrar participaciones para este curso")
+        elif not self.request.user.is_superuser:
+            raise PermissionDenied("Solo los maestros tutores pueden registrar participaciones")
         
         serializer.save()
 
-class ParticipacionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ParticipacionDetailView(RelacionesSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Participacion.objects.all()
     serializer_class = ParticipacionSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessParticipacion]
 
+# Feeds de cambios para la sincronización incremental de los clientes
+class CambiosView(APIView):
+    """
+    Base de GET /api/<recurso>/cambios/?since=<cursor>: filas creadas o
+    modificadas e ids borrados desde el cursor, filtrados por rol, con el
+    cursor para la próxima llamada. Sin `since` entrega todo el historial.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    modelo = None
+    serializer_class = None
+    LIMITE = 500
+    LIMITE_MAXIMO = 1000
+
+    def get(self, request):
+        try:
+            since = request.query_params.get('since')
+            cursor = decodificar_cursor(since) if since else None
+        except CursorInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if cursor is not None and cursor_vencido(cursor):
+            return Response(
+                {'error': 'El cursor es demasiado antiguo; volver a descargar el listado completo'},
+                status=status.HTTP_410_GONE
+            )
+
+        try:
+            limite = int(request.query_params.get('limite', self.LIMITE))
+        except ValueError:
+            limite = self.LIMITE
+        limite = max(1, min(limite, self.LIMITE_MAXIMO))
+
+        rol = get_rol(request)
+        queryset = filtrar_por_alumno(aplicar_relaciones(self.modelo.objects.all(), self.serializer_class), rol)
+        filas, eliminados, siguiente, hay_mas = leer_cambios(
+            queryset, self.modelo._meta.model_name, rol, cursor, limite
+        )
+        return Response({
+            'cambios': self.serializer_class(filas, many=True).data,
+            'eliminados': eliminados,
+            'since': siguiente,
+            'hay_mas': hay_mas,
+        })
+
+class NotaCambiosView(CambiosView):
+    modelo = Nota
+    serializer_class = NotaSerializer
+
+class AsistenciaCambiosView(CambiosView):
+    modelo = Asistencia
+    serializer_class = AsistenciaSerializer
+
+class ParticipacionCambiosView(CambiosView):
+    modelo = Participacion
+    serializer_class = ParticipacionSerializer
+
 # Vista para predicción de rendimiento
 class PrediccionRendimientoView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -862,28 +1369,25 @@ class PrediccionRendimientoView(APIView):
         try:
             alumno = get_object_or_404(Alumno, id=alumno_id)
             
-            # Verificar permisos
+            # Verificar permisos: el propio alumno, el tutor de su curso o sus padres
             if not request.user.is_superuser:
-                try:
-                    if request.user.alumno != alumno:
-                        # Verificar si es tutor del curso
-                        maestro = Maestro.objects.get(user=request.user)
-                        if alumno.curso.tutor != maestro:
-                            # Verificar si es padre del alumno
-                            padre = Padre.objects.get(user=request.user)
-                            if alumno not in padre.hijos.all():
-                                return Response(
-                                    {'error': 'No tienes permisos para ver esta predicción'}, 
-                                    status=status.HTTP_403_FORBIDDEN
-                                )
-                except (Alumno.DoesNotExist, Maestro.DoesNotExist, Padre.DoesNotExist):
+                rol = get_rol(request)
+                if not (
+                    rol.alumno_id == alumno.id
+                    or (rol.es_maestro and rol.es_tutor_de(alumno.curso_id))
+                    or (rol.es_padre and rol.es_padre_de(alumno.id))
+                ):
                     return Response(
                         {'error': 'No tienes permisos para ver esta predicción'}, 
                         status=status.HTTP_403_FORBIDDEN
                     )
             
+            periodo_nota = periodo_por_codigo(periodo)
+            if periodo_nota is None:
+                return Response({'error': 'Período no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
             # Calcular variables para la predicción
-            prediccion_data = self._calcular_prediccion(alumno, periodo)
+            prediccion_data = self._calcular_prediccion(alumno, periodo_nota)
             
             serializer = PrediccionSerializer(prediccion_data)
             return Response(serializer.data)
@@ -896,51 +1400,46 @@ class PrediccionRendimientoView(APIView):
     
     def _calcular_prediccion(self, alumno, periodo_actual):
         """Calcular predicción de rendimiento usando datos históricos"""
-        # Obtener promedio de notas anteriores
-        notas_anteriores = Nota.objects.filter(
-            alumno=alumno,
-            periodo__lt=periodo_actual  # Periodos anteriores
-        ).values_list('valor', flat=True)
-        
-        promedio_notas = sum(notas_anteriores) / len(notas_anteriores) if notas_anteriores else 0
-        
-        # Calcular porcentaje de asistencia del periodo actual
-        asistencias = Asistencia.objects.filter(alumno=alumno, fecha__year=2024)  # Año actual
-        total_dias = asistencias.count()
-        dias_presente = asistencias.filter(presente=True).count()
-        porcentaje_asistencia = (dias_presente / total_dias * 100) if total_dias > 0 else 100
-        
-        # Calcular promedio de participaciones
-        participaciones = Participacion.objects.filter(alumno=alumno).values_list('valor', flat=True)
-        promedio_participaciones = sum(participaciones) / len(participaciones) if participaciones else 0
-        
-        # Predicción simple basada en pesos
-        # Esta es una implementación simplificada. En producción usarías un modelo ML entrenado
-        peso_notas = 0.5
-        peso_asistencia = 0.3
-        peso_participaciones = 0.2
-        
-        prediccion_numerica = (
-            promedio_notas * peso_notas +
-            (porcentaje_asistencia / 100 * 100) * peso_asistencia +
-            (promedio_participaciones / 5 * 100) * peso_participaciones
+        return predecir([alumno.id], periodo_actual)[0]
+
+
+class PrediccionCursoView(APIView):
+    """
+    Predicción de rendimiento de todos los alumnos de un curso en una sola
+    petición, ordenada de mayor a menor riesgo (predicción más baja primero).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, curso_id, periodo):
+        curso = get_object_or_404(Curso, id=curso_id)
+
+        # Solo el tutor del curso o un administrador
+        if not request.user.is_superuser:
+            rol = get_rol(request)
+            if not (rol.es_maestro and rol.es_tutor_de(curso.id)):
+                return Response(
+                    {'error': 'No tienes permisos para ver las predicciones de este curso'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+        periodo_nota = periodo_por_codigo(periodo)
+        if periodo_nota is None:
+            return Response({'error': 'Período no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        alumnos = list(
+            Alumno.objects.filter(curso=curso).select_related('user').order_by('id')
         )
-        
-        # Clasificación basada en la predicción numérica
-        if prediccion_numerica >= 85:
-            clasificacion = "alto"
-        elif prediccion_numerica >= 70:
-            clasificacion = "medio"
-        else:
-            clasificacion = "bajo"
-        
-        return {
-            'prediccion_numerica': round(prediccion_numerica, 2),
-            'clasificacion': clasificacion,
-            'promedio_notas_anteriores': round(promedio_notas, 2),
-            'porcentaje_asistencia': round(porcentaje_asistencia, 2),
-            'promedio_participaciones': round(promedio_participaciones, 2)
-        }
+        nombres = {alumno.id: alumno.user.get_full_name() for alumno in alumnos}
+        predicciones = predecir(nombres, periodo_nota)
+        for prediccion in predicciones:
+            prediccion['nombre_completo'] = nombres[prediccion['alumno_id']]
+        predicciones.sort(key=lambda p: (p['prediccion_numerica'], p['alumno_id']))
+
+        return Response({
+            'curso': curso.id,
+            'periodo': periodo,
+            'alumnos': PrediccionAlumnoSerializer(predicciones, many=True).data,
+        })
 
 # Vista para la página principal
 class HomePageView(TemplateView):
@@ -963,20 +1462,29 @@ def api_root(request):
             },
             'management': {
                 'colegios': '/api/colegios/',
+                'colegio_qr': '/api/colegios/{colegio_id}/qr/',
                 'maestros': '/api/maestros/',
                 'cursos': '/api/cursos/',
                 'materias': '/api/materias/',
+                'gradebook': '/api/cursos/{curso_id}/gradebook/{periodo}/',
                 'alumnos': '/api/alumnos/',
                 'padres': '/api/padres/',
             },
             'academic': {
                 'notas': '/api/notas/',
+                'notas_bulk': '/api/notas/bulk/',
+                'notas_cambios': '/api/notas/cambios/?since={cursor}',
                 'asistencia': '/api/asistencia/',
                 'asistencia_qr': '/api/asistencia/qr/',
+                'asistencia_qr_sincronizar': '/api/asistencia/qr/sincronizar/',
+                'asistencia_bulk': '/api/asistencia/bulk/',
+                'asistencia_cambios': '/api/asistencia/cambios/?since={cursor}',
                 'participaciones': '/api/participaciones/',
+                'participaciones_cambios': '/api/participaciones/cambios/?since={cursor}',
             },
             'ai': {
                 'prediccion': '/api/prediccion/{alumno_id}/{periodo}/',
+                'prediccion_curso': '/api/prediccion/curso/{curso_id}/{periodo}/',
             }
         },
         'test_users': {
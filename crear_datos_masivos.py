@@ -22,6 +22,8 @@ from core.models import (
     Colegio, Curso, Materia, Maestro, Alumno, Padre, 
     Nota, Asistencia, Participacion
 )
+from core.periodos import periodos_del_anio
+from core.resumenes import reconstruir_resumenes
 
 fake = Faker('es_ES')  # Datos en español
 
@@ -40,7 +42,7 @@ CONFIG = {
         'Primaria': ['Matemáticas', 'Lenguaje', 'Ciencias Naturales', 'Estudios Sociales', 'Educación Física', 'Arte', 'Música', 'Inglés'],
         'Secundaria': ['Matemáticas', 'Física', 'Química', 'Biología', 'Historia', 'Geografía', 'Literatura', 'Filosofía', 'Inglés', 'Educación Física', 'Arte', 'Informática']
     },
-    'periodos': ['2024-T1', '2024-T2', '2024-T3', '2024-T4'],
+    'periodos': (2024, 4),    # Año y cantidad de trimestres: 2024-T1 ... 2024-T4
     'notas_por_periodo': 0.9,  # 90% de alumnos tienen notas
     'asistencia_dias': 60,     # Reducido a 60 días para optimización
     'participaciones_factor': 0.3,  # Factor para reducir participaciones
@@ -401,7 +403,7 @@ def crear_notas_masivas(alumnos, materias):
             materias_by_curso[materia.curso_id] = []
         materias_by_curso[materia.curso_id].append(materia)
     
-    for periodo in CONFIG['periodos']:
+    for periodo in periodos_del_anio(*CONFIG['periodos']):
         for alumno in alumnos:
             materias_curso = materias_by_curso.get(alumno.curso_id, [])
             
@@ -652,7 +654,11 @@ def main():
         # 11. Crear participaciones masivas
         crear_participaciones_masivas(alumnos, materias)
         
-        # 12. Mostrar estadísticas finales
+        # 12. Reconstruir resúmenes (bulk_create no pasa por save())
+        print("📈 Reconstruyendo resúmenes materializados...")
+        reconstruir_resumenes()
+        
+        # 13. Mostrar estadísticas finales
         mostrar_estadisticas()
         
         end_time = datetime.now()
@@ -18,6 +18,7 @@ from core.models import (
     Colegio, Curso, Materia, Maestro, Alumno, Padre, 
     Nota, Asistencia, Participacion
 )
+from core.periodos import periodos_del_anio
 
 def crear_datos_prueba():
     print("Creando datos de prueba...")
@@ -173,7 +174,7 @@ def crear_datos_prueba():
             print(f"✓ Alumno creado: {data['username']}/alumno123")
     
     # Crear notas de ejemplo
-    periodos = ['2024-T1', '2024-T2', '2024-T3']
+    periodos = periodos_del_anio(2024, 3)
     
     for alumno in alumnos:
         materias_curso = Materia.objects.filter(curso=alumno.curso)
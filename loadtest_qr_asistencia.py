@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+Prueba de carga del registro de asistencia por QR.
+
+Simula el pico de la mañana: N alumnos escanean el QR a la vez (un hilo por
+escaneo, todos liberados juntos) y mide la latencia de POST /api/asistencia/qr/
+con el registro directo y con la cola diferida (QR_ASISTENCIA_DIFERIDA). En el
+modo diferido, al final vacía la cola y verifica que todos quedaron presentes.
+
+ATENCIÓN: borra la asistencia de hoy de los alumnos usados. Ejecutar solo sobre
+datos de prueba (crear_datos_masivos.py) y con PostgreSQL; max_connections
+debe admitir la concurrencia pedida.
+Ejecutar con: python loadtest_qr_asistencia.py [--escaneos 500] [--repetidos 0.1]
+"""
+
+import os
+import argparse
+import random
+import statistics
+import threading
+import time
+
+import django
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'colegio.settings')
+django.setup()
+
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.asistencias import volcar_checkins
+from core.authentication import RolRefreshToken
+from core.models import Alumno, Asistencia, CheckinPendiente
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def preparar(alumnos, precrear):
+    """Dejar la asistencia de hoy de los alumnos como antes de abrir la ventana"""
+    hoy = timezone.localdate()
+    ids = [alumno.id for alumno in alumnos]
+    Asistencia.objects.filter(alumno_id__in=ids, fecha=hoy).delete()
+    CheckinPendiente.objects.filter(alumno_id__in=ids).delete()
+    if precrear:
+        Asistencia.objects.bulk_create([Asistencia(alumno_id=i, fecha=hoy, presente=False) for i in ids])
+
+
+def ejecutar(escaneos):
+    """Lanzar todos los escaneos a la vez; devuelve latencias (ms) y códigos HTTP"""
+    barrera = threading.Barrier(len(escaneos))
+    latencias = [None] * len(escaneos)
+    codigos = [None] * len(escaneos)
+
+    def escanear(indice, token, datos):
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        try:
+            barrera.wait()
+            inicio = time.perf_counter()
+            respuesta = cliente.post('/api/asistencia/qr/', datos, format='json')
+            latencias[indice] = (time.perf_counter() - inicio) * 1000
+            codigos[indice] = respuesta.status_code
+        finally:
+            connection.close()
+
+    hilos = [
+        threading.Thread(target=escanear, args=(i, token, datos))
+        for i, (token, datos) in enumerate(escaneos)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, codigos, time.perf_counter() - inicio
+
+
+def reportar(nombre, latencias, codigos, segundos):
+    por_codigo = {}
+    for codigo in codigos:
+        por_codigo[codigo] = por_codigo.get(codigo, 0) + 1
+    print(
+        f"{nombre:<10} p50 {statistics.median(latencias):8.1f} ms | "
+        f"p95 {percentil(latencias, 95):8.1f} ms | p99 {percentil(latencias, 99):8.1f} ms | "
+        f"{len(latencias) / segundos:7.1f} req/s | códigos {por_codigo}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--escaneos', type=int, default=500, help='Escaneos concurrentes')
+    parser.add_argument('--repetidos', type=float, default=0.1,
+                        help='Fracción de escaneos que repiten un alumno (doble escaneo)')
+    parser.add_argument('--sin-precrear', action='store_true',
+                        help='No precrear las filas de asistencia (camino get_or_create)')
+    args = parser.parse_args()
+
+    unicos = max(1, int(args.escaneos * (1 - args.repetidos)))
+    alumnos = list(
+        Alumno.objects.filter(user__is_active=True).select_related('user', 'curso__colegio')
+        .order_by('?')[:unicos]
+    )
+    if not alumnos:
+        print("❌ No hay alumnos; ejecutar primero crear_datos_masivos.py")
+        return
+
+    tokens = {alumno.id: str(RolRefreshToken.for_user(alumno.user).access_token) for alumno in alumnos}
+    escaneos = []
+    for i in range(args.escaneos):
+        alumno = alumnos[i] if i < len(alumnos) else random.choice(alumnos)
+        colegio = alumno.curso.colegio
+        escaneos.append((tokens[alumno.id], {
+            'qr_token': colegio.token_qr, 'latitud': colegio.latitud, 'longitud': colegio.longitud,
+        }))
+
+    print("📱 PRUEBA DE CARGA - ASISTENCIA QR")
+    print("=" * 60)
+    print(f"Escaneos: {len(escaneos)} ({len(alumnos)} alumnos distintos) | BD: {connection.vendor}")
+
+    # La ventana horaria se abre todo el día para poder correr la prueba a cualquier hora
+    ventana = dict(QR_ATTENDANCE_TIME_START='00:00', QR_ATTENDANCE_TIME_END='23:59', ALLOWED_HOSTS=['*'])
+    hoy = timezone.localdate()
+    ids = [alumno.id for alumno in alumnos]
+
+    with override_settings(QR_ASISTENCIA_DIFERIDA=False, **ventana):
+        preparar(alumnos, precrear=not args.sin_precrear)
+        reportar('directo', *ejecutar(escaneos))
+
+    with override_settings(QR_ASISTENCIA_DIFERIDA=True, **ventana):
+        preparar(alumnos, precrear=not args.sin_precrear)
+        reportar('diferido', *ejecutar(escaneos))
+
+        inicio = time.perf_counter()
+        consumidos = 0
+        while True:
+            n, _ = volcar_checkins()
+            consumidos += n
+            if not n:
+                break
+        presentes = Asistencia.objects.filter(alumno_id__in=ids, fecha=hoy, presente=True).count()
+        print(
+            f"🔄 Cola vaciada: {consumidos} check-ins en {(time.perf_counter() - inicio) * 1000:.0f} ms; "
+            f"{presentes}/{len(ids)} alumnos presentes"
+        )
+
+
+if __name__ == '__main__':
+    main()